@@ -32,6 +32,9 @@ CORS(
 app.config.from_object(Config)
 init_database(app)
 
+from config.commands import register_commands
+register_commands(app)
+
 app.register_blueprint(auth_routes, url_prefix="/api")
 app.register_blueprint(user_routes, url_prefix="/api")
 app.register_blueprint(task_routes, url_prefix="/api")
@@ -50,6 +53,16 @@ from routes.search_routes import search_routes
 app.register_blueprint(notification_routes, url_prefix="/api")
 app.register_blueprint(search_routes, url_prefix="/api")
 
+# Periodic background threads are not started here; see services/background_workers.py
+from services.insight_worker import insight_worker
+insight_worker.init_app(app)
+
+from services.report_jobs import report_jobs
+report_jobs.init_app(app)
+
+from services.activity_log_writer import activity_log_writer
+activity_log_writer.init_app(app)
+
 
 import logging
 from logging.handlers import RotatingFileHandler
@@ -70,4 +83,8 @@ def home():
     return "🚀 OnboardAI Backend Running.."
 
 if __name__ == "__main__":
+    # With the reloader on, only the serving child process runs them
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        from services.background_workers import start_background_workers_once
+        start_background_workers_once(app)
     app.run(debug=True)
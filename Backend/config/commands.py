@@ -0,0 +1,95 @@
+import click
+from config.db import db
+
+
+def register_commands(app):
+    """Registers maintenance commands on the `flask` CLI."""
+
+    @app.cli.command("create-tables")
+    def create_tables():
+        """Creates any missing tables (existing tables are left untouched), then applies pending migrations."""
+        db.create_all()
+        click.echo("Tables created.")
+        from config.migrations import apply_migrations
+        applied = apply_migrations(db.engine)
+        click.echo(f"Applied {len(applied)} migration(s).")
+
+    @app.cli.command("migrate")
+    def migrate():
+        """Applies pending SQL migrations from the migrations directory."""
+        from config.migrations import apply_migrations
+        applied = apply_migrations(db.engine)
+        click.echo(f"Applied {len(applied)} migration(s): {', '.join(applied) or 'none pending'}.")
+
+    @app.cli.command("check-indexes")
+    def check_indexes():
+        """EXPLAINs the hot queries and fails if any of them is not served by an index."""
+        from config.migrations import explain_hot_queries
+        missing = 0
+        for name, index, _ in explain_hot_queries(db.engine):
+            click.echo(f"{name}: {index or 'NO INDEX'}")
+            missing += index is None
+        if missing:
+            raise click.ClickException(f"{missing} hot query(ies) without an index scan; run `flask migrate`.")
+
+    @app.cli.command("run-background-workers")
+    def run_background_workers():
+        """Runs the periodic background workers in the foreground, for a dedicated worker process."""
+        import time
+        from services.background_workers import claim_background_workers, start_background_workers
+        if not claim_background_workers():
+            raise click.ClickException("Another process on this host already runs the background workers.")
+        started = start_background_workers(app)
+        click.echo(f"Running: {', '.join(started) or 'nothing (all intervals disabled)'}. Ctrl+C to stop.")
+        while True:
+            time.sleep(3600)
+
+    @app.cli.command("sweep-risk-state")
+    def sweep_risk_state():
+        """Refreshes employee_risk_state rows that are missing or due for a time-based transition."""
+        from services.risk_state_service import RiskStateService
+        count = RiskStateService.sweep()
+        click.echo(f"Refreshed risk state for {count} employee(s).")
+
+    @app.cli.command("snapshot-risk-trend")
+    @click.option("--hourly", is_flag=True, help="Also record the hourly series.")
+    def snapshot_risk_trend(hourly):
+        """Records the current per-department and global risk counts in risk_trend_point."""
+        from services.risk_trend_service import RiskTrendService
+        for granularity in (["daily", "hourly"] if hourly else ["daily"]):
+            point = RiskTrendService.snapshot(granularity)
+            click.echo(f"Recorded {granularity} risk point for {point.total} employee(s) (score {point.risk_score}).")
+
+    @app.cli.command("backfill-last-login")
+    @click.option("--overwrite", is_flag=True, help="Replace existing values instead of keeping the newer one.")
+    def backfill_last_login(overwrite):
+        """Fills users' last_login_at / last_activity_at from activity_log history."""
+        from services.user_activity_service import UserActivityService
+        count = UserActivityService.backfill(overwrite=overwrite)
+        click.echo(f"Updated login/activity timestamps for {count} user(s).")
+
+    @app.cli.command("refresh-features")
+    @click.option("--missing", is_flag=True, help="Only create rows for users that have none.")
+    def refresh_features(missing):
+        """Rebuilds every user's employee_features row from Progress."""
+        from services.feature_store import FeatureStore
+        count = FeatureStore.backfill(missing_only=missing)
+        click.echo(f"Refreshed ML features for {count} user(s).")
+
+    @app.cli.command("train-model")
+    @click.option("--data", default=None, help="Training CSV (default services/onboarding_real_data.csv).")
+    @click.option("--output", default=None, help="Model file to write (default MODEL_PATH).")
+    @click.option("--n-estimators", default=200, show_default=True)
+    @click.option("--n-jobs", default=-1, show_default=True, help="Cores used for fitting (-1 = all).")
+    @click.option("--chunksize", default=50000, show_default=True, help="CSV rows read per chunk.")
+    def train_model(data, output, n_estimators, n_jobs, chunksize):
+        """Retrains the risk model and atomically replaces it; running workers hot-swap it."""
+        from services import ml_service
+        model, metrics = ml_service.train_model(
+            data_path=data or ml_service.DATA_PATH,
+            n_estimators=n_estimators,
+            n_jobs=n_jobs,
+            chunksize=chunksize
+        )
+        version = ml_service.save_model(model, metrics, model_path=output or ml_service.MODEL_PATH)
+        click.echo(f"Saved model version {version} (accuracy {metrics['accuracy']:.3f}).")
@@ -12,5 +12,8 @@ def init_database(app):
         from models.employee_notification import EmployeeNotification
         from models.task_message import TaskMessage
         from models.onboarding_template import OnboardingTemplate, TemplateTask
+        from models.employee_risk_state import EmployeeRiskState
+        from models.employee_features import EmployeeFeatures
+        from models.risk_trend_point import RiskTrendPoint
         
 #         db.create_all()
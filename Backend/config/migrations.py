@@ -0,0 +1,243 @@
+"""
+Plain-SQL migrations in Backend/migrations, applied in file-name order and
+recorded in the schema_migrations table, plus an EXPLAIN check that the hot
+queries are served by an index.
+
+    flask --app app migrate
+    flask --app app check-indexes
+"""
+import os
+import re
+import json
+from datetime import datetime
+
+from sqlalchemy import text, select, func, inspect
+
+from config.db import metadata
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+
+
+def _statements(sql):
+    """Splits a migration file into statements, dropping -- comments."""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [stmt.strip() for stmt in "\n".join(lines).split(";") if stmt.strip()]
+
+
+def _for_dialect(statement, dialect, conn=None):
+    """Adapts a PostgreSQL statement to dialect; None means skip it."""
+    if dialect == "postgresql":
+        return statement
+
+    # CONCURRENTLY is PostgreSQL-only
+    statement = re.sub(r"\bCONCURRENTLY\s+", "", statement, flags=re.IGNORECASE)
+
+    # ADD COLUMN IF NOT EXISTS is too; check the column ourselves
+    add_column = re.match(
+        r'^ALTER\s+TABLE\s+"?(\w+)"?\s+ADD\s+COLUMN\s+IF\s+NOT\s+EXISTS\s+(\w+)',
+        statement,
+        flags=re.IGNORECASE
+    )
+    if add_column:
+        table, column = add_column.groups()
+        existing = {c["name"] for c in inspect(conn).get_columns(table, schema=metadata.schema)}
+        if column in existing:
+            return None
+        statement = re.sub(r"\s+IF\s+NOT\s+EXISTS", "", statement, count=1, flags=re.IGNORECASE)
+        if dialect == "sqlite" and metadata.schema:
+            statement = re.sub(
+                r'^(ALTER\s+TABLE\s+)("?\w+"?)', rf"\1{metadata.schema}.\2", statement, flags=re.IGNORECASE
+            )
+
+    # SQLite keeps the schema as an attached database; an index must be
+    # created in its table's database, which SQLite takes from the index name
+    if dialect == "sqlite" and metadata.schema:
+        statement = re.sub(
+            r"^(CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?)(\w+)",
+            rf"\1{metadata.schema}.\2",
+            statement,
+            flags=re.IGNORECASE
+        )
+    return statement
+
+
+def _concurrent_index_name(statement):
+    """The index a CREATE INDEX CONCURRENTLY statement builds, else None."""
+    match = re.match(
+        r'^CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?"?(\w+)"?',
+        statement,
+        flags=re.IGNORECASE
+    )
+    return match.group(1) if match else None
+
+
+def _postgres_index_valid(conn, name):
+    """pg_index.indisvalid for the named index, or None if it does not exist."""
+    return conn.execute(
+        text(
+            "SELECT i.indisvalid FROM pg_index i"
+            " JOIN pg_class c ON c.oid = i.indexrelid"
+            " JOIN pg_namespace n ON n.oid = c.relnamespace"
+            " WHERE c.relname = :name AND n.nspname = COALESCE(:schema, current_schema())"
+        ),
+        {"name": name, "schema": metadata.schema}
+    ).scalar()
+
+
+def _create_index_concurrently(conn, statement, name):
+    """
+    A CREATE INDEX CONCURRENTLY that fails (deadlock, cancel, duplicate key)
+    leaves an INVALID index behind, which IF NOT EXISTS then skips forever.
+    Drops such a leftover before building, and raises if the new index is
+    not valid, so the migration is not recorded and is retried.
+    """
+    qualified = f'"{metadata.schema}"."{name}"' if metadata.schema else f'"{name}"'
+    if _postgres_index_valid(conn, name) is False:
+        print(f"[Migrations] Dropping invalid index {name} left by an earlier failed build")
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {qualified}"))
+
+    conn.execute(text(statement))
+
+    if not _postgres_index_valid(conn, name):
+        raise RuntimeError(f"Index {name} is not valid after CREATE INDEX CONCURRENTLY")
+
+
+def pending_migrations(engine, migrations_dir=MIGRATIONS_DIR):
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "name VARCHAR(255) PRIMARY KEY, applied_at TIMESTAMP)"
+        ))
+        applied = {row[0] for row in conn.execute(text("SELECT name FROM schema_migrations"))}
+    return [
+        name for name in sorted(os.listdir(migrations_dir))
+        if name.endswith(".sql") and name not in applied
+    ]
+
+
+def apply_migrations(engine, migrations_dir=MIGRATIONS_DIR):
+    """
+    Applies every migration file not yet recorded in schema_migrations.
+    Statements run in autocommit mode, which CREATE INDEX CONCURRENTLY
+    requires, so a failed file is not recorded and is retried next time.
+    On PostgreSQL every concurrently built index is checked for validity,
+    and an invalid one from a failed earlier run is dropped and rebuilt.
+    Returns: list of applied file names
+    """
+    applied = []
+    for name in pending_migrations(engine, migrations_dir):
+        with open(os.path.join(migrations_dir, name)) as f:
+            statements = _statements(f.read())
+
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for statement in statements:
+                statement = _for_dialect(statement, engine.dialect.name, conn)
+                if not statement:
+                    continue
+                index_name = _concurrent_index_name(statement) if engine.dialect.name == "postgresql" else None
+                if index_name:
+                    _create_index_concurrently(conn, statement, index_name)
+                else:
+                    conn.execute(text(statement))
+            conn.execute(
+                text("INSERT INTO schema_migrations (name, applied_at) VALUES (:name, :applied_at)"),
+                {"name": name, "applied_at": datetime.utcnow()}
+            )
+        print(f"[Migrations] Applied {name}")
+        applied.append(name)
+    return applied
+
+
+def hot_queries():
+    """
+    The query shapes the indexes in 001_hot_query_indexes.sql serve, as
+    (name, table, statement). Literal values only; the plan is what matters.
+    """
+    from models.activity_log import ActivityLog
+    from models.employee_notification import EmployeeNotification
+    from models.task_message import TaskMessage
+    from models.task import Task
+    from models.user import User
+
+    now = datetime(2030, 1, 1)
+    return [
+        ("last login", "activity_log",
+            select(ActivityLog.timestamp)
+            .where(ActivityLog.user_id == 1, func.lower(ActivityLog.action) == "logged in")
+            .order_by(ActivityLog.timestamp.desc()).limit(1)),
+        ("last login per user", "activity_log",
+            select(ActivityLog.user_id, func.max(ActivityLog.timestamp))
+            .where(ActivityLog.user_id.in_([1, 2, 3]), func.lower(ActivityLog.action) == "logged in")
+            .group_by(ActivityLog.user_id)),
+        ("activity page", "activity_log",
+            select(ActivityLog.id, ActivityLog.timestamp)
+            .where(ActivityLog.timestamp.isnot(None))
+            .order_by(ActivityLog.timestamp.desc(), ActivityLog.id.desc()).limit(51)),
+        ("user activity page", "activity_log",
+            select(ActivityLog.id, ActivityLog.timestamp)
+            .where(ActivityLog.user_id == 1, ActivityLog.timestamp.isnot(None))
+            .order_by(ActivityLog.timestamp.desc(), ActivityLog.id.desc()).limit(51)),
+        ("notifications", "employee_notifications",
+            select(EmployeeNotification.id)
+            .where(EmployeeNotification.user_id == 1)
+            .order_by(EmployeeNotification.created_at.desc())),
+        ("task messages", "task_messages",
+            select(TaskMessage.id)
+            .where(TaskMessage.task_id == 1)
+            .order_by(TaskMessage.created_at.asc())),
+        ("overdue tasks", "task",
+            select(func.count(Task.id))
+            .where(Task.assigned_to == 1, Task.status != "Completed", Task.due_date < now)),
+        ("employees by role", "user",
+            select(User.id).where(func.lower(User.role) == "employee")),
+        ("employees and interns", "user",
+            select(User.id).where(func.lower(User.role).in_(("employee", "intern"))))
+    ]
+
+
+def explain_hot_queries(engine):
+    """
+    EXPLAINs every hot query. On PostgreSQL sequential scans are disabled
+    for the session first, so small tables still show whether an index
+    *can* serve the query.
+    Returns: list of (name, index name or None, plan text)
+    """
+    dialect = engine.dialect.name
+    results = []
+    with engine.connect() as conn:
+        if dialect == "postgresql":
+            conn.execute(text("SET enable_seqscan = off"))
+        for name, table, statement in hot_queries():
+            sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+            if dialect == "postgresql":
+                plan = conn.execute(text("EXPLAIN (FORMAT JSON) " + sql)).scalar()
+                plan = json.loads(plan) if isinstance(plan, str) else plan
+                index = _postgres_index(plan[0]["Plan"], table)
+                plan_text = json.dumps(plan)
+            else:
+                rows = conn.execute(text("EXPLAIN QUERY PLAN " + sql)).fetchall()
+                plan_text = "\n".join(str(row[-1]) for row in rows)
+                index = _sqlite_index(plan_text, table)
+            results.append((name, index, plan_text))
+        if dialect == "postgresql":
+            conn.execute(text("RESET enable_seqscan"))
+    return results
+
+
+def _postgres_index(node, table):
+    if node.get("Relation Name") == table and "Index Name" in node:
+        return node["Index Name"]
+    for child in node.get("Plans", []):
+        index = _postgres_index(child, table)
+        if index:
+            return index
+    return None
+
+
+def _sqlite_index(plan_text, table):
+    # e.g. "SEARCH public.task USING INDEX ix_task_assigned_status_due (assigned_to=?)"
+    match = re.search(
+        rf"(?:SEARCH|SCAN) (?:\w+\.)?{re.escape(table)} USING (?:COVERING )?INDEX (\w+)",
+        plan_text
+    )
+    return match.group(1) if match else None
@@ -0,0 +1,26 @@
+import os
+
+# gunicorn picks this file up automatically when started from this directory:
+#     gunicorn app:app
+
+
+def on_starting(server):
+    # Load the risk model in the master so forked workers share its pages
+    # copy-on-write instead of each loading their own copy
+    if os.environ.get("MODEL_PRELOAD", "1") == "1":
+        from services.predictor import model_holder
+        model_holder.preload()
+
+
+def post_worker_init(worker):
+    # Periodic background threads run in the one worker holding the lock
+    from app import app
+    from services.background_workers import start_background_workers_once
+    if start_background_workers_once(app):
+        worker.log.info("Background workers started in worker %s", worker.pid)
+
+
+def worker_exit(server, worker):
+    # Write activity log entries still buffered in this worker
+    from services.activity_log_writer import activity_log_writer
+    activity_log_writer.flush()
@@ -1,7 +1,7 @@
 from flask import request, jsonify, current_app
 import jwt
 from functools import wraps
-from models.user import User
+from services.principal_cache import principal_cache
 
 def token_required(f):
     @wraps(f)
@@ -17,7 +17,8 @@ def token_required(f):
         
         try:
             data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
-            current_user = User.query.get(int(data['sub']))
+            # Cached per (user, token iat); no user query on a cache hit
+            current_user = principal_cache.from_token(data)
             if not current_user:
                  return jsonify({'message': 'User not found!'}), 401
         except jwt.ExpiredSignatureError:
@@ -0,0 +1,31 @@
+-- Indexes for the hottest filters and orderings.
+-- Built CONCURRENTLY on PostgreSQL so writes are not blocked; the runner
+-- (config/migrations.py) drops the keyword on other databases.
+
+-- Last login per user: user_id + lower(action) = 'logged in', latest timestamp
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_activity_log_user_action_ts
+    ON activity_log (user_id, lower(action), timestamp DESC);
+
+-- One user's activity, newest first, keyset by (timestamp, id)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_activity_log_user_ts
+    ON activity_log (user_id, timestamp DESC, id DESC);
+
+-- Admin activity/audit log pages, keyset by (timestamp, id)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_activity_log_ts_id
+    ON activity_log (timestamp DESC, id DESC);
+
+-- Employee notification feed
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_employee_notifications_user_created
+    ON employee_notifications (user_id, created_at DESC);
+
+-- Task chat history
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_task_messages_task_created
+    ON task_messages (task_id, created_at);
+
+-- Pending / overdue tasks per assignee
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_task_assigned_status_due
+    ON task (assigned_to, status, due_date);
+
+-- Role filters are written as lower(role) = '...' to use this index
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_user_lower_role
+    ON "user" (lower(role));
@@ -0,0 +1,7 @@
+-- Per-user login/activity timestamps maintained at login (and task
+-- completion for last_activity_at), so risk evaluation no longer scans
+-- activity_log. Populate existing users with `flask backfill-last-login`.
+
+ALTER TABLE "user" ADD COLUMN IF NOT EXISTS last_login_at TIMESTAMP;
+
+ALTER TABLE "user" ADD COLUMN IF NOT EXISTS last_activity_at TIMESTAMP;
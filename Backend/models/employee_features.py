@@ -0,0 +1,35 @@
+from config.db import db
+from datetime import datetime
+
+class EmployeeFeatures(db.Model):
+    """
+    Canonical per-employee ML feature row, derived from the Progress table
+    and refreshed whenever it changes (see services/feature_store.py):
+      completion       - average completion % over progress rows
+      delay_days       - average delay in days over progress rows
+      tasks_completed  - progress rows at 100% completion
+      time_spent       - total minutes spent
+    """
+    __tablename__ = 'employee_features'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    completion = db.Column(db.Float, default=0)
+    delay_days = db.Column(db.Float, default=0)
+    tasks_completed = db.Column(db.Integer, default=0)
+    time_spent = db.Column(db.Float, default=0)
+    progress_count = db.Column(db.Integer, default=0)
+    total_delay_days = db.Column(db.Float, default=0)
+    missed_deadlines = db.Column(db.Integer, default=0)  # progress rows with a delay
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "user_id": self.user_id,
+            "completion": self.completion or 0,
+            "delay_days": self.delay_days or 0,
+            "tasks_completed": self.tasks_completed or 0,
+            "time_spent": self.time_spent or 0,
+            "progress_count": self.progress_count or 0,
+            "total_delay_days": self.total_delay_days or 0,
+            "missed_deadlines": self.missed_deadlines or 0
+        }
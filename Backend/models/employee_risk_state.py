@@ -0,0 +1,37 @@
+from config.db import db
+from datetime import datetime
+import json
+
+class EmployeeRiskState(db.Model):
+    __tablename__ = 'employee_risk_state'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    status = db.Column(db.String(50), default="On Track", index=True)  # On Track, At Risk, Delayed
+    reasons = db.Column(db.Text, default="[]")  # JSON list of alert reasons
+    low_engagement = db.Column(db.Boolean, default=False)
+    missed_deadline = db.Column(db.Boolean, default=False)
+    avg_completion = db.Column(db.Float, nullable=True)  # None when no progress rows
+    overdue_count = db.Column(db.Integer, default=0)
+    last_login_at = db.Column(db.DateTime, nullable=True)
+    # Earliest time the status can change without a write (deadline passing, 24h inactivity)
+    next_transition_at = db.Column(db.DateTime, nullable=True, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def get_reasons(self):
+        try:
+            return json.loads(self.reasons or "[]")
+        except ValueError:
+            return []
+
+    def to_dict(self):
+        return {
+            "user_id": self.user_id,
+            "status": self.status,
+            "reasons": self.get_reasons(),
+            "low_engagement": self.low_engagement,
+            "missed_deadline": self.missed_deadline,
+            "avg_completion": self.avg_completion,
+            "overdue_count": self.overdue_count,
+            "last_login_at": self.last_login_at.strftime("%Y-%m-%d %H:%M") if self.last_login_at else None,
+            "updated_at": self.updated_at.strftime("%Y-%m-%d %H:%M") if self.updated_at else None
+        }
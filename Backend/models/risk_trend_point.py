@@ -0,0 +1,36 @@
+from config.db import db
+from datetime import datetime
+
+class RiskTrendPoint(db.Model):
+    """
+    One point of the risk time series: employee status counts for a
+    department (or all employees when department is NULL) at the start of
+    a daily or hourly bucket. Written by services/risk_trend_service.py.
+    """
+    __tablename__ = 'risk_trend_point'
+    __table_args__ = (
+        db.Index('ix_risk_trend_point_series', 'granularity', 'department', 'bucket_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(10), nullable=False, default="daily")  # daily, hourly
+    bucket_at = db.Column(db.DateTime, nullable=False)
+    department = db.Column(db.String(100), nullable=True)  # NULL = all employees
+    total = db.Column(db.Integer, default=0)
+    on_track = db.Column(db.Integer, default=0)
+    at_risk = db.Column(db.Integer, default=0)
+    delayed = db.Column(db.Integer, default=0)
+    risk_score = db.Column(db.Integer, default=0)  # 0-100, see RiskTrendService.STATUS_SCORES
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "granularity": self.granularity,
+            "bucket_at": self.bucket_at.strftime("%Y-%m-%d %H:%M") if self.bucket_at else None,
+            "department": self.department,
+            "total": self.total or 0,
+            "on_track": self.on_track or 0,
+            "at_risk": self.at_risk or 0,
+            "delayed": self.delayed or 0,
+            "risk_score": self.risk_score or 0
+        }
@@ -11,6 +11,9 @@ class User(db.Model):
     risk = db.Column(db.String(50))  # On Track, At Risk, Delayed
     risk_reason = db.Column(db.String(255))
     password_hash = db.Column(db.String(255))
+    # Maintained by UserActivityService; replaces scanning activity_log
+    last_login_at = db.Column(db.DateTime, nullable=True)
+    last_activity_at = db.Column(db.DateTime, nullable=True)  # login or task completion
 
     def to_dict(self):
         return {
@@ -1,7 +1,7 @@
 from flask import Blueprint, jsonify, request
 from models.user import User
-from models.activity_log import ActivityLog
 from models.employee_notification import EmployeeNotification
+from services.activity_log_service import ActivityLogService
 from utils.auth_guard import check_role
 from datetime import datetime
 from sqlalchemy import desc
@@ -18,20 +18,19 @@ def get_admin_activity():
     try:
         # Get current authenticated user
         current_user = request.current_user
-        
-        # Get all activity logs ordered by timestamp (most recent first)
-        logs = ActivityLog.query.order_by(desc(ActivityLog.timestamp)).all()
-        
+
+        # One page of activity logs, most recent first, with the author joined in
+        try:
+            logs, next_cursor, total = ActivityLogService.page_from_args(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
         results = []
         for log in logs:
-            # Get user info to include in response
-            user = User.query.get(log.user_id)
-            user_name = user.name if user else "Unknown"
-            
             results.append({
                 "id": log.id,
                 "user_id": log.user_id,
-                "user_name": user_name,
+                "user_name": log.user_name or "Unknown",
                 "action": log.action or "Unknown Action",
                 "timestamp": log.timestamp.strftime("%Y-%m-%d %H:%M") if log.timestamp else None,
                 "details": log.details or None
@@ -40,8 +39,9 @@ def get_admin_activity():
         return jsonify({
             "admin_id": current_user.id,
             "admin_name": current_user.name,
-            "total_activities": len(results),
-            "activities": results
+            "total_activities": total,
+            "activities": results,
+            "next_cursor": next_cursor
         }), 200
     except Exception as e:
         import traceback
@@ -61,35 +61,30 @@ def get_audit_logs():
         current_user = request.current_user
         
         # Audit logs are essentially activity logs with additional metadata
-        logs = ActivityLog.query.order_by(desc(ActivityLog.timestamp)).all()
-        
+        try:
+            logs, next_cursor, total = ActivityLogService.page_from_args(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
         results = []
         for log in logs:
-            try:
-                user = User.query.get(log.user_id)
-                user_name = user.name if user else "Unknown"
-                user_email = user.email if user else "Unknown"
-                
-                results.append({
-                    "id": log.id,
-                    "user_id": log.user_id,
-                    "user_name": user_name,
-                    "user_email": user_email,
-                    "action": log.action or "Unknown Action",
-                    "timestamp": log.timestamp.isoformat() if log.timestamp else None,
-                    "details": log.details or None,
-                    "action_type": "User Activity"
-                })
-            except Exception as item_error:
-                # Log but continue processing other items
-                print(f"Error processing audit log {log.id}: {str(item_error)}")
-                continue
+            results.append({
+                "id": log.id,
+                "user_id": log.user_id,
+                "user_name": log.user_name or "Unknown",
+                "user_email": log.user_email or "Unknown",
+                "action": log.action or "Unknown Action",
+                "timestamp": log.timestamp.isoformat() if log.timestamp else None,
+                "details": log.details or None,
+                "action_type": "User Activity"
+            })
         
         return jsonify({
             "admin_id": current_user.id,
             "admin_name": current_user.name,
-            "total_logs": len(results),
-            "audit_logs": results
+            "total_logs": total,
+            "audit_logs": results,
+            "next_cursor": next_cursor
         }), 200
     except Exception as e:
         import traceback
@@ -160,10 +155,11 @@ def get_employee_activity_admin(employee_id):
         if not employee:
             return jsonify({"error": "Employee not found"}), 404
         
-        # Get all activities for this employee
-        logs = ActivityLog.query.filter_by(user_id=employee_id).order_by(
-            desc(ActivityLog.timestamp)
-        ).all()
+        # One page of this employee's activities
+        try:
+            logs, next_cursor, total = ActivityLogService.page_from_args(request.args, user_id=employee_id)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
         results = []
         for log in logs:
@@ -180,8 +176,9 @@ def get_employee_activity_admin(employee_id):
             "employee_id": employee_id,
             "employee_name": employee.name,
             "employee_email": employee.email,
-            "total_activities": len(results),
-            "activities": results
+            "total_activities": total,
+            "activities": results,
+            "next_cursor": next_cursor
         }), 200
     except Exception as e:
         import traceback
@@ -200,31 +197,28 @@ def get_admin_logs():
     try:
         current_user = request.current_user
         
-        logs = ActivityLog.query.order_by(desc(ActivityLog.timestamp)).all()
+        try:
+            logs, next_cursor, total = ActivityLogService.page_from_args(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
         results = []
         for log in logs:
-            try:
-                user = User.query.get(log.user_id)
-                user_name = user.name if user else "Unknown"
-                
-                results.append({
-                    "id": log.id,
-                    "user_id": log.user_id,
-                    "user_name": user_name,
-                    "action": log.action or "Unknown Action",
-                    "timestamp": log.timestamp.strftime("%Y-%m-%d %H:%M") if log.timestamp else None,
-                    "details": log.details or None
-                })
-            except Exception as item_error:
-                print(f"Error processing log {log.id}: {str(item_error)}")
-                continue
+            results.append({
+                "id": log.id,
+                "user_id": log.user_id,
+                "user_name": log.user_name or "Unknown",
+                "action": log.action or "Unknown Action",
+                "timestamp": log.timestamp.strftime("%Y-%m-%d %H:%M") if log.timestamp else None,
+                "details": log.details or None
+            })
         
         return jsonify({
             "admin_id": current_user.id,
             "admin_name": current_user.name,
-            "total_logs": len(results),
-            "logs": results
+            "total_logs": total,
+            "logs": results,
+            "next_cursor": next_cursor
         }), 200
     except Exception as e:
         import traceback
@@ -48,6 +48,9 @@ def create_alert():
     db.session.add(new_notif)
     
     db.session.commit()
+
+    from services.insight_worker import enqueue_insight_refresh
+    enqueue_insight_refresh([target_user_id])
     
     print(f"Reminder sent to user {target_user_id}: {message}") # Console log requirement
     
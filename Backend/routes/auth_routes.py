@@ -4,8 +4,7 @@ import jwt
 import datetime
 import bcrypt
 from werkzeug.security import check_password_hash
-from config.db import db
-from models.activity_log import ActivityLog
+from services.user_activity_service import UserActivityService
 
 auth_routes = Blueprint("auth_routes", __name__)
 
@@ -35,18 +34,18 @@ def login():
             print("Password verified.")
             
             try:
-                login_log = ActivityLog(user_id=user.id, action="Logged in")
-                db.session.add(login_log)
-                db.session.commit()
+                # Queued; the activity log writer inserts it with other
+                # logins, stamps last_login_at and refreshes the risk state
+                UserActivityService.record_login(user)
             except Exception as e:
                 print(f"Error logging activity: {e}")
-                db.session.rollback()
 
             # Generate JWT
             token = jwt.encode({
                 "sub": str(user.id),
                 "role": user.role,
                 "name": user.name,
+                "iat": datetime.datetime.utcnow(),
                 "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=24)
             }, current_app.config['SECRET_KEY'], algorithm="HS256")
             
@@ -1,14 +1,15 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from models.user import User
 from models.task import Task
 from models.progress import Progress
 from models.activity_log import ActivityLog
-from services.predictor import predict_risk, analyze_employee_risk
-from services.ai_explainer import explain_risk
+from services.predictor import predict_risk_batch, analyze_employee_risk
+from services.ai_explainer import explain_risk_batch
+from services.feature_store import FeatureStore
+from services.risk_trend_service import RiskTrendService
 from utils.auth_guard import check_role
 from datetime import datetime, timedelta
 from sqlalchemy import func, desc
-import random
 
 dashboard_routes = Blueprint("dashboard_routes", __name__)
 
@@ -31,41 +32,21 @@ def dashboard_summary():
 @dashboard_routes.route("/dashboard/risk-trend", methods=["GET"])
 @check_role(["admin", "hr"])
 def get_risk_trend():
-    # Use AlertService as Single Source of Truth for current state
-    user_risks = AlertService.get_user_risks()
-    
-    current_risk_score = 0
-    total_users = len(user_risks)
-    
-    if total_users > 0:
-        total_risk = 0
-        for uid, data in user_risks.items():
-            status = data['status']
-            # Simple heuristic matching reports logic: On Track=10, At Risk=50, Delayed=90
-            if status == "On Track": total_risk += 10
-            elif status == "At Risk": total_risk += 50
-            elif status == "Delayed": total_risk += 90
-            else: total_risk += 10
-        current_risk_score = int(total_risk / total_users)
-
-    # Generate 7 days of data ending in current_score
-    days = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-    
-    trend_data = []
-    base_score = current_risk_score
-    
-    for i in range(6, -1, -1):
-        # vary slightly but trend towards actual
-        variation = random.randint(-15, 15)
-        # dampen variation as we get closer to today (index 0 is T-6, index 6 is Today)
-        if i == 0: variation = 0 # Today matches exactly
-        
-        day_score = max(0, min(100, base_score + variation))
-        
-        day_label = days[(datetime.now().weekday() - i) % 7]
-        trend_data.append({"name": day_label, "risk": day_score})
-    
-    return jsonify(trend_data)
+    # Recorded snapshots (see RiskTrendService), oldest first
+    granularity = request.args.get("granularity", "daily")
+    if granularity not in ("daily", "hourly"):
+        return jsonify({"error": "granularity must be daily or hourly"}), 400
+    points = min(max(request.args.get("points", 7, type=int), 1), 168)
+
+    trend = RiskTrendService.get_trend(
+        points=points,
+        granularity=granularity,
+        department=request.args.get("department")
+    )
+    return jsonify([
+        {"name": RiskTrendService.label(point), "risk": point.risk_score}
+        for point in trend
+    ])
 
 # -------------------------------------------------
 # 2️⃣ USER PROGRESS (BASIC)
@@ -73,21 +54,13 @@ def get_risk_trend():
 @dashboard_routes.route("/dashboard/user-progress", methods=["GET"])
 @check_role(["admin", "hr"])
 def user_progress():
-    users = User.query.all()
     results = []
 
-    for user in users:
-        user_progress = Progress.query.filter_by(user_id=user.id).all()
-
-        if user_progress:
-            avg_completion = sum(p.completion for p in user_progress) / len(user_progress)
-        else:
-            avg_completion = 0
-
+    for user, features in FeatureStore.users_with_features():
         results.append({
             "user_id": user.id,
             "name": user.name,
-            "completion_percent": round(avg_completion, 2)
+            "completion_percent": round(features["completion"], 2)
         })
 
     return jsonify(results)
@@ -98,30 +71,22 @@ def user_progress():
 @dashboard_routes.route("/dashboard/ai-risk", methods=["GET"])
 @check_role(["admin", "hr"])
 def dashboard_ai_risk():
-    users = User.query.all()
     results = []
 
-    for user in users:
-        progress_list = Progress.query.filter_by(user_id=user.id).all()
-        if not progress_list:
-            continue
+    rows = [
+        (user, features)
+        for user, features in FeatureStore.users_with_features()
+        if features["progress_count"]
+    ]
 
-        avg_completion = sum(p.completion for p in progress_list) / len(progress_list)
-        avg_delay = sum(p.delay_days for p in progress_list) / len(progress_list)
-        time_spent = sum(p.time_spent for p in progress_list)
-
-        prediction = predict_risk({
-            "completion": avg_completion,
-            "delay_days": avg_delay,
-            "tasks_completed": len(progress_list), 
-            "time_spent": time_spent
-        })
+    predictions = predict_risk_batch([FeatureStore.model_input(features) for _, features in rows])
 
+    for (user, features), prediction in zip(rows, predictions):
         results.append({
             "user_id": user.id,
             "name": user.name,
-            "completion_percent": round(avg_completion, 2),
-            "avg_delay_days": round(avg_delay, 2),
+            "completion_percent": round(features["completion"], 2),
+            "avg_delay_days": round(features["delay_days"], 2),
             "ai_risk": prediction
         })
 
@@ -133,36 +98,24 @@ def dashboard_ai_risk():
 @dashboard_routes.route("/dashboard/ai-explanations", methods=["GET"])
 @check_role(["admin", "hr"])
 def dashboard_ai_explanations():
-    users = User.query.all()
     results = []
 
-    for user in users:
-        progress_list = Progress.query.filter_by(user_id=user.id).all()
-        if not progress_list:
-            continue
+    rows = [
+        (user, features)
+        for user, features in FeatureStore.users_with_features()
+        if features["progress_count"]
+    ]
 
-        avg_completion = sum(p.completion for p in progress_list) / len(progress_list)
-        avg_delay = sum(p.delay_days for p in progress_list) / len(progress_list)
-        time_spent = sum(p.time_spent for p in progress_list)
-
-        risk = predict_risk({
-            "completion": avg_completion,
-            "delay_days": avg_delay,
-            "tasks_completed": len(progress_list),
-            "time_spent": time_spent
-        })
-
-        reasons = explain_risk({
-            "completion": avg_completion,
-            "delay_days": avg_delay,
-            "tasks_completed": len(progress_list)
-        })
+    model_inputs = [FeatureStore.model_input(features) for _, features in rows]
+    risks = predict_risk_batch(model_inputs)
+    explanations = explain_risk_batch(model_inputs)
 
+    for (user, features), risk, reasons in zip(rows, risks, explanations):
         results.append({
             "user_id": user.id,
             "name": user.name,
-            "completion_percent": round(avg_completion, 2),
-            "delay_days": round(avg_delay, 2),
+            "completion_percent": round(features["completion"], 2),
+            "delay_days": round(features["delay_days"], 2),
             "risk": risk,
             "reasons": reasons
         })
@@ -6,7 +6,10 @@ from models.task import Task
 from models.activity_log import ActivityLog
 from models.employee_notification import EmployeeNotification
 from config.db import db
-from services.predictor import analyze_employee_risk
+from sqlalchemy import func
+from services.predictor import analyze_employee_risk, analyze_employee_risk_batch
+from services.feature_store import FeatureStore
+from services.activity_log_writer import activity_log_writer
 from utils.auth_guard import check_role
 
 employee_routes = Blueprint("employee_routes", __name__)
@@ -24,37 +27,20 @@ def get_all_employees():
     requester_role = get_current_user_role()
     
     # Base query for employees/interns
-    query = User.query.filter(User.role.ilike("employee") | User.role.ilike("intern"))
+    query = User.query.filter(func.lower(User.role).in_(("employee", "intern")))
     
     # If HR/Admin, fetch performance stats efficiently
     if requester_role in ["hr", "hr_admin", "admin"]:
-        from sqlalchemy import func, case
-        from config.db import db
-        
-        # Join with Progress to aggregate data
-        # output: (User, total_completion, total_delay_days, total_tasks, missed_count)
-        results = db.session.query(
-            User,
-            func.coalesce(func.sum(Progress.completion), 0).label('total_completion'),
-            func.coalesce(func.sum(Progress.delay_days), 0).label('total_delay'),
-            func.count(Progress.id).label('task_count'),
-            func.sum(case((Progress.delay_days > 0, 1), else_=0)).label('missed_count')
-        ).outerjoin(Progress, User.id == Progress.user_id)\
-         .filter(User.role.ilike("employee") | User.role.ilike("intern"))\
-         .group_by(User.id).all()
+        # Precomputed feature rows instead of aggregating Progress per request
+        rows = FeatureStore.users_with_features(func.lower(User.role).in_(("employee", "intern")))
+        analyses = analyze_employee_risk_batch([
+            dict(FeatureStore.model_input(features), missed_deadlines=features["missed_deadlines"])
+            for _, features in rows
+        ])
 
         response_data = []
-        for user, total_comp, total_delay, count, missed in results:
-            completion_avg = 0
-            if count > 0:
-                completion_avg = total_comp / count
-            
-            # Dynamic Risk Analysis
-            analysis = analyze_employee_risk({
-                "completion": completion_avg,
-                "delay_days": total_delay,
-                "missed_deadlines": missed or 0
-            })
+        for (user, features), analysis in zip(rows, analyses):
+            completion_avg = features["completion"]
 
             response_data.append({
                 "id": user.id,
@@ -99,26 +85,16 @@ def get_employee_detail(user_id):
     
     # Calculate for HR/Admin/HR_Admin
     if requester_role in ["hr", "hr_admin", "admin"]:
-        progress_list = Progress.query.filter_by(user_id=user.id).all()
-        
-        total_items = len(progress_list)
-        completion = 0
-        delay_days = 0
-        missed = 0
-        
-        if total_items > 0:
-            completion = sum(p.completion or 0 for p in progress_list) / total_items
-            delay_days = sum(p.delay_days or 0 for p in progress_list)
-            missed = sum(1 for p in progress_list if (p.delay_days or 0) > 0)
+        features = FeatureStore.get(user.id)
+        completion = features["completion"]
         
         score_val = round(completion, 1)
         
         # Dynamic Risk Analysis
-        analysis = analyze_employee_risk({
-            "completion": completion,
-            "delay_days": delay_days,
-            "missed_deadlines": missed
-        })
+        analysis = analyze_employee_risk(dict(
+            FeatureStore.model_input(features),
+            missed_deadlines=features["missed_deadlines"]
+        ))
         
         risk_val = analysis["risk_level"]
         risk_reason = analysis["message"]
@@ -217,16 +193,15 @@ def send_employee_alert(user_id):
         created_at=datetime.now()
     )
     db.session.add(notification)
+    db.session.commit()
     
-    # Log Activity
-    log = ActivityLog(
-        user_id=user_id,
-        action="In-App Alert Sent",
+    # Log Activity (batched by the writer)
+    activity_log_writer.log(
+        user_id,
+        "In-App Alert Sent",
         timestamp=datetime.now(),
         details=f"Message: {message}"
     )
-    db.session.add(log)
-    db.session.commit()
     
     return jsonify({"message": "Alert sent successfully"}), 200
 
@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from models.progress import Progress
 from config.db import db
+from services.risk_state_service import RiskStateService
+from services.feature_store import FeatureStore
 
 progress_routes = Blueprint("progress_routes", __name__)
 
@@ -16,6 +18,8 @@ def update_progress():
     )
     
     db.session.add(progress)
+    FeatureStore.refresh([progress.user_id])
+    RiskStateService.refresh([progress.user_id])
     db.session.commit()
     
     return jsonify({"message": "Progress recorded"}), 201
@@ -1,19 +1,13 @@
-from flask import Blueprint, jsonify, send_file, Response
+from flask import Blueprint, jsonify, send_file, Response, request, stream_with_context, current_app
 from services.alert_service import AlertService
+from services.risk_trend_service import RiskTrendService
+from services import report_renderer
+from services.report_jobs import report_jobs, REPORT_FORMATS, XLSX_MIMETYPE
 from utils.auth_guard import check_role
 
 import io
-import csv
-import random
-from datetime import datetime
-
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-
-import openpyxl
-from openpyxl.styles import Font, PatternFill
+import os
+import tempfile
 
 reports_routes = Blueprint("reports_routes", __name__)
 
@@ -53,48 +47,14 @@ def get_reports_summary():
 
 def _generate_trend_data():
     try:
-        user_risks = AlertService.get_user_risks() or {}
-
-        total_users = len(user_risks)
-        total_risk = 0
-
-        for data in user_risks.values():
-            status = data.get("status")
-
-            if status == "On Track":
-                total_risk += 10
-            elif status == "At Risk":
-                total_risk += 50
-            elif status == "Delayed":
-                total_risk += 90
-            else:
-                total_risk += 10
-
-        current_risk_score = int(total_risk / total_users) if total_users else 0
-
-        days = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-        trend_data = []
-
-        base_risks = sum(
-            1 for data in user_risks.values()
-            if data.get("status") in ["At Risk", "Delayed"]
-        )
-
-        for i in range(6, -1, -1):
-            variation = random.randint(-2, 2)
-            day_risks = max(0, base_risks + variation)
-
-            if i == 0:
-                day_risks = base_risks
-
-            day_label = days[(datetime.now().weekday() - i) % 7]
-
-            trend_data.append({
-                "day": day_label,
-                "risks": day_risks
-            })
-
-        return trend_data
+        # Last seven daily snapshots; "risks" counts At Risk + Delayed employees
+        return [
+            {
+                "day": RiskTrendService.label(point),
+                "risks": (point.at_risk or 0) + (point.delayed or 0)
+            }
+            for point in RiskTrendService.get_trend(points=7)
+        ]
 
     except Exception as e:
         print("Trend generation error:", e)
@@ -120,154 +80,7 @@ def get_weekly_risk_trend():
 def download_pdf():
     try:
         buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=40, leftMargin=40, topMargin=40, bottomMargin=40)
-
-        elements = []
-        styles = getSampleStyleSheet()
-        
-        title_style = styles["Heading1"]
-        title_style.alignment = 1 # Center
-        subtitle_style = styles["Heading2"]
-        subtitle_style.textColor = colors.HexColor("#2C3E50")
-        subtitle_style.spaceAfter = 10
-        normal_style = styles["Normal"]
-
-        title = Paragraph("Onboarding Risk Analysis Report", title_style)
-        elements.append(title)
-        elements.append(Spacer(1, 12))
-
-        elements.append(
-            Paragraph(
-                f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-                styles["Normal"]
-            )
-        )
-
-        elements.append(Spacer(1, 20))
-
-        stats = AlertService.get_dashboard_stats()
-        user_risks = AlertService.get_user_risks() or {}
-
-        # 1. Summary Metrics
-        elements.append(Paragraph("1. Summary Metrics", subtitle_style))
-        overview_data = [
-            ["Metric", "Value"],
-            ["Total Employees", str(stats.get("total_employees", 0))],
-            ["Avg Completion %", f"{stats.get('avg_completion',0)}%"],
-            ["Time to Onboard Target", "14 Days"]
-        ]
-        
-        summary_table = Table(overview_data, colWidths=[200, 100])
-        summary_table.setStyle(TableStyle([
-            ("BACKGROUND", (0,0), (-1,0), colors.HexColor("#34495E")),
-            ("TEXTCOLOR", (0,0), (-1,0), colors.whitesmoke),
-            ("ALIGN", (0,0), (-1,-1), "LEFT"),
-            ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
-            ("BOTTOMPADDING", (0,0), (-1,0), 8),
-            ("BACKGROUND", (0,1), (-1,-1), colors.HexColor("#ECF0F1")),
-            ("GRID", (0,0), (-1,-1), 1, colors.white)
-        ]))
-        elements.append(summary_table)
-        elements.append(Spacer(1, 20))
-        
-        # 2. Employee Status Breakdown
-        elements.append(Paragraph("2. Employee Status Breakdown", subtitle_style))
-        status_data = [
-            ["Status", "Count"],
-            ["On Track", str(stats.get("on_track", 0))],
-            ["At Risk", str(stats.get("at_risk", 0))],
-            ["Delayed", str(stats.get("delayed", 0))]
-        ]
-        
-        status_table = Table(status_data, colWidths=[200, 100])
-        status_table.setStyle(TableStyle([
-            ("BACKGROUND", (0,0), (-1,0), colors.HexColor("#34495E")),
-            ("TEXTCOLOR", (0,0), (-1,0), colors.whitesmoke),
-            ("ALIGN", (0,0), (-1,-1), "LEFT"),
-            ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
-            ("BOTTOMPADDING", (0,0), (-1,0), 8),
-            ("BACKGROUND", (0,1), (-1,-1), colors.HexColor("#ECF0F1")),
-            ("GRID", (0,0), (-1,-1), 1, colors.white)
-        ]))
-        elements.append(status_table)
-        elements.append(Spacer(1, 25))
-        
-        # Group users by status
-        delayed_users = []
-        at_risk_users = []
-        on_track_users = []
-        
-        for data in user_risks.values():
-            status = data.get("status")
-            user = data.get("user")
-            reasons_text = "; ".join(data.get("reasons", []))
-            reasons_para = Paragraph(reasons_text, normal_style) if reasons_text else "N/A"
-            row = [getattr(user, "name", ""), getattr(user, "department", "N/A"), reasons_para]
-            
-            if status == "Delayed":
-                delayed_users.append(row)
-            elif status == "At Risk":
-                at_risk_users.append(row)
-            else:
-                on_track_users.append([getattr(user, "name", ""), getattr(user, "department", "N/A"), "N/A"])
-                
-        # 3. High Risk Employees (Delayed)
-        elements.append(Paragraph("3. High Risk Employees (Delayed)", subtitle_style))
-        if delayed_users:
-            delayed_data = [["Employee Name", "Department", "Risk Reasons"]] + delayed_users
-            delayed_table = Table(delayed_data, colWidths=[150, 120, 250])
-            delayed_table.setStyle(TableStyle([
-                ("BACKGROUND", (0,0), (-1,0), colors.HexColor("#E74C3C")),
-                ("TEXTCOLOR", (0,0), (-1,0), colors.whitesmoke),
-                ("ALIGN", (0,0), (-1,-1), "LEFT"),
-                ("VALIGN", (0,0), (-1,-1), "TOP"),
-                ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
-                ("BOTTOMPADDING", (0,0), (-1,0), 8),
-                ("GRID", (0,0), (-1,-1), 1, colors.HexColor("#BDC3C7"))
-            ]))
-            elements.append(delayed_table)
-        else:
-            elements.append(Paragraph("No employees in 'Delayed' status.", normal_style))
-        elements.append(Spacer(1, 25))
-        
-        # 4. At Risk Employees
-        elements.append(Paragraph("4. At Risk Employees", subtitle_style))
-        if at_risk_users:
-            at_risk_data = [["Employee Name", "Department", "Risk Reasons"]] + at_risk_users
-            at_risk_table = Table(at_risk_data, colWidths=[150, 120, 250])
-            at_risk_table.setStyle(TableStyle([
-                ("BACKGROUND", (0,0), (-1,0), colors.HexColor("#F39C12")),
-                ("TEXTCOLOR", (0,0), (-1,0), colors.whitesmoke),
-                ("ALIGN", (0,0), (-1,-1), "LEFT"),
-                ("VALIGN", (0,0), (-1,-1), "TOP"),
-                ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
-                ("BOTTOMPADDING", (0,0), (-1,0), 8),
-                ("GRID", (0,0), (-1,-1), 1, colors.HexColor("#BDC3C7"))
-            ]))
-            elements.append(at_risk_table)
-        else:
-            elements.append(Paragraph("No employees in 'At Risk' status.", normal_style))
-        elements.append(Spacer(1, 25))
-        
-        # 5. On Track Employees
-        elements.append(Paragraph("5. On Track Employees", subtitle_style))
-        if on_track_users:
-            on_track_data = [["Employee Name", "Department", "Status"]] + on_track_users
-            on_track_table = Table(on_track_data, colWidths=[150, 120, 250])
-            on_track_table.setStyle(TableStyle([
-                ("BACKGROUND", (0,0), (-1,0), colors.HexColor("#27AE60")),
-                ("TEXTCOLOR", (0,0), (-1,0), colors.whitesmoke),
-                ("ALIGN", (0,0), (-1,-1), "LEFT"),
-                ("VALIGN", (0,0), (-1,-1), "TOP"),
-                ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
-                ("BOTTOMPADDING", (0,0), (-1,0), 8),
-                ("GRID", (0,0), (-1,-1), 1, colors.HexColor("#BDC3C7"))
-            ]))
-            elements.append(on_track_table)
-        else:
-            elements.append(Paragraph("No employees in 'On Track' status.", normal_style))
-
-        doc.build(elements)
+        report_renderer.render_pdf(buffer)
         buffer.seek(0)
 
         return send_file(
@@ -289,49 +102,27 @@ def download_pdf():
 @reports_routes.route("/reports/download/csv", methods=["GET"])
 @check_role(["admin", "hr"])
 def download_csv():
-    try:
-        user_risks = AlertService.get_user_risks() or {}
-
-        output = io.StringIO()
-        writer = csv.writer(output)
-
-        writer.writerow([
-            "employee_id",
-            "name",
-            "email",
-            "department",
-            "role",
-            "risk_status",
-            "risk_reasons"
-        ])
-
-        for data in user_risks.values():
-            user = data.get("user")
-
-            writer.writerow([
-                getattr(user, "id", ""),
-                getattr(user, "name", ""),
-                getattr(user, "email", ""),
-                getattr(user, "department", ""),
-                getattr(user, "role", ""),
-                data.get("status"),
-                "; ".join(data.get("reasons", []))
-            ])
-
-        output.seek(0)
-
-        return Response(
-            output.getvalue(),
-            mimetype="text/csv",
-            headers={
-                "Content-Disposition":
-                "attachment;filename=onboardai-report.csv"
-            }
-        )
-
-    except Exception as e:
-        print("CSV generation error:", e)
-        return jsonify({"error": "CSV generation failed"}), 500
+    chunk_size = min(max(request.args.get("chunk_size", report_renderer.CHUNK_SIZE, type=int), 1), 5000)
+
+    def generate():
+        try:
+            # Employees are evaluated and written one id-ordered page at a time
+            for block in report_renderer.iter_csv(chunk_size):
+                yield block
+        except Exception:
+            # Headers are already sent: mark the file as incomplete so it
+            # can't be mistaken for a full report
+            current_app.logger.exception("CSV generation failed; report truncated")
+            yield "# ERROR: report truncated\r\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/csv",
+        headers={
+            "Content-Disposition":
+            "attachment;filename=onboardai-report.csv"
+        }
+    )
 
 
 # ==========================================
@@ -341,58 +132,99 @@ def download_csv():
 @reports_routes.route("/reports/download/excel", methods=["GET"])
 @check_role(["admin", "hr"])
 def download_excel():
+    path = None
     try:
-        user_risks = AlertService.get_user_risks() or {}
-        stats = AlertService.get_dashboard_stats()
+        fd, path = tempfile.mkstemp(prefix="onboardai-report-", suffix=".xlsx")
+        os.close(fd)
+        report_renderer.write_excel(path)
+    except Exception as e:
+        print("Excel generation error:", e)
+        if path and os.path.exists(path):
+            os.remove(path)
+        return jsonify({"error": "Excel generation failed"}), 500
+
+    return _stream_file(path, "onboardai-report.xlsx", XLSX_MIMETYPE, remove=True)
+
+
+def _stream_file(path, download_name, mimetype, remove=False):
+    """Streams a file from disk in 64 KiB blocks, optionally deleting it afterwards."""
+    size = os.path.getsize(path)
+
+    def generate():
+        with open(path, "rb") as f:
+            while True:
+                data = f.read(64 * 1024)
+                if not data:
+                    break
+                yield data
+
+    response = Response(
+        generate(),
+        mimetype=mimetype,
+        headers={
+            "Content-Disposition": f"attachment;filename={download_name}",
+            "Content-Length": str(size)
+        }
+    )
+    if remove:
+        # Runs when the server closes the response (after the body iterator is
+        # closed), even if the client disconnects before the body is read
+        response.call_on_close(lambda: _remove_quietly(path))
+    return response
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError as e:
+        print(f"[Reports] Could not remove temp file {path}: {e}")
 
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Employees"
-
-        headers = [
-            "employee_id",
-            "name",
-            "email",
-            "department",
-            "role",
-            "risk_status",
-            "risk_reasons"
-        ]
 
-        ws.append(headers)
-
-        for cell in ws[1]:
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(
-                start_color="CCCCCC",
-                end_color="CCCCCC",
-                fill_type="solid"
-            )
-
-        for data in user_risks.values():
-            user = data.get("user")
-
-            ws.append([
-                getattr(user, "id", ""),
-                getattr(user, "name", ""),
-                getattr(user, "email", ""),
-                getattr(user, "department", ""),
-                getattr(user, "role", ""),
-                data.get("status"),
-                "; ".join(data.get("reasons", []))
-            ])
+# ==========================================
+# BACKGROUND REPORT JOBS
+# ==========================================
+
+@reports_routes.route("/reports/jobs", methods=["POST"])
+@check_role(["admin", "hr"])
+def create_report_job():
+    data = request.get_json(silent=True) or {}
+    report_format = (data.get("format") or "").lower()
+    if report_format not in REPORT_FORMATS:
+        return jsonify({"error": f"format must be one of: {', '.join(REPORT_FORMATS)}"}), 400
 
-        buffer = io.BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
+    job, reused = report_jobs.submit(report_format, requested_by=request.current_user.id)
+    response = _job_response(job)
+    response["reused"] = reused
+    return jsonify(response), (200 if job["status"] == "done" else 202)
 
-        return send_file(
-            buffer,
-            as_attachment=True,
-            download_name="onboardai-report.xlsx",
-            mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
 
-    except Exception as e:
-        print("Excel generation error:", e)
-        return jsonify({"error": "Excel generation failed"}), 500
\ No newline at end of file
+@reports_routes.route("/reports/jobs/<job_id>", methods=["GET"])
+@check_role(["admin", "hr"])
+def get_report_job(job_id):
+    job = report_jobs.get(job_id)
+    if not job:
+        return jsonify({"error": "Report job not found"}), 404
+
+    # Finished jobs return the artifact unless only the status is asked for
+    if job["status"] == "done" and request.args.get("status") != "1":
+        path = report_jobs.artifact_path(job)
+        if not os.path.exists(path):
+            return jsonify({"error": "Report artifact has expired"}), 410
+        fmt = REPORT_FORMATS[job["format"]]
+        return _stream_file(path, f"onboardai-report.{fmt['extension']}", fmt["mimetype"])
+
+    if job["status"] == "failed":
+        return jsonify(_job_response(job)), 500
+    return jsonify(_job_response(job)), (200 if job["status"] == "done" else 202)
+
+
+def _job_response(job):
+    return {
+        "job_id": job["id"],
+        "format": job["format"],
+        "status": job["status"],
+        "error": job.get("error"),
+        "created_at": job.get("created_at"),
+        "finished_at": job.get("finished_at"),
+        "download_url": f"/api/reports/jobs/{job['id']}" if job["status"] == "done" else None
+    }
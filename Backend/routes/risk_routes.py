@@ -1,9 +1,10 @@
 from flask import Blueprint, jsonify
 from models.user import User
-from models.progress import Progress
+from sqlalchemy import func
 
 risk_routes = Blueprint("risk_routes", __name__)
 from middleware.auth_middleware import token_required
+from utils.auth_guard import check_role
 
 @risk_routes.route("/risks", methods=["GET"])
 @token_required
@@ -14,136 +15,39 @@ def get_all_risks():
         from services.alert_service import AlertService
         user_risks_map = AlertService.get_user_risks()
         
-        users = User.query.filter(User.role.ilike("employee") | User.role.ilike("intern")).all()
-        results = []
+        from services.risk_overview import build_employee_risk_rows
+        users = User.query.filter(func.lower(User.role).in_(("employee", "intern"))).all()
+        results, ai_contexts = build_employee_risk_rows(users, user_risks_map)
 
-        for user in users:
-            try:
-                progress_list = Progress.query.filter_by(user_id=user.id).all()
-                
-                # Calculate aggregate metrics
-                total_completion = 0
-                total_delay = 0
-                tasks_completed = 0
-                missed_deadlines = 0
-                total_time_spent = 0
-
-                if progress_list:
-                    total_items = len(progress_list)
-                    # Handle potential division by zero if total_items is 0 (unlikely if valid list, but safe)
-                    if total_items > 0:
-                        total_completion = sum(p.completion or 0 for p in progress_list) / total_items
-                    else:
-                        total_completion = 0
-                        
-                    total_delay = sum(p.delay_days or 0 for p in progress_list)
-                    # Assuming completion 100 means task done
-                    tasks_completed = sum(1 for p in progress_list if (p.completion or 0) == 100) 
-                    total_time_spent = sum(p.time_spent or 0 for p in progress_list)
-                    
-                    # Calculate missed deadlines (both confirmed delays AND currently overdue pending tasks)
-                    missed_deadlines = 0
-                    from datetime import datetime
-                    now = datetime.now()
-                    
-                    # 1. Count already completed but delayed tasks
-                    missed_deadlines += sum(1 for p in progress_list if (p.delay_days or 0) > 0)
-                    
-                    # 2. Count pending tasks that are overdue
-                    # We need to look at the tasks associated with the user
-                    from models.task import Task
-                    pending_overdue = Task.query.filter(
-                        Task.assigned_to == user.id,
-                        Task.status != 'Completed',
-                        Task.due_date < now
-                    ).count()
-                    missed_deadlines += pending_overdue
-
-                # Prepare data for predictor
-                employee_data = {
-                    "completion": total_completion,
-                    "delay_days": total_delay,
-                    "tasks_completed": tasks_completed,
-                    "time_spent": total_time_spent,
-                    "missed_deadlines": missed_deadlines
-                }
+        # Insights are precomputed by the background worker; misses are
+        # queued for it and served the fallback in the meantime
+        from services.ai_service import get_cached_insight, _fallback_insight, reserve_insight_capacity
+        from services.insight_worker import enqueue_insight_refresh
 
-                # Get AI analysis
-                from services.predictor import analyze_employee_risk
-                analysis = analyze_employee_risk(employee_data)
-                
-                # OVERRIDE with AlertService logic
-                alert_data = user_risks_map.get(user.id)
-                final_risk_level = analysis["risk_level"]
-                final_risk_message = analysis["message"]
+        reserve_insight_capacity(len(users))
 
-                if alert_data:
-                    alert_status = alert_data['status']
-                    if alert_status == 'Delayed':
-                        final_risk_level = 'Critical'
-                        final_risk_message = alert_data['reasons'][0] if alert_data['reasons'] else "Critical Alerts Detected"
-                    elif alert_status == 'At Risk':
-                        final_risk_level = 'Warning'
-                        final_risk_message = alert_data['reasons'][0] if alert_data['reasons'] else "Warning Alerts Detected"
+        insights = {}
+        missing = []
+        for context in ai_contexts:
+            insight = get_cached_insight(context)
+            if insight is None:
+                insight = _fallback_insight(context, "Insight is being generated")
+                missing.append(context["user_id"])
+            insights[context["user_id"]] = insight
+        if missing:
+            enqueue_insight_refresh(missing, force=False)
 
-                result_item = {
-                    "user_id": user.id,
-                    "name": user.name,
-                    "role": user.role,
-                    "department": user.department,
-                    "risk": final_risk_level, 
-                    "risk_message": final_risk_message,
-                    "reasons": alert_data.get('reasons', []) if alert_data else [],
-                    "score": round(total_completion, 1),
-                    "prediction": analysis["prediction"],
-                    "recommended_actions": analysis["recommended_actions"]
+        for result_item in results:
+            insight = insights.get(result_item["user_id"])
+            if insight:
+                result_item["ai_insight"] = {
+                    "risk_insight": insight.get("risk_insight", ""),
+                    "detected_signals": insight.get("detected_signals", []),
+                    "ai_prediction": insight.get("ai_prediction", ""),
+                    "risk_explanation": insight.get("risk_explanation", ""),
+                    "recommended_actions": insight.get("recommended_actions", []),
+                    "engagement_score": insight.get("engagement_score", 0)
                 }
-                
-                # We need ai_insight for insights tab. 
-                # RULE: AI Insights should be generated ONLY for employees whose progress is less than 100%.
-                insight = None
-                if total_completion < 100:
-                    try:
-                        from services.ai_service import generate_employee_insight
-                        ai_context = {
-                            "user_id": user.id,
-                            "name": user.name,
-                            "department": user.department,
-                            "completion_percentage": round(total_completion, 1),
-                            "tasks_assigned": len(progress_list) if progress_list else 0,
-                            "alert_status": alert_data.get('status', 'Healthy') if alert_data else 'Healthy',
-                            "missed_deadlines": "Yes" if final_risk_level == 'Critical' else "No",
-                            "risk_reasons": alert_data.get('reasons', []) if alert_data else []
-                        }
-                        insight = generate_employee_insight(ai_context)
-                    except Exception as e:
-                        print(f"Error generating insight for {user.id}: {e}")
-                
-                if insight:
-                    result_item["ai_insight"] = {
-                        "risk_insight": insight.get("risk_insight", ""),
-                        "detected_signals": insight.get("detected_signals", []),
-                        "ai_prediction": insight.get("ai_prediction", ""),
-                        "risk_explanation": insight.get("risk_explanation", ""),
-                        "recommended_actions": insight.get("recommended_actions", []),
-                        "engagement_score": insight.get("engagement_score", 0)
-                    }
-                
-                results.append(result_item)
-            except Exception as e:
-                print(f"Error processing user {user.id}: {e}")
-                # Add a fallback/error entry so the loop continues
-                results.append({
-                    "user_id": user.id,
-                    "name": user.name,
-                    "role": user.role,
-                    "department": user.department,
-                    "risk": "Neutral",
-                    "risk_message": "Data unavailable",
-                    "score": 0,
-                    "prediction": "Unavailable",
-                    "recommended_actions": []
-                })
 
         return jsonify(results)
     except Exception as e:
@@ -191,12 +95,12 @@ def get_all_insights():
     try:
         from services.ai_service import get_insight_from_cache, _fallback_insight
         
-        users = User.query.filter(User.role.ilike("employee") | User.role.ilike("intern")).all()
+        users = User.query.filter(func.lower(User.role).in_(("employee", "intern"))).all()
         
         insights = []
         for user in users:
             # Fetch from cache only - no Gemini calls here
-            insight_data = get_insight_from_cache(user.id)
+            insight_data = get_insight_from_cache(user.id, user.name)
             
             if insight_data is None:
                 # No cached insight available, use fallback
@@ -232,7 +136,7 @@ def get_employee_insights(user_id):
             return jsonify({"error": "Employee not found"}), 404
         
         # Fetch from cache only - no Gemini calls here
-        insight_data = get_insight_from_cache(user_id)
+        insight_data = get_insight_from_cache(user_id, user.name)
         
         if insight_data is None:
             # No cached insight available, use fallback
@@ -248,4 +152,19 @@ def get_employee_insights(user_id):
         return jsonify(insight_data)
     except Exception as e:
         print(f"Error retrieving insight for user {user_id}: {e}")
-        return jsonify({"error": "Failed to retrieve insight"}), 500
\ No newline at end of file
+        return jsonify({"error": "Failed to retrieve insight"}), 500
+
+@risk_routes.route("/insights/worker-status", methods=["GET"])
+@check_role(["admin", "hr"])
+def get_insight_worker_status():
+    """
+    Queue depth and throughput of the background insight worker, cache
+    hit/miss counts, and Gemini rate limit tokens / circuit breaker state.
+    """
+    from services.insight_worker import insight_worker
+    from services.ai_service import get_insight_cache_stats, get_ai_rate_limit_status
+
+    status = insight_worker.status()
+    status["cache"] = get_insight_cache_stats()
+    status["rate_limit"] = get_ai_rate_limit_status()
+    return jsonify(status)
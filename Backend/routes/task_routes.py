@@ -3,6 +3,11 @@ from models.task import Task
 from models.progress import Progress
 from models.activity_log import ActivityLog
 from config.db import db
+from services.risk_state_service import RiskStateService
+from services.feature_store import FeatureStore
+from services.user_activity_service import UserActivityService
+from services.activity_log_writer import activity_log_writer
+from services.insight_worker import enqueue_insight_refresh
 from datetime import datetime
 import random
 
@@ -74,32 +79,32 @@ def complete_task(task_id):
     else:
         progress.delay_days = 0
 
-    # Log Activity
-    log = ActivityLog(
-        user_id=user_id,
-        action=f"Completed task: {task.title}",
-        timestamp=datetime.now(),
-        details=f"Time spent: {progress.time_spent} mins"
-    )
-    db.session.add(log)
+    completed_at = datetime.now()
+    UserActivityService.record_activity(user_id, completed_at)
     
     # Recalculate User Risk & Progress
-    progress_list = Progress.query.filter_by(user_id=user.id).all()
-    total_items = len(progress_list)
-    completion = sum(p.completion or 0 for p in progress_list) / total_items if total_items > 0 else 0
-    delay_days = sum(p.delay_days or 0 for p in progress_list)
-    missed = sum(1 for p in progress_list if (p.delay_days or 0) > 0)
-    
-    analysis = analyze_employee_risk({
-        "completion": completion,
-        "delay_days": delay_days,
-        "missed_deadlines": missed
-    })
+    features = FeatureStore.refresh([user_id]).get(user_id) or FeatureStore.empty_features(user_id)
+    completion = features["completion"]
+    
+    analysis = analyze_employee_risk(dict(
+        FeatureStore.model_input(features),
+        missed_deadlines=features["missed_deadlines"]
+    ))
     
     user.risk = analysis["risk_level"]
     user.risk_reason = analysis["message"]
+    RiskStateService.refresh([user_id])
     
     db.session.commit()
+    enqueue_insight_refresh([user_id])
+    
+    # Log Activity (batched by the writer)
+    activity_log_writer.log(
+        user_id,
+        f"Completed task: {task.title}",
+        timestamp=completed_at,
+        details=f"Time spent: {progress.time_spent} mins"
+    )
     
     return jsonify({
         "message": "Task completed",
@@ -202,8 +207,11 @@ def assign_task():
         details=f"Priority: {priority}"
     )
     db.session.add(log)
+    FeatureStore.refresh([target_user_id])
+    RiskStateService.refresh([target_user_id])
     
     db.session.commit()
+    enqueue_insight_refresh([target_user_id])
     
     return jsonify({
         "message": "Task assigned successfully", 
@@ -225,6 +233,7 @@ def update_task(task_id):
         return jsonify({"error": "Task not found"}), 404
     
     data = request.json
+    previous_assignee = task.assigned_to
     if "due_date" in data:
         try:
              if data["due_date"]:
@@ -239,6 +248,9 @@ def update_task(task_id):
         task.status = data["status"]
     if "title" in data:
         task.title = data["title"]
+
+    RiskStateService.refresh([previous_assignee, task.assigned_to])
         
     db.session.commit()
+    enqueue_insight_refresh([previous_assignee, task.assigned_to])
     return jsonify({"message": "Task updated", "task": task.to_dict()})
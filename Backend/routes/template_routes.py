@@ -4,6 +4,9 @@ from models.user import User
 from models.task import Task
 from models.progress import Progress
 from config.db import db
+from services.risk_state_service import RiskStateService
+from services.feature_store import FeatureStore
+from services.insight_worker import enqueue_insight_refresh
 from datetime import datetime, timedelta
 from utils.auth_guard import check_role
 
@@ -163,8 +166,11 @@ def assign_template(user_id, template_id):
         details=f"Generated {len(created_tasks)} tasks"
     )
     db.session.add(log)
+    FeatureStore.refresh([user.id])
+    RiskStateService.refresh([user.id])
 
     db.session.commit()
+    enqueue_insight_refresh([user.id])
     
     return jsonify({
         "message": f"Assigned template '{template.name}' to {user.name}",
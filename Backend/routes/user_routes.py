@@ -33,19 +33,15 @@ def create_user():
     }), 201
 
 
-from models.progress import Progress
+from services.feature_store import FeatureStore
 
 @user_routes.route("/users", methods=["GET"])
 def get_users():
-    users = User.query.all()
     results = []
 
-    for u in users:
-        # Calculate progress
-        user_progress = Progress.query.filter_by(user_id=u.id).all()
-        avg_completion = 0
-        if user_progress:
-             avg_completion = int(sum(p.completion for p in user_progress) / len(user_progress))
+    for u, features in FeatureStore.users_with_features():
+        # Average completion from the precomputed feature row
+        avg_completion = int(features["completion"])
         
         results.append({
             "id": u.id,
@@ -0,0 +1,144 @@
+from models.activity_log import ActivityLog
+from models.user import User
+from config.db import db
+from sqlalchemy import func, tuple_
+from datetime import datetime, timedelta
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class ActivityLogService:
+    """
+    Shared read path for the admin activity/audit/log endpoints: one query
+    joining the author once, newest first, paginated by the keyset
+    (timestamp, id) so every page costs the same however large the table is.
+    """
+
+    @staticmethod
+    def page(user_id=None, action=None, since=None, until=None, cursor=None, limit=DEFAULT_PAGE_SIZE):
+        """
+        Returns (rows, next_cursor). Each row has id, user_id, action,
+        timestamp, details, user_name and user_email. next_cursor is None on
+        the last page.
+          user_id      - only this user's entries
+          action       - case-insensitive exact action, e.g. "logged in"
+          since/until  - datetime bounds, since inclusive, until exclusive
+          cursor       - next_cursor of the previous page
+        Raises ValueError for a malformed cursor.
+        """
+        limit = min(max(int(limit), 1), MAX_PAGE_SIZE)
+
+        query = db.session.query(
+            ActivityLog.id,
+            ActivityLog.user_id,
+            ActivityLog.action,
+            ActivityLog.timestamp,
+            ActivityLog.details,
+            User.name.label("user_name"),
+            User.email.label("user_email")
+        ).outerjoin(User, User.id == ActivityLog.user_id)
+        query = ActivityLogService._filter(query, user_id, action, since, until)
+
+        cursor_ts, cursor_id = ActivityLogService.decode_cursor(cursor) if cursor else (None, None)
+
+        # Dated entries first, then undated legacy ones; each phase is a
+        # plain index range scan (see migrations/001_hot_query_indexes.sql)
+        rows = []
+        if cursor_id is None or cursor_ts is not None:
+            dated = query.filter(ActivityLog.timestamp.isnot(None))
+            if cursor_ts is not None:
+                dated = dated.filter(
+                    tuple_(ActivityLog.timestamp, ActivityLog.id) < tuple_(cursor_ts, cursor_id)
+                )
+            rows = dated.order_by(ActivityLog.timestamp.desc(), ActivityLog.id.desc())\
+                .limit(limit + 1).all()
+
+        # Undated entries can never match a date range
+        if len(rows) <= limit and since is None and until is None:
+            undated = query.filter(ActivityLog.timestamp.is_(None))
+            if cursor_ts is None and cursor_id is not None:
+                undated = undated.filter(ActivityLog.id < cursor_id)
+            rows += undated.order_by(ActivityLog.id.desc()).limit(limit + 1 - len(rows)).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = ActivityLogService.encode_cursor(rows[-1].timestamp, rows[-1].id)
+        return rows, next_cursor
+
+    @staticmethod
+    def count(user_id=None, action=None, since=None, until=None):
+        """Number of entries matching the filters, across all pages."""
+        query = db.session.query(func.count(ActivityLog.id))
+        return ActivityLogService._filter(query, user_id, action, since, until).scalar() or 0
+
+    @staticmethod
+    def _filter(query, user_id, action, since, until):
+        if user_id is not None:
+            query = query.filter(ActivityLog.user_id == user_id)
+        if action:
+            query = query.filter(func.lower(ActivityLog.action) == action.lower())
+        if since is not None:
+            query = query.filter(ActivityLog.timestamp >= since)
+        if until is not None:
+            query = query.filter(ActivityLog.timestamp < until)
+        return query
+
+    @staticmethod
+    def encode_cursor(timestamp, log_id):
+        raw = json.dumps([timestamp.isoformat() if timestamp else None, log_id])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            timestamp, log_id = json.loads(raw)
+            return (datetime.fromisoformat(timestamp) if timestamp else None), int(log_id)
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor")
+
+    @staticmethod
+    def page_from_args(args, user_id=None):
+        """
+        Reads the shared query-string parameters: cursor, limit, user_id,
+        action, from and to (ISO dates or datetimes; a bare "to" date
+        includes that whole day). Raises ValueError for bad values.
+        Returns (rows, next_cursor, total). total counts every page, but
+        only on the first page (no cursor) or with with_total=1; later
+        pages return None so paging does not re-run the COUNT each time.
+        """
+        filters = ActivityLogService._filters_from_args(args, user_id)
+        rows, next_cursor = ActivityLogService.page(
+            cursor=args.get("cursor"),
+            limit=args.get("limit", DEFAULT_PAGE_SIZE, type=int),
+            **filters
+        )
+        total = None
+        if not args.get("cursor") or args.get("with_total") == "1":
+            total = ActivityLogService.count(**filters)
+        return rows, next_cursor, total
+
+    @staticmethod
+    def _filters_from_args(args, user_id=None):
+        if user_id is None and args.get("user_id"):
+            user_id = int(args.get("user_id"))
+
+        since = ActivityLogService._parse_date(args.get("from"))
+        until = ActivityLogService._parse_date(args.get("to"))
+        if until is not None and len(args.get("to")) == 10:
+            until += timedelta(days=1)
+
+        return {"user_id": user_id, "action": args.get("action"), "since": since, "until": until}
+
+    @staticmethod
+    def _parse_date(value):
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"Invalid date: {value}")
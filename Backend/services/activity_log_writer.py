@@ -0,0 +1,219 @@
+import os
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime
+
+# A batch is written this long after its first entry was queued...
+ACTIVITY_LOG_FLUSH_MS = int(os.environ.get("ACTIVITY_LOG_FLUSH_MS", "250"))
+# ...or as soon as this many entries are waiting
+ACTIVITY_LOG_BATCH_SIZE = int(os.environ.get("ACTIVITY_LOG_BATCH_SIZE", "500"))
+# 0 writes every entry synchronously, in its own transaction
+ACTIVITY_LOG_BUFFERED = os.environ.get("ACTIVITY_LOG_BUFFERED", "1") == "1"
+# A batch that fails is retried this many times before it is dropped
+ACTIVITY_LOG_MAX_ATTEMPTS = 3
+# flush() waits at most this long for a batch the worker is writing
+FLUSH_TIMEOUT_SECONDS = 10
+# How often a collecting worker checks for a flush() request
+FLUSH_POLL_SECONDS = 0.05
+
+
+class ActivityLogWriter:
+    """
+    Takes ActivityLog writes off the request path. Entries are queued in
+    process and a background thread inserts them as one multi-row INSERT
+    per batch. Login entries also stamp the users' last_login_at /
+    last_activity_at and refresh their risk state in the same transaction,
+    so login itself commits nothing. Whatever is still queued when the
+    process exits is flushed by an atexit hook.
+    """
+
+    def __init__(self, flush_ms=ACTIVITY_LOG_FLUSH_MS, batch_size=ACTIVITY_LOG_BATCH_SIZE,
+                 buffered=ACTIVITY_LOG_BUFFERED):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition()
+        self._flush_requested = threading.Event()
+        self._unwritten = 0  # queued or being written
+        self._thread = None
+        self._app = None
+        self._flush_interval = flush_ms / 1000.0
+        self._batch_size = max(batch_size, 1)
+        self._buffered = buffered
+        self._stats = {
+            "written": 0,
+            "batches": 0,
+            "dropped": 0,
+            "last_flush_at": None
+        }
+
+    def init_app(self, app):
+        # The thread starts on the first log() call in this process
+        self._app = app
+        atexit.register(self.flush)
+
+    def start(self):
+        with self._lock:
+            if not self._buffered or self._app is None or (self._thread and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(target=self._run, name="activity-log-writer", daemon=True)
+            self._thread.start()
+
+    def log(self, user_id, action, timestamp=None, details=None, login=False):
+        """
+        Queues one ActivityLog entry. login=True also stamps the user's
+        last_login_at / last_activity_at and refreshes their risk state
+        when the batch is written.
+        """
+        entry = {
+            "user_id": user_id,
+            "action": action,
+            "timestamp": timestamp or datetime.utcnow(),
+            "details": details,
+            "login": login,
+            "attempts": 0
+        }
+        with self._idle:
+            self._unwritten += 1
+
+        if not self._buffered or self._app is None:
+            self._write_and_release([entry])
+            return
+
+        self._queue.put(entry)
+        self.start()
+
+    def flush(self, timeout=FLUSH_TIMEOUT_SECONDS):
+        """
+        Writes everything still queued from the calling thread, then waits
+        for a batch the worker is in the middle of. Returns True if nothing
+        is left unwritten.
+        """
+        # Makes a worker that is still collecting write what it holds now
+        self._flush_requested.set()
+        try:
+            batch = []
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            for start in range(0, len(batch), self._batch_size):
+                self._write_and_release(batch[start:start + self._batch_size])
+
+            deadline = time.monotonic() + timeout
+            with self._idle:
+                while self._unwritten > 0:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._idle.wait(remaining)
+            return True
+        finally:
+            self._flush_requested.clear()
+
+    def status(self):
+        with self._idle:
+            return dict(self._stats, unwritten=self._unwritten, buffered=self._buffered)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self._flush_interval
+            while len(batch) < self._batch_size and not self._flush_requested.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=min(remaining, FLUSH_POLL_SECONDS)))
+                except queue.Empty:
+                    continue
+
+            if self._write(batch):
+                self._release(batch)
+                continue
+
+            # Put the batch back for another try; give up on entries that
+            # keep failing so one bad row cannot block the queue
+            dropped = []
+            for entry in batch:
+                entry["attempts"] += 1
+                if entry["attempts"] < ACTIVITY_LOG_MAX_ATTEMPTS:
+                    self._queue.put(entry)
+                else:
+                    dropped.append(entry)
+            self._release(dropped, dropped=True)
+            time.sleep(self._flush_interval)
+
+    def _write_and_release(self, batch):
+        ok = self._write(batch)
+        self._release(batch, dropped=not ok)
+
+    def _release(self, batch, dropped=False):
+        if not batch:
+            return
+        if dropped:
+            self._log_error(
+                f"[ActivityLogWriter] Dropped {len(batch)} activity log entries after failed writes: "
+                + ", ".join(f"user {e['user_id']} {e['action']!r} at {e['timestamp']}" for e in batch[:10])
+                + (" ..." if len(batch) > 10 else "")
+            )
+        with self._idle:
+            self._unwritten -= len(batch)
+            if dropped:
+                self._stats["dropped"] += len(batch)
+            self._idle.notify_all()
+
+    def _log_error(self, message):
+        from flask import current_app
+
+        app = self._app or current_app._get_current_object()
+        app.logger.error(message)
+
+    def _write(self, batch):
+        from flask import current_app
+        from sqlalchemy import insert
+        from config.db import db
+        from models.activity_log import ActivityLog
+        from services.risk_state_service import RiskStateService
+        from services.user_activity_service import UserActivityService
+
+        # Latest login per user in this batch
+        last_logins = {}
+        for entry in batch:
+            user_id, at = entry["user_id"], entry["timestamp"]
+            if entry["login"] and at > last_logins.get(user_id, datetime.min):
+                last_logins[user_id] = at
+
+        app = self._app or current_app._get_current_object()
+        # A fresh app context has its own session, so a synchronous write
+        # never commits the caller's pending changes
+        with app.app_context():
+            try:
+                db.session.execute(insert(ActivityLog), [
+                    {
+                        "user_id": e["user_id"],
+                        "action": e["action"],
+                        "timestamp": e["timestamp"],
+                        "details": e["details"]
+                    }
+                    for e in batch
+                ])
+                if last_logins:
+                    UserActivityService.stamp(last_logins, last_logins)
+                    RiskStateService.refresh(list(last_logins))
+                db.session.commit()
+            except Exception as e:
+                app.logger.error(f"[ActivityLogWriter] Writing {len(batch)} entries failed: {e}")
+                db.session.rollback()
+                return False
+
+        with self._idle:
+            self._stats["written"] += len(batch)
+            self._stats["batches"] += 1
+            self._stats["last_flush_at"] = datetime.now()
+        return True
+
+
+activity_log_writer = ActivityLogWriter()
@@ -1,62 +1,33 @@
-def explain_risk(data):
-    reasons = []
-    risk_score = 0  # Higher = worse risk
-
-    # Safe reads with defaults
-    completion = data.get("completion", 100)
-    delay_days = data.get("delay_days", 0)
-    tasks_completed = data.get("tasks_completed", 0)
-    time_spent = data.get("time_spent", 0)
-
-    # Rule 1 — Task completion
-    if completion < 40:
-        reasons.append("Very low task completion")
-        risk_score += 3
-    elif completion < 60:
-        reasons.append("Low task completion")
-        risk_score += 2
-    elif completion < 80:
-        reasons.append("Moderate task completion")
-        risk_score += 1
-
-    # Rule 2 — Delay history
-    if delay_days > 10:
-        reasons.append("Severe task delays")
-        risk_score += 3
-    elif delay_days > 5:
-        reasons.append("High delay history")
-        risk_score += 2
-    elif delay_days > 2:
-        reasons.append("Minor delays")
-        risk_score += 1
+from services.rule_engine import explain_columns, get_rules
 
-    # Rule 3 — Tasks completed
-    if tasks_completed < 2:
-        reasons.append("Very few tasks completed")
-        risk_score += 3
-    elif tasks_completed < 4:
-        reasons.append("Few tasks completed")
-        risk_score += 2
 
-    # Rule 4 — Time spent (optional signal)
-    if time_spent < 2:
-        reasons.append("Low engagement time")
-        risk_score += 1
-
-    # Risk Level Classification
-    if risk_score >= 6:
-        risk_level = "High Risk"
-    elif risk_score >= 3:
-        risk_level = "Medium Risk"
-    else:
-        risk_level = "Low Risk"
-
-    # Healthy case
-    if not reasons:
-        reasons.append("Performance is healthy")
-
-    return {
-        "risk_level": risk_level,
-        "risk_score": risk_score,
-        "reasons": reasons
-    }
+def explain_risk(data):
+    return explain_risk_batch([data])[0]
+
+
+def explain_risk_batch(data_list):
+    """
+    Explains the risk of many employees in one vectorized pass.
+    Thresholds, scores and reasons come from the "explain_risk" table in
+    risk_rules.json; missing values fall back to its defaults.
+    Returns: list of { risk_level, risk_score, reasons } in input order
+    """
+    rules = get_rules()
+    defaults = rules["explain_risk"]["defaults"]
+
+    columns = {}
+    for feature, default in defaults.items():
+        values = [data.get(feature, default) for data in data_list]
+        columns[feature] = [default if value is None else value for value in values]
+
+    explained = explain_columns(columns, rules)
+    return [
+        {
+            "risk_level": level,
+            "risk_score": score,
+            "reasons": reasons
+        }
+        for level, score, reasons in zip(
+            explained["risk_level"].tolist(), explained["risk_score"].tolist(), explained["reasons"]
+        )
+    ]
@@ -1,30 +1,16 @@
-from models.user import User
-from models.progress import Progress
-from services.predictor import predict_risk
+from services.predictor import predict_risk_batch
+from services.feature_store import FeatureStore
 
 
 def generate_ai_nudges():
-    users = User.query.all()
     alerts = []
 
-    for user in users:
-        progress_list = Progress.query.filter_by(user_id=user.id).all()
-
-        if not progress_list:
-            continue
-
-        avg_completion = sum(p.completion for p in progress_list) / len(progress_list)
-        avg_delay = sum(p.delay_days for p in progress_list) / len(progress_list)
-        tasks_completed = len(progress_list)
-        time_spent = 20  # mock value
-
-        risk = predict_risk({
-            "completion": avg_completion,
-            "delay_days": avg_delay,
-            "tasks_completed": tasks_completed,
-            "time_spent": time_spent
-        })
+    rows = [(user, user_features) for user, user_features in FeatureStore.users_with_features() if user_features["progress_count"]]
+    candidates = [user for user, _ in rows]
+    model_inputs = [FeatureStore.model_input(user_features) for _, user_features in rows]
 
+    # One model call for every employee
+    for user, risk in zip(candidates, predict_risk_batch(model_inputs)):
         if risk in ["At Risk", "Delayed"]:
             alerts.append({
                 "user_id": user.id,
@@ -0,0 +1,303 @@
+import os
+import time
+import sqlite3
+import tempfile
+import threading
+
+
+class MemoryTokenBucket:
+    """
+    Process-local token bucket: holds up to capacity tokens and refills
+    continuously at capacity / period tokens per second.
+    """
+
+    backend = "memory"
+
+    def __init__(self, name, capacity, period):
+        self.name = name
+        self.capacity = capacity
+        self.period = period
+        self._lock = threading.Lock()
+        self._tokens = float(capacity)
+        self._updated_at = time.time()
+
+    def _refill(self, tokens, updated_at, now):
+        elapsed = max(0, now - updated_at)
+        return min(self.capacity, tokens + elapsed * self.capacity / self.period)
+
+    def try_acquire(self):
+        with self._lock:
+            now = time.time()
+            self._tokens = self._refill(self._tokens, self._updated_at, now)
+            self._updated_at = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def refund(self):
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+    def available(self):
+        with self._lock:
+            return self._refill(self._tokens, self._updated_at, time.time())
+
+    def stats(self):
+        return {
+            "backend": self.backend,
+            "capacity": self.capacity,
+            "period_seconds": self.period,
+            "tokens": round(self.available(), 2)
+        }
+
+
+class SQLiteTokenBucket(MemoryTokenBucket):
+    """
+    Token bucket stored in a shared SQLite file, so every gunicorn worker
+    on the host draws from the same budget. Each acquire is one
+    BEGIN IMMEDIATE transaction, which serializes concurrent writers.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, name, capacity, period, path):
+        self.name = name
+        self.capacity = capacity
+        self.period = period
+        self.path = path
+        self._local = threading.local()
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS ai_rate_limit ("
+            " name TEXT PRIMARY KEY,"
+            " tokens REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "INSERT OR IGNORE INTO ai_rate_limit (name, tokens, updated_at) VALUES (?, ?, ?)",
+            (name, float(capacity), time.time())
+        )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; transactions are opened explicitly below
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _update(self, delta):
+        """Refills, applies delta if the result stays >= 0, returns success."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = conn.execute(
+                "SELECT tokens, updated_at FROM ai_rate_limit WHERE name = ?", (self.name,)
+            ).fetchone()
+            tokens = self._refill(row[0], row[1], now) if row else float(self.capacity)
+            ok = tokens + delta >= 0
+            if ok:
+                tokens = min(self.capacity, tokens + delta)
+            conn.execute(
+                "INSERT OR REPLACE INTO ai_rate_limit (name, tokens, updated_at) VALUES (?, ?, ?)",
+                (self.name, tokens, now)
+            )
+            conn.execute("COMMIT")
+            return ok
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def try_acquire(self):
+        return self._update(-1)
+
+    def refund(self):
+        self._update(1)
+
+    def available(self):
+        row = self._connection().execute(
+            "SELECT tokens, updated_at FROM ai_rate_limit WHERE name = ?", (self.name,)
+        ).fetchone()
+        if not row:
+            return float(self.capacity)
+        return self._refill(row[0], row[1], time.time())
+
+    def stats(self):
+        stats = super().stats()
+        stats["path"] = self.path
+        return stats
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures and rejects calls
+    for cooldown seconds. After the cooldown one trial call is let through
+    (half-open): success closes the breaker, failure opens it again.
+    State is per process.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, cooldown=60):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+    def allow_request(self):
+        with self._lock:
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.cooldown:
+                    return False
+                self._state = self.HALF_OPEN
+            if self._state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def cancel_probe(self):
+        """Gives back a half-open trial slot that was never used."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    print(f"[AI] Circuit breaker opened after {self._failures} consecutive failure(s)")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            state = self._state
+            retry_in = None
+            if state == self.OPEN:
+                retry_in = max(0, round(self.cooldown - (time.monotonic() - self._opened_at), 1))
+                if retry_in == 0:
+                    state = self.HALF_OPEN
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "cooldown_seconds": self.cooldown,
+                "retry_in_seconds": retry_in
+            }
+
+
+class AIRateLimiter:
+    """
+    Gate in front of every Gemini call: the circuit breaker first, then a
+    requests-per-minute bucket and a daily quota bucket.
+
+    Both buckets refill continuously, so the daily quota is a rolling limit
+    (capacity / 86400 tokens per second, at most capacity in any 24h window)
+    rather than a counter that resets at midnight.
+    """
+
+    def __init__(self, per_minute, daily, breaker):
+        self.per_minute = per_minute
+        self.daily = daily
+        self.breaker = breaker
+        self._lock = threading.Lock()
+        self._rejected = {"circuit_open": 0, "rate_limited": 0, "daily_quota": 0}
+
+    def acquire(self):
+        """
+        Takes one token from both buckets.
+        Returns (True, None) or (False, reason) with reason one of
+        "circuit_open", "rate_limited", "daily_quota".
+        """
+        with self._lock:
+            reason = None
+            if not self.breaker.allow_request():
+                reason = "circuit_open"
+            else:
+                try:
+                    if not self.per_minute.try_acquire():
+                        reason = "rate_limited"
+                    elif not self.daily.try_acquire():
+                        self.per_minute.refund()
+                        reason = "daily_quota"
+                except Exception:
+                    # Don't leave a half-open trial slot taken forever
+                    self.breaker.cancel_probe()
+                    raise
+
+            if reason is None:
+                return True, None
+            if reason != "circuit_open":
+                self.breaker.cancel_probe()
+            self._rejected[reason] += 1
+            return False, reason
+
+    def record_success(self):
+        self.breaker.record_success()
+
+    def record_failure(self):
+        self.breaker.record_failure()
+
+    def status(self):
+        with self._lock:
+            rejected = dict(self._rejected)
+        return {
+            "per_minute": self.per_minute.stats(),
+            "daily": self.daily.stats(),
+            "circuit_breaker": self.breaker.stats(),
+            "rejected": rejected
+        }
+
+
+def create_ai_rate_limiter():
+    """
+    Builds the Gemini rate limiter from the environment:
+    AI_RATE_LIMIT_PER_MINUTE, AI_DAILY_QUOTA, AI_BREAKER_FAILURE_THRESHOLD,
+    AI_BREAKER_COOLDOWN_SECONDS, AI_RATE_LIMIT_BACKEND (sqlite | memory)
+    and AI_RATE_LIMIT_PATH.
+    """
+    per_minute = int(os.environ.get("AI_RATE_LIMIT_PER_MINUTE", "15"))
+    daily = int(os.environ.get("AI_DAILY_QUOTA", "1500"))
+    breaker = CircuitBreaker(
+        failure_threshold=int(os.environ.get("AI_BREAKER_FAILURE_THRESHOLD", "5")),
+        cooldown=int(os.environ.get("AI_BREAKER_COOLDOWN_SECONDS", "60"))
+    )
+
+    backend = os.environ.get("AI_RATE_LIMIT_BACKEND", "sqlite").lower()
+    if backend == "sqlite":
+        path = os.environ.get(
+            "AI_RATE_LIMIT_PATH",
+            os.path.join(tempfile.gettempdir(), "onboardai_rate_limit.sqlite3")
+        )
+        try:
+            return AIRateLimiter(
+                SQLiteTokenBucket("per_minute", per_minute, 60, path),
+                SQLiteTokenBucket("daily", daily, 86400, path),
+                breaker
+            )
+        except Exception as e:
+            print(f"[AI] SQLite rate limiter unavailable ({e}), using in-memory buckets")
+
+    return AIRateLimiter(
+        MemoryTokenBucket("per_minute", per_minute, 60),
+        MemoryTokenBucket("daily", daily, 86400),
+        breaker
+    )
@@ -1,20 +1,58 @@
 import os
+import re
 import json
-import time
+import hashlib
 import traceback
+from concurrent.futures import ThreadPoolExecutor, wait
 import google.genai as genai
-from cachetools import TTLCache
-
-# Cache insights for 15 minutes
-insight_cache = TTLCache(maxsize=500, ttl=900)
-
-# Track Gemini usage
-MAX_AI_REQUESTS = 6
+from services.insight_cache import create_insight_cache
+from services.ai_rate_limiter import create_ai_rate_limiter
+
+# Insights are cached by a hash of the employee context (shared SQLite file
+# by default, see insight_cache.py) with a user_id -> latest hash index
+insight_cache = create_insight_cache()
+
+# Left out of the cache key, so employees with identical profiles share one
+# insight. The name is still sent to Gemini: cached text stores it as
+# NAME_PLACEHOLDER and every lookup puts the requesting employee's name back.
+IDENTITY_FIELDS = ("user_id", "name")
+NAME_PLACEHOLDER = "{employee_name}"
+
+# Gemini usage is gated by a circuit breaker plus per-minute and daily
+# token buckets shared by all workers on the host (see ai_rate_limiter.py)
+ai_limiter = create_ai_rate_limiter()
 _state = {
-    "api_calls": 0,
     "gemini_initialized": False
 }
 
+# Fallback reasons for each limiter rejection
+LIMIT_REASONS = {
+    "circuit_open": "AI temporarily unavailable",
+    "rate_limited": "AI rate limit reached",
+    "daily_quota": "AI daily quota exhausted"
+}
+
+# Required keys of every insight returned by Gemini
+REQUIRED_FIELDS = [
+    "risk_insight",
+    "detected_signals",
+    "ai_prediction",
+    "risk_explanation",
+    "engagement_score",
+    "recommended_actions"
+]
+
+# Employees packed into one Gemini prompt (1 disables batching)
+INSIGHT_BATCH_SIZE = int(os.environ.get("AI_INSIGHT_BATCH_SIZE", "10"))
+
+# Bounded fan-out for generate_employee_insights()
+INSIGHT_MAX_WORKERS = int(os.environ.get("AI_INSIGHT_MAX_WORKERS", "4"))
+INSIGHT_DEADLINE_SECONDS = float(os.environ.get("AI_INSIGHT_DEADLINE_SECONDS", "10"))
+_insight_executor = ThreadPoolExecutor(
+    max_workers=INSIGHT_MAX_WORKERS,
+    thread_name_prefix="ai-insight"
+)
+
 # Initialize Gemini client
 api_key = os.environ.get("GEMINI_API_KEY")
 
@@ -31,10 +69,143 @@ else:
     print("[AI] GEMINI_API_KEY not found")
 
 
-def get_insight_from_cache(user_id):
-    if user_id and user_id in insight_cache:
-        return insight_cache[user_id]
-    return None
+def _insight_profile(employee_context):
+    return {k: v for k, v in employee_context.items() if k not in IDENTITY_FIELDS}
+
+
+def _prompt_profile(employee_context):
+    return {k: v for k, v in employee_context.items() if k != "user_id"}
+
+
+def _replace_text(value, pattern, replacement):
+    if isinstance(value, str):
+        return pattern.sub(replacement, value)
+    if isinstance(value, list):
+        return [_replace_text(v, pattern, replacement) for v in value]
+    if isinstance(value, dict):
+        return {k: _replace_text(v, pattern, replacement) for k, v in value.items()}
+    return value
+
+
+def _word_pattern(words):
+    """
+    Matches any of words as a whole word, case-sensitively, so a short name
+    like "Al" or "Ann" never matches inside "All" or "Annual". Lookarounds
+    instead of \\b so names starting or ending in punctuation still match.
+    """
+    return re.compile(r"(?<!\w)(?:" + "|".join(re.escape(w) for w in words) + r")(?!\w)")
+
+
+def _depersonalize(insight, name):
+    """Replaces the employee's full and first name with NAME_PLACEHOLDER."""
+    name = (name or "").strip()
+    if not name:
+        return insight
+    names = [name] + ([name.split()[0]] if len(name.split()) > 1 else [])
+    return _replace_text(insight, _word_pattern(names), lambda _: NAME_PLACEHOLDER)
+
+
+def _personalize(insight, name):
+    """Puts the employee's name back into a cached insight."""
+    if insight is None:
+        return None
+    return _replace_text(insight, _word_pattern([NAME_PLACEHOLDER]), lambda _: name or "The employee")
+
+
+def _share(insight, source_context, context):
+    """An insight generated for source_context, addressed to context's employee."""
+    if context is source_context:
+        return insight
+    return _personalize(_depersonalize(insight, source_context.get("name")), context.get("name"))
+
+
+def context_hash(employee_context):
+    """Stable hash of the normalized (identity-free) employee context."""
+    payload = json.dumps(
+        _insight_profile(employee_context),
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cache_get(key):
+    try:
+        return insight_cache.get(key)
+    except Exception as e:
+        print(f"[AI] Insight cache read failed for {key}: {e}")
+        return None
+
+
+def _cache_set(key, value):
+    try:
+        insight_cache.set(key, value)
+    except Exception as e:
+        print(f"[AI] Insight cache write failed for {key}: {e}")
+
+
+def get_insight_from_cache(user_id, name=None):
+    """Latest insight generated for the user, via the user -> context hash index."""
+    if not user_id:
+        return None
+    digest = _cache_get(f"user:{user_id}")
+    if not digest:
+        return None
+    return _personalize(_cache_get(f"insight:{digest}"), name)
+
+
+def get_cached_insight(employee_context):
+    """Insight for exactly this context, or None if it has changed or expired."""
+    digest = context_hash(employee_context)
+    insight = _cache_get(f"insight:{digest}")
+    user_id = employee_context.get("user_id")
+    if insight is not None and user_id and _cache_get(f"user:{user_id}") != digest:
+        _cache_set(f"user:{user_id}", digest)
+    return _personalize(insight, employee_context.get("name"))
+
+
+def _cache_insight(employee_context, insight):
+    digest = context_hash(employee_context)
+    _cache_set(f"insight:{digest}", _depersonalize(insight, employee_context.get("name")))
+    user_id = employee_context.get("user_id")
+    if user_id:
+        _cache_set(f"user:{user_id}", digest)
+
+
+def get_insight_cache_stats():
+    return insight_cache.stats()
+
+
+def reserve_insight_capacity(employee_count):
+    """
+    Grows the insight cache to hold every employee: a content entry and a
+    user index each, plus headroom for contexts that just changed.
+    Otherwise past maxsize / 2 employees the LRU evicts on every write.
+    """
+    try:
+        insight_cache.ensure_capacity(int(employee_count * 2.5))
+    except Exception as e:
+        print(f"[AI] Insight cache resize failed: {e}")
+
+
+def _acquire_api_call():
+    """Returns None when a Gemini call may be made, else the fallback reason."""
+    try:
+        allowed, reason = ai_limiter.acquire()
+    except Exception as e:
+        # A broken limiter store must not let calls through unmetered
+        print(f"[AI] Rate limiter failed, treating as limit reached: {e}")
+        return LIMIT_REASONS["rate_limited"]
+    if allowed:
+        return None
+    print(f"[AI] Gemini call rejected: {reason}")
+    return LIMIT_REASONS[reason]
+
+
+def get_ai_rate_limit_status():
+    """Current bucket tokens and circuit breaker state, for ops endpoints."""
+    return ai_limiter.status()
 
 
 def generate_employee_insight(employee_context):
@@ -43,51 +214,43 @@ def generate_employee_insight(employee_context):
     print(f"[AI] generate_employee_insight called for user {user_id}")
     print(f"[AI DEBUG] Employee context keys: {list(employee_context.keys())}")
 
-    # 1️⃣ Cache check
-    if user_id and user_id in insight_cache:
+    # 1️⃣ Cache check - identical contexts never trigger a new Gemini call.
+    # Fallbacks are not cached, so a changed budget or context retries.
+    cached = get_cached_insight(employee_context)
+    if cached is not None:
         print(f"[AI] Using cached insight for user {user_id}")
-        return insight_cache[user_id]
+        return cached
 
-    # 2️⃣ Hard request limit
-    if _state["api_calls"] >= MAX_AI_REQUESTS:
-        print(f"[AI] Request limit reached ({MAX_AI_REQUESTS})")
-        fallback = _fallback_insight(employee_context, "AI request limit reached")
-        if user_id:
-            insight_cache[user_id] = fallback
-        return fallback
-
-    # 3️⃣ Gemini initialized check
+    # 2️⃣ Gemini initialized check
     if not _state["gemini_initialized"]:
         print(f"[AI] Gemini not initialized - client is {client}")
-        fallback = _fallback_insight(employee_context, "Gemini not initialized")
-        if user_id:
-            insight_cache[user_id] = fallback
-        return fallback
+        return _fallback_insight(employee_context, "Gemini not initialized")
+
+    # 3️⃣ Circuit breaker and rate limits
+    limit_reason = _acquire_api_call()
+    if limit_reason:
+        return _fallback_insight(employee_context, limit_reason)
 
     # 4️⃣ Skip AI for healthy employees - TEMPORARILY DISABLED FOR DEBUGGING
     # Uncomment below to re-enable this logic
     # if employee_context.get("alert_status") == "Healthy":
     #     print(f"[AI] Skipping Gemini for healthy user {user_id}")
-    #     fallback = _fallback_insight(employee_context, "AI skipped for healthy employee")
-    #     if user_id:
-    #         insight_cache[user_id] = fallback
-    #     return fallback
+    #     return _fallback_insight(employee_context, "AI skipped for healthy employee")
 
+    response = None
     try:
         print(f"[AI DEBUG] About to call Gemini API for user {user_id}")
         print(f"[AI DEBUG] Client object: {client}")
         print(f"[AI DEBUG] Full employee context:")
         print(json.dumps(employee_context, indent=2, default=str))
 
-        time.sleep(0.3)
-
         prompt = f"""
 You are an AI HR assistant analyzing employee onboarding performance.
 
 Analyze the employee data below and return ONLY JSON with all required fields.
 
 Employee Data:
-{json.dumps(employee_context, indent=2)}
+{json.dumps(_prompt_profile(employee_context), indent=2)}
 
 Return ONLY this JSON structure (no markdown, no explanation):
 {{
@@ -105,32 +268,23 @@ Return ONLY this JSON structure (no markdown, no explanation):
             model="gemini-2.0-flash",
             contents=prompt
         )
+        ai_limiter.record_success()
         
         print(f"[AI DEBUG] Gemini API responded successfully")
         print(f"[AI DEBUG] Raw Gemini response type: {type(response)}")
         print(f"[AI DEBUG] Raw Gemini response text (first 200 chars): {response.text[:200] if response.text else 'EMPTY'}")
 
-        _state["api_calls"] += 1
-        print(f"[AI] Generating insight for user {user_id} (call {_state['api_calls']}/{MAX_AI_REQUESTS})")
+        print(f"[AI] Generating insight for user {user_id}")
 
         result_text = response.text
         print(f"[AI DEBUG] Attempting to parse JSON from response")
         insight_data = json.loads(result_text)
         print(f"[AI DEBUG] Successfully parsed JSON. Keys: {list(insight_data.keys())}")
 
-        required_fields = [
-            "risk_insight",
-            "detected_signals",
-            "ai_prediction",
-            "risk_explanation",
-            "engagement_score",
-            "recommended_actions"
-        ]
-
         fallback = _fallback_insight(employee_context, "Missing fields")
         missing_fields = []
 
-        for field in required_fields:
+        for field in REQUIRED_FIELDS:
             if field not in insight_data:
                 print(f"[AI] Missing field '{field}' for user {user_id}, using fallback")
                 insight_data[field] = fallback.get(field)
@@ -139,9 +293,8 @@ Return ONLY this JSON structure (no markdown, no explanation):
         if missing_fields:
             print(f"[AI] Filled {len(missing_fields)} missing fields from fallback: {missing_fields}")
 
-        if user_id:
-            insight_cache[user_id] = insight_data
-            print(f"[AI] Cached insight for user {user_id}")
+        _cache_insight(employee_context, insight_data)
+        print(f"[AI] Cached insight for user {user_id}")
 
         print(f"[AI] Successfully generated insight for user {user_id}")
         return insight_data
@@ -153,22 +306,205 @@ Return ONLY this JSON structure (no markdown, no explanation):
         print("[AI ERROR] Full traceback:")
         print(traceback.format_exc())
 
-        fallback = _fallback_insight(employee_context, "AI generation failed")
+        # Only failed API calls count towards the circuit breaker
+        if response is None:
+            ai_limiter.record_failure()
+
+        return _fallback_insight(employee_context, "AI generation failed")
+
+
+def generate_employee_insights_batch(employee_contexts):
+    """
+    Generates insights for several employees with a single Gemini call.
+    Each employee is sent under a short key derived from its context hash
+    and the model answers with a keyed JSON array. Entries that are missing
+    or lack any REQUIRED_FIELDS fall back individually.
+    Returns: dict { user_id: insight }
+    """
+    results = {}
+    keyed = {}
+    for context in employee_contexts:
+        cached = get_cached_insight(context)
+        if cached is not None:
+            results[context.get("user_id")] = cached
+            continue
+        keyed.setdefault(context_hash(context)[:16], []).append(context)
+
+    if not keyed:
+        return results
+
+    def fallback_all(reason):
+        for contexts in keyed.values():
+            for context in contexts:
+                results[context.get("user_id")] = _fallback_insight(context, reason)
+        return results
 
-        if user_id:
-            insight_cache[user_id] = fallback
-            print(f"[AI] Cached fallback insight for user {user_id}")
+    if not _state["gemini_initialized"]:
+        print(f"[AI] Gemini not initialized - client is {client}")
+        return fallback_all("Gemini not initialized")
 
-        return fallback
+    limit_reason = _acquire_api_call()
+    if limit_reason:
+        return fallback_all(limit_reason)
+
+    response = None
+    try:
+        employees = [
+            dict(key=key, **_prompt_profile(contexts[0]))
+            for key, contexts in keyed.items()
+        ]
+
+        prompt = f"""
+You are an AI HR assistant analyzing employee onboarding performance.
+
+Analyze each employee below and return ONLY a JSON array with one object per
+employee. Every object must repeat the employee's "key" and include all
+required fields.
+
+Employees:
+{json.dumps(employees, indent=2)}
+
+Return ONLY this JSON structure (no markdown, no explanation):
+[
+  {{
+    "key": "employee key",
+    "risk_insight": "Detailed explanation of the risk",
+    "detected_signals": ["signal1","signal2"],
+    "ai_prediction": "Short prediction label",
+    "risk_explanation": "Extended explanation",
+    "engagement_score": 0-100,
+    "recommended_actions": ["action1","action2"]
+  }}
+]
+"""
+
+        print(f"[AI] Generating batched insights for {len(keyed)} profile(s)")
+        response = client.models.generate_content(
+            model="gemini-2.0-flash",
+            contents=prompt
+        )
+        ai_limiter.record_success()
+        items = json.loads(response.text)
+        if not isinstance(items, list):
+            raise ValueError("Batched response is not a JSON array")
+
+    except Exception as e:
+        print(f"[AI ERROR] Batched Gemini call failed: {type(e).__name__}: {e}")
+        if response is None:
+            ai_limiter.record_failure()
+        return fallback_all("AI generation failed")
+
+    answered = {}
+    for item in items:
+        if isinstance(item, dict) and item.get("key") in keyed:
+            answered[item["key"]] = item
+
+    for key, contexts in keyed.items():
+        item = answered.get(key)
+        missing_fields = [f for f in REQUIRED_FIELDS if not item or f not in item]
+        if missing_fields:
+            print(f"[AI] Malformed batch entry for users {[c.get('user_id') for c in contexts]} (missing {missing_fields}), using fallback")
+            for context in contexts:
+                results[context.get("user_id")] = _fallback_insight(context, "Malformed batch entry")
+            continue
+
+        insight_data = {f: item[f] for f in REQUIRED_FIELDS}
+        for context in contexts:
+            insight = _share(insight_data, contexts[0], context)
+            _cache_insight(context, insight)
+            results[context.get("user_id")] = insight
+
+    return results
+
+
+def generate_employee_insights(employee_contexts, deadline_seconds=None):
+    """
+    Generates insights for many employees concurrently on a bounded thread pool.
+    Employees whose call has not finished when the deadline expires get
+    _fallback_insight; their calls keep running and fill the cache for later.
+    Employees with identical contexts share a single call.
+    Returns: dict { user_id: insight }
+    """
+    if deadline_seconds is None:
+        deadline_seconds = INSIGHT_DEADLINE_SECONDS
+
+    results = {}
+    groups = {}
+    for context in employee_contexts:
+        cached = get_cached_insight(context)
+        if cached is not None:
+            results[context.get("user_id")] = cached
+            continue
+        groups.setdefault(context_hash(context), []).append(context)
+
+    if not groups:
+        return results
+
+    # One task per batch of distinct contexts (or per context when batching is off)
+    group_list = list(groups.values())
+    if INSIGHT_BATCH_SIZE > 1:
+        chunks = [
+            group_list[i:i + INSIGHT_BATCH_SIZE]
+            for i in range(0, len(group_list), INSIGHT_BATCH_SIZE)
+        ]
+        pending = {
+            _insight_executor.submit(
+                generate_employee_insights_batch, [group[0] for group in chunk]
+            ): chunk
+            for chunk in chunks
+        }
+    else:
+        pending = {
+            _insight_executor.submit(
+                lambda context: {context.get("user_id"): generate_employee_insight(context)},
+                group[0]
+            ): [group]
+            for group in group_list
+        }
+    done, not_done = wait(pending, timeout=deadline_seconds)
+
+    for future in done:
+        chunk = pending[future]
+        try:
+            by_user = future.result()
+        except Exception as e:
+            print(f"[AI ERROR] Insight worker failed for users {[g[0].get('user_id') for g in chunk]}: {e}")
+            by_user = {}
+        for group in chunk:
+            insight = by_user.get(group[0].get("user_id"))
+            if insight is None:
+                insight = _fallback_insight(group[0], "AI generation failed")
+            for context in group:
+                results[context.get("user_id")] = _share(insight, group[0], context)
+            # Point the other members' user index at the shared insight
+            for context in group[1:]:
+                get_cached_insight(context)
+
+    for future in not_done:
+        future.cancel()
+        for group in pending[future]:
+            for context in group:
+                print(f"[AI] Deadline exceeded for user {context.get('user_id')}, using fallback")
+                results[context.get("user_id")] = _fallback_insight(context, "AI deadline exceeded")
+
+    return results
 
 
 def clear_insight_cache(user_id=None):
+    """
+    Drops the user's index entry, so the next lookup goes through the context
+    hash again. The content entry stays: an unchanged context is served from
+    cache without a new Gemini call.
+    """
 
-    if user_id and user_id in insight_cache:
-        del insight_cache[user_id]
+    try:
+        if user_id:
+            insight_cache.delete(f"user:{user_id}")
 
-    elif not user_id:
-        insight_cache.clear()
+        else:
+            insight_cache.clear()
+    except Exception as e:
+        print(f"[AI] Insight cache clear failed for {f'user:{user_id}' if user_id else 'all entries'}: {e}")
 
 
 def _fallback_insight(context, reason):
@@ -3,16 +3,122 @@ from models.task import Task
 from models.user import User
 from models.progress import Progress
 from config.db import db
+from sqlalchemy import func
 from datetime import datetime
+from flask import g, has_request_context
+
+
+class RiskSnapshot:
+    """
+    Employee risk map computed once and shared by every AlertService
+    entry point for the rest of the current request.
+    """
+
+    def __init__(self):
+        self._user_risks = None
+        self._dashboard_stats = None
+
+    @property
+    def user_risks(self):
+        if self._user_risks is None:
+            self._user_risks = AlertService._compute_user_risks()
+        return self._user_risks
+
+    @property
+    def dashboard_stats(self):
+        if self._dashboard_stats is None:
+            self._dashboard_stats = AlertService._compute_dashboard_stats(self.user_risks)
+        return self._dashboard_stats
+
 
 class AlertService:
+    @staticmethod
+    def get_snapshot():
+        """
+        Returns the risk snapshot for the current request (stored on flask.g).
+        Outside a request a fresh, unshared snapshot is returned.
+        """
+        if not has_request_context():
+            return RiskSnapshot()
+        if "risk_snapshot" not in g:
+            g.risk_snapshot = RiskSnapshot()
+        return g.risk_snapshot
+
+    @staticmethod
+    def invalidate_snapshot():
+        """Drops the request snapshot, e.g. after a write in the same request."""
+        if has_request_context():
+            g.pop("risk_snapshot", None)
+
     @staticmethod
     def calculate_employee_alerts(user):
         from models.progress import Progress
-        from models.activity_log import ActivityLog
         from models.task import Task
-        from datetime import datetime
-        
+
+        tasks = Task.query.filter_by(assigned_to=user.id).order_by(Task.id).all()
+        user_progress = Progress.query.filter_by(user_id=user.id).order_by(Progress.id).all()
+
+        return AlertService._evaluate_alerts(
+            user,
+            tasks,
+            user_progress,
+            user.last_login_at,
+            datetime.now()
+        )
+
+    @staticmethod
+    def calculate_bulk_employee_alerts(users):
+        """
+        Set-based version of calculate_employee_alerts.
+        Loads tasks, progress and last-login timestamps for every user in
+        three grouped queries and applies the same rules in memory.
+        Returns: dict { user_id: <calculate_employee_alerts result> }
+        """
+        if not users:
+            return {}
+
+        tasks_by_user, progress_by_user, last_logins = AlertService._load_alert_inputs(
+            [u.id for u in users]
+        )
+
+        now = datetime.now()
+        return {
+            user.id: AlertService._evaluate_alerts(
+                user,
+                tasks_by_user[user.id],
+                progress_by_user[user.id],
+                last_logins.get(user.id),
+                now
+            )
+            for user in users
+        }
+
+    @staticmethod
+    def _load_alert_inputs(user_ids):
+        """
+        Loads the rows the alert rules need for many users at once.
+        Returns: (tasks_by_user, progress_by_user, last_login_by_user)
+        """
+        tasks_by_user = {uid: [] for uid in user_ids}
+        for t in Task.query.filter(Task.assigned_to.in_(user_ids)).order_by(Task.id).all():
+            tasks_by_user[t.assigned_to].append(t)
+
+        progress_by_user = {uid: [] for uid in user_ids}
+        for p in Progress.query.filter(Progress.user_id.in_(user_ids)).order_by(Progress.id).all():
+            progress_by_user[p.user_id].append(p)
+
+        # Maintained at login (see UserActivityService), no log scan needed
+        last_logins = dict(
+            db.session.query(User.id, User.last_login_at)
+            .filter(User.id.in_(user_ids), User.last_login_at.isnot(None))
+            .all()
+        )
+
+        return tasks_by_user, progress_by_user, last_logins
+
+    @staticmethod
+    def _evaluate_alerts(user, tasks, user_progress, last_login_at, now):
+        """Applies the Rule 1 / Rule 2 precedence to already-loaded rows."""
         result = {
             "lowEngagement": False,
             "missedDeadline": False,
@@ -21,9 +127,6 @@ class AlertService:
         }
         
         # 1. 100% Complete Check
-        tasks = Task.query.filter_by(assigned_to=user.id).all()
-        user_progress = Progress.query.filter_by(user_id=user.id).all()
-        
         all_completed = True
         total_completion = 0
         if tasks:
@@ -45,18 +148,17 @@ class AlertService:
 
         # MANDATORY EARLY RETURN FOR COMPLETED EMPLOYEES (Rule 1)
         if all_completed:
-            return {
-                "lowEngagement": False,
-                "missedDeadline": False,
-                "reasons": [],
-                "status": "On Track"
-            }
+            return result
             
         # 2. Missed Deadline Check (Only for incomplete)
+        progress_by_task = {}
+        for p in user_progress:
+            progress_by_task.setdefault(p.task_id, p)
+
         overdue_tasks = []
         for t in tasks:
-            if t.due_date and t.due_date < datetime.now():
-                task_prog = next((p for p in user_progress if p.task_id == t.id), None)
+            if t.due_date and t.due_date < now:
+                task_prog = progress_by_task.get(t.id)
                 prog_val = task_prog.completion if task_prog else 0
                 if t.status.lower() != 'completed' and prog_val < 100:
                     overdue_tasks.append(t)
@@ -65,16 +167,11 @@ class AlertService:
             result["reasons"].append(f"Missed Critical Deadline for: {overdue_tasks[0].title}")
 
         # 3. Low Engagement Check — ONLY for incomplete employees (Rule 2)
-        last_login = ActivityLog.query.filter(
-            ActivityLog.user_id == user.id,
-            ActivityLog.action.ilike("Logged in")
-        ).order_by(ActivityLog.timestamp.desc()).first()
-        
-        reference_time = last_login.timestamp if last_login else user.joined_date
+        reference_time = last_login_at if last_login_at else user.joined_date
         if not reference_time:
-            reference_time = datetime.now()
+            reference_time = now
             
-        hours_inactive = (datetime.now() - reference_time).total_seconds() / 3600
+        hours_inactive = (now - reference_time).total_seconds() / 3600
         if hours_inactive > 24:
             result["lowEngagement"] = True
             result["reasons"].append("Low Engagement Detected")
@@ -90,29 +187,27 @@ class AlertService:
     @staticmethod
     def get_all_alerts():
         results = []
-        users = User.query.filter(User.role.ilike("employee")).all()
-        for user in users:
-            alerts = AlertService.calculate_employee_alerts(user)
-            if alerts["missedDeadline"]:
+        for uid, data in AlertService.get_user_risks().items():
+            if data["missedDeadline"]:
                 results.append({
-                    "id": f"dl_{user.id}",
+                    "id": f"dl_{uid}",
                     "level": "Critical",
                     "type": "Critical",
                     "title": "Missed Critical Deadline",
-                    "message": alerts["reasons"][0] if alerts["reasons"] else "Missed Critical Deadline",
+                    "message": data["reasons"][0] if data["reasons"] else "Missed Critical Deadline",
                     "time": "Overdue",
-                    "target_user_id": user.id,
+                    "target_user_id": uid,
                     "created_at": datetime.now().isoformat()
                 })
-            if alerts["lowEngagement"]:
+            if data["lowEngagement"]:
                 results.append({
-                    "id": f"le_{user.id}",
+                    "id": f"le_{uid}",
                     "level": "Warning",
                     "type": "Warning",
                     "title": "Low Engagement Detected",
                     "message": "Low Engagement Detected",
                     "time": "Needs Attention",
-                    "target_user_id": user.id,
+                    "target_user_id": uid,
                     "created_at": datetime.now().isoformat()
                 })
         return results
@@ -121,13 +216,46 @@ class AlertService:
     def get_user_risks():
         """
         Determines the risk status for ALL employees based on active alerts.
+        Computed once per request (see RiskSnapshot).
         Returns: dict { user_id: { "status": "...", "reasons": [...] } }
         """
-        users = User.query.filter(User.role.ilike("employee")).all()
+        return AlertService.get_snapshot().user_risks
+
+    @staticmethod
+    def get_user_risks_for(user_ids):
+        """
+        get_user_risks() limited to the given employees, for batch callers
+        (e.g. the insight worker) that must not evaluate everyone per batch.
+        Not cached on the request snapshot.
+        """
+        from services.risk_state_service import RiskStateService
+
+        user_risks = RiskStateService.load_user_risks(user_ids)
+        if user_risks is not None:
+            return user_risks
+
+        users = User.query.filter(User.id.in_(user_ids), func.lower(User.role) == "employee").all()
+        return AlertService._risks_from_alerts(users)
+
+    @staticmethod
+    def _compute_user_risks():
+        from services.risk_state_service import RiskStateService
+
+        # Prefer the materialized employee_risk_state table
+        user_risks = RiskStateService.load_user_risks()
+        if user_risks is not None:
+            return user_risks
+
+        users = User.query.filter(func.lower(User.role) == "employee").all()
+        return AlertService._risks_from_alerts(users)
+
+    @staticmethod
+    def _risks_from_alerts(users):
+        alerts_by_user = AlertService.calculate_bulk_employee_alerts(users)
         user_risks = {}
 
         for user in users:
-            alerts = AlertService.calculate_employee_alerts(user)
+            alerts = alerts_by_user[user.id]
 
             user_risks[user.id] = {
                 "user": user,
@@ -140,13 +268,88 @@ class AlertService:
             
         return user_risks
 
+    @staticmethod
+    def iter_user_risks(chunk_size=500):
+        """
+        Streams the get_user_risks() map in chunks of chunk_size employees,
+        paging by user id, so only one chunk is loaded at a time.
+        Yields: dict { user_id: risk data } per chunk, in id order
+        """
+        from services.risk_state_service import RiskStateService
+
+        use_state_table = True
+        after_id = 0
+        while True:
+            chunk = None
+            if use_state_table:
+                try:
+                    chunk = RiskStateService.load_user_risks_page(after_id, chunk_size)
+                except Exception as e:
+                    print(f"[AlertService] Streaming with live risk evaluation: {e}")
+                    db.session.rollback()
+                    use_state_table = False
+
+            if chunk is None:
+                users = User.query.filter(func.lower(User.role) == "employee", User.id > after_id)\
+                    .order_by(User.id).limit(chunk_size).all()
+                alerts_by_user = AlertService.calculate_bulk_employee_alerts(users)
+                avg_by_user = AlertService._average_completion([user.id for user in users])
+                chunk = {
+                    user.id: {
+                        "user": user,
+                        "status": alerts_by_user[user.id]["status"],
+                        "reasons": alerts_by_user[user.id]["reasons"],
+                        "alert_count": len(alerts_by_user[user.id]["reasons"]),
+                        "lowEngagement": alerts_by_user[user.id]["lowEngagement"],
+                        "missedDeadline": alerts_by_user[user.id]["missedDeadline"],
+                        "avg_completion": avg_by_user.get(user.id)
+                    }
+                    for user in users
+                }
+
+            if not chunk:
+                return
+            yield chunk
+            if len(chunk) < chunk_size:
+                return
+            after_id = max(chunk)
+
+    @staticmethod
+    def _average_completion(user_ids):
+        """Average Progress completion per user, from one grouped query."""
+
+        if not user_ids:
+            return {}
+        return dict(
+            db.session.query(
+                Progress.user_id,
+                func.avg(func.coalesce(Progress.completion, 0))
+            )
+            .filter(Progress.user_id.in_(user_ids))
+            .group_by(Progress.user_id)
+            .all()
+        )
+
     @staticmethod
     def get_dashboard_stats():
         """
         Aggregates stats for Dashboard and Reports.
         Single Source of Truth.
         """
-        user_risks = AlertService.get_user_risks()
+        return AlertService.get_snapshot().dashboard_stats
+
+    @staticmethod
+    def _compute_dashboard_stats(user_risks):
+        # Materialized risk state already carries the average completion;
+        # anything else gets it from one grouped query
+        avg_by_user = {
+            uid: data["avg_completion"]
+            for uid, data in user_risks.items()
+            if "avg_completion" in data
+        }
+        missing_ids = [uid for uid in user_risks if uid not in avg_by_user]
+        if missing_ids:
+            avg_by_user.update(AlertService._average_completion(missing_ids))
         
         stats = {
             "total_employees": len(user_risks),
@@ -203,10 +406,9 @@ class AlertService:
             stats["dept_counts"][dept] = stats["dept_counts"].get(dept, 0) + 1
             
             # Completion
-            user_progress = Progress.query.filter_by(user_id=user.id).all()
-            if user_progress:
-                user_avg = sum(p.completion or 0 for p in user_progress) / len(user_progress)
-                total_completion += user_avg
+            user_avg = avg_by_user.get(uid)
+            if user_avg is not None:
+                total_completion += float(user_avg)
             total_users_for_avg += 1
 
         stats["avg_completion"] = round(total_completion / total_users_for_avg, 1) if total_users_for_avg > 0 else 0
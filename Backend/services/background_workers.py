@@ -0,0 +1,93 @@
+"""
+Periodic background work: the employee_risk_state sweeper, the risk trend
+snapshotter and the AI insight sweep. Each one scans every employee, so
+they must run in one process per deployment, never at import time (every
+gunicorn worker, `flask` CLI command and test imports the app).
+
+They are started by:
+  - gunicorn's post_worker_init hook (gunicorn.conf.py), in the one worker
+    that takes BACKGROUND_WORKERS_LOCK; a respawned worker takes over when
+    that one exits
+  - `flask --app app run-background-workers`, for a separate process (set
+    BACKGROUND_WORKERS=0 on the web processes then)
+  - `python app.py`, in the serving process
+
+Request-driven queues (insight refreshes, report jobs, the activity log
+writer) start their own thread on first use in whichever process needs it.
+"""
+import os
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # Windows development: a single process anyway
+    fcntl = None
+
+BACKGROUND_WORKERS = os.environ.get("BACKGROUND_WORKERS", "1") == "1"
+BACKGROUND_WORKERS_LOCK = os.environ.get(
+    "BACKGROUND_WORKERS_LOCK",
+    os.path.join(tempfile.gettempdir(), "onboardai-background-workers.lock")
+)
+
+# Kept open for the life of the process; closing it releases the lock
+_lock_file = None
+_started = False
+
+
+def claim_background_workers(lock_path=BACKGROUND_WORKERS_LOCK):
+    """
+    Takes an exclusive lock on lock_path for the rest of this process.
+    Returns False if another process on this host holds it.
+    """
+    global _lock_file
+    if _lock_file is not None:
+        return True
+    if fcntl is None:
+        _lock_file = True
+        return True
+
+    lock_file = open(lock_path, "a")
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _lock_file = lock_file
+    return True
+
+
+def start_background_workers(app):
+    """Starts the periodic threads in this process. Returns their names."""
+    from services.risk_state_service import start_risk_state_sweeper
+    from services.risk_trend_service import start_risk_trend_snapshotter
+    from services.insight_worker import insight_worker, INSIGHT_SWEEP_INTERVAL_SECONDS
+
+    threads = [
+        start_risk_state_sweeper(app, int(os.getenv("RISK_SWEEP_INTERVAL_SECONDS", "300"))),
+        start_risk_trend_snapshotter(
+            app,
+            int(os.getenv("RISK_TREND_INTERVAL_SECONDS", "3600")),
+            hourly=os.getenv("RISK_TREND_HOURLY", "0") == "1"
+        )
+    ]
+    started = [thread.name for thread in threads if thread]
+
+    if INSIGHT_SWEEP_INTERVAL_SECONDS > 0:
+        insight_worker.enable_sweep(INSIGHT_SWEEP_INTERVAL_SECONDS)
+        started.append("insight-sweep")
+
+    print(f"[BackgroundWorkers] Started in pid {os.getpid()}: {', '.join(started) or 'none'}")
+    return started
+
+
+def start_background_workers_once(app):
+    """
+    Starts the periodic threads here if BACKGROUND_WORKERS is on and no
+    other process holds the lock. Returns True if they were started.
+    """
+    global _started
+    if _started or not BACKGROUND_WORKERS or not claim_background_workers():
+        return False
+    start_background_workers(app)
+    _started = True
+    return True
@@ -0,0 +1,79 @@
+import numpy as np
+
+
+class CompiledForest:
+    """
+    A fitted RandomForestClassifier exported to flat NumPy arrays.
+    The nodes of all trees are concatenated (feature, threshold, left,
+    right, value) and every sample walks every tree at once, one level per
+    step. Inputs are cast to float32 like sklearn does, and per-tree class
+    probabilities are summed in tree order, so labels match model.predict.
+    """
+
+    def __init__(self, classes, n_features, roots, feature, threshold, left, right, value, max_depth):
+        self.classes_ = classes
+        self.n_features_in_ = n_features
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Raises ValueError for anything but a single-output forest classifier."""
+        if not hasattr(model, "estimators_") or getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError(f"Cannot compile {type(model).__name__}")
+
+        roots, features, thresholds, lefts, rights, values = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            is_leaf = tree.children_left < 0
+            roots.append(offset)
+            # Leaves point at themselves so finished samples stay put
+            own_index = np.arange(tree.node_count) + offset
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, own_index, tree.children_left + offset))
+            rights.append(np.where(is_leaf, own_index, tree.children_right + offset))
+            # Class weights per node, normalized to probabilities like predict_proba
+            value = tree.value[:, 0, :]
+            values.append(value / value.sum(axis=1, keepdims=True))
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            classes=np.asarray(model.classes_),
+            n_features=model.n_features_in_,
+            roots=np.asarray(roots, dtype=np.intp),
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            value=np.concatenate(values).astype(np.float64),
+            max_depth=max_depth
+        )
+
+    def apply(self, X):
+        """Leaf index reached in every tree: array of shape (n_samples, n_trees)."""
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X):
+        leaves = self.apply(X)
+        proba = np.zeros((len(leaves), len(self.classes_)))
+        for t in range(leaves.shape[1]):
+            proba += self.value[leaves[:, t]]
+        return proba / leaves.shape[1]
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
@@ -0,0 +1,210 @@
+from models.progress import Progress
+from models.employee_features import EmployeeFeatures
+from config.db import db
+from sqlalchemy import func, case
+from datetime import datetime
+
+# Keys every feature dict carries (see EmployeeFeatures for definitions)
+FEATURE_KEYS = [
+    "completion",
+    "delay_days",
+    "tasks_completed",
+    "time_spent",
+    "progress_count",
+    "total_delay_days",
+    "missed_deadlines"
+]
+
+
+class FeatureStore:
+    """
+    Maintains the employee_features table: one canonical ML feature row per
+    user. Writes to Progress call refresh(); predictors and explainers read
+    through get_features() instead of scanning Progress themselves.
+    """
+
+    @staticmethod
+    def empty_features(user_id=None):
+        features = {key: 0 for key in FEATURE_KEYS}
+        features["user_id"] = user_id
+        return features
+
+    @staticmethod
+    def _aggregate_columns():
+        """The feature aggregates over Progress, in _from_aggregates() order."""
+        completion = func.coalesce(Progress.completion, 0)
+        delay = func.coalesce(Progress.delay_days, 0)
+        return [
+            func.avg(completion),
+            func.avg(delay),
+            func.sum(case((completion >= 100, 1), else_=0)),
+            func.sum(func.coalesce(Progress.time_spent, 0)),
+            func.count(Progress.id),
+            func.sum(delay),
+            func.sum(case((delay > 0, 1), else_=0))
+        ]
+
+    @staticmethod
+    def _from_aggregates(user_id, values):
+        avg_comp, avg_delay, completed, time_spent, count, total_delay, missed = values
+        return {
+            "user_id": user_id,
+            "completion": float(avg_comp or 0),
+            "delay_days": float(avg_delay or 0),
+            "tasks_completed": int(completed or 0),
+            "time_spent": float(time_spent or 0),
+            "progress_count": int(count or 0),
+            "total_delay_days": float(total_delay or 0),
+            "missed_deadlines": int(missed or 0)
+        }
+
+    @staticmethod
+    def aggregate(user_ids=None):
+        """
+        Computes the features straight from Progress with one grouped query.
+        Users without progress rows are left out.
+        Returns: dict { user_id: features }
+        """
+        query = db.session.query(Progress.user_id, *FeatureStore._aggregate_columns())\
+            .group_by(Progress.user_id)
+        if user_ids is not None:
+            query = query.filter(Progress.user_id.in_(user_ids))
+
+        return {
+            row[0]: FeatureStore._from_aggregates(row[0], row[1:])
+            for row in query.all()
+        }
+
+    @staticmethod
+    def users_with_features(*criteria):
+        """
+        Loads the users matching criteria together with their features in a
+        constant number of queries, whatever the headcount: one join against
+        employee_features, plus one grouped aggregate for users without a row
+        yet (nothing is written; backfill() creates the rows). If the table
+        is unavailable, a single grouped outer join of User and Progress is
+        used instead.
+        Returns: list of (user, features) in user id order
+        """
+        from models.user import User
+
+        try:
+            rows = db.session.query(User, EmployeeFeatures)\
+                .outerjoin(EmployeeFeatures, EmployeeFeatures.user_id == User.id)\
+                .filter(*criteria).order_by(User.id).all()
+
+            missing = [user.id for user, row in rows if row is None]
+            aggregated = FeatureStore.aggregate(missing) if missing else {}
+            return [
+                (user, row.to_dict() if row is not None
+                 else aggregated.get(user.id) or FeatureStore.empty_features(user.id))
+                for user, row in rows
+            ]
+        except Exception as e:
+            print(f"[FeatureStore] Falling back to live aggregation: {e}")
+            db.session.rollback()
+            rows = db.session.query(User, *FeatureStore._aggregate_columns())\
+                .outerjoin(Progress, Progress.user_id == User.id)\
+                .filter(*criteria).group_by(User.id).order_by(User.id).all()
+            return [(row[0], FeatureStore._from_aggregates(row[0].id, row[1:])) for row in rows]
+
+    @staticmethod
+    def refresh(user_ids):
+        """
+        Recomputes the feature rows for the given users.
+        Adds them to the session; the caller commits.
+        Returns: dict { user_id: features }
+        """
+        user_ids = [uid for uid in set(user_ids) if uid]
+        if not user_ids:
+            return {}
+
+        # Savepoint so a failed refresh never aborts the caller's write
+        try:
+            with db.session.begin_nested():
+                return FeatureStore._store(user_ids)
+        except Exception as e:
+            print(f"[FeatureStore] Refresh failed for users {user_ids}: {e}")
+            aggregated = FeatureStore.aggregate(user_ids)
+            return {uid: aggregated.get(uid) or FeatureStore.empty_features(uid) for uid in user_ids}
+
+    @staticmethod
+    def _store(user_ids):
+        aggregated = FeatureStore.aggregate(user_ids)
+        existing = {
+            row.user_id: row
+            for row in EmployeeFeatures.query.filter(EmployeeFeatures.user_id.in_(user_ids)).all()
+        }
+
+        features = {}
+        for user_id in user_ids:
+            values = aggregated.get(user_id) or FeatureStore.empty_features(user_id)
+            row = existing.get(user_id)
+            if not row:
+                row = EmployeeFeatures(user_id=user_id)
+                db.session.add(row)
+            for key in FEATURE_KEYS:
+                setattr(row, key, values[key])
+            row.updated_at = datetime.utcnow()
+            features[user_id] = values
+        return features
+
+    @staticmethod
+    def get_features(user_ids):
+        """
+        Reads the feature rows for the given users. Users without a row, or
+        all of them if the table is unavailable, are aggregated from Progress
+        instead; nothing is written.
+        Returns: dict { user_id: features } with an entry for every user
+        """
+        user_ids = [uid for uid in set(user_ids) if uid]
+        if not user_ids:
+            return {}
+
+        try:
+            features = {
+                row.user_id: row.to_dict()
+                for row in EmployeeFeatures.query.filter(EmployeeFeatures.user_id.in_(user_ids)).all()
+            }
+            missing = [uid for uid in user_ids if uid not in features]
+            if missing:
+                aggregated = FeatureStore.aggregate(missing)
+                features.update({uid: aggregated.get(uid) or FeatureStore.empty_features(uid) for uid in missing})
+            return features
+        except Exception as e:
+            print(f"[FeatureStore] Falling back to live aggregation: {e}")
+            db.session.rollback()
+            aggregated = FeatureStore.aggregate(user_ids)
+            return {uid: aggregated.get(uid) or FeatureStore.empty_features(uid) for uid in user_ids}
+
+    @staticmethod
+    def get(user_id):
+        return FeatureStore.get_features([user_id]).get(user_id) or FeatureStore.empty_features(user_id)
+
+    @staticmethod
+    def model_input(features):
+        """The subset of a feature dict passed to predict_risk / explain_risk."""
+        return {
+            "completion": features["completion"],
+            "delay_days": features["delay_days"],
+            "tasks_completed": features["tasks_completed"],
+            "time_spent": features["time_spent"]
+        }
+
+    @staticmethod
+    def backfill(missing_only=False):
+        """
+        Rebuilds every user's feature row, or with missing_only just creates
+        the rows that don't exist yet. Returns the number of rows written.
+        """
+        from models.user import User
+
+        query = User.query.with_entities(User.id)
+        if missing_only:
+            query = query.outerjoin(EmployeeFeatures, EmployeeFeatures.user_id == User.id)\
+                .filter(EmployeeFeatures.user_id.is_(None))
+        user_ids = [uid for (uid,) in query.all()]
+        if user_ids:
+            FeatureStore._store(user_ids)
+            db.session.commit()
+        return len(user_ids)
@@ -0,0 +1,228 @@
+import os
+import json
+import time
+import sqlite3
+import tempfile
+import threading
+from cachetools import TTLCache
+
+
+class MemoryInsightCache:
+    """Process-local TTL cache (LRU eviction once maxsize is reached)."""
+
+    backend = "memory"
+
+    def __init__(self, maxsize=500, ttl=900):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._cache.get(str(key))
+            if value is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._cache[str(key)] = value
+
+    def delete(self, key):
+        with self._lock:
+            self._cache.pop(str(key), None)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def ensure_capacity(self, entries):
+        """
+        Grows maxsize to at least entries (it never shrinks). Returns True
+        if it grew; entries already cached are kept with a fresh TTL.
+        """
+        with self._lock:
+            if entries <= self.maxsize:
+                return False
+            grown = TTLCache(maxsize=entries, ttl=self.ttl)
+            grown.update(self._cache)
+            self._cache = grown
+            self.maxsize = entries
+            return True
+
+    def size(self):
+        with self._lock:
+            return len(self._cache)
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "backend": self.backend,
+                "size": self.size(),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0
+            }
+
+
+class SQLiteInsightCache(MemoryInsightCache):
+    """
+    Cache stored in a shared SQLite file, so every gunicorn worker on the
+    host sees the same entries and they survive restarts.
+    Entries expire after ttl seconds; once maxsize is exceeded the least
+    recently read entries are evicted. Hit/miss counts are per process.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path, maxsize=500, ttl=900):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._local = threading.local()
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._misses = 0
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS insight_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_insight_cache_last_access ON insight_cache (last_access)"
+        )
+        # Capacity grown by ensure_capacity(), shared by every process
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS insight_cache_meta ("
+            " name TEXT PRIMARY KEY,"
+            " value INTEGER NOT NULL)"
+        )
+        conn.commit()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            self._local.conn = conn
+        return conn
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+
+    def get(self, key):
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, expires_at FROM insight_cache WHERE key = ?", (str(key),)
+        ).fetchone()
+
+        if row is None or row[1] <= now:
+            if row is not None:
+                conn.execute("DELETE FROM insight_cache WHERE key = ?", (str(key),))
+                conn.commit()
+            self._count(hit=False)
+            return None
+
+        conn.execute("UPDATE insight_cache SET last_access = ? WHERE key = ?", (now, str(key)))
+        conn.commit()
+        self._count(hit=True)
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        conn = self._connection()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO insight_cache (key, value, expires_at, last_access)"
+            " VALUES (?, ?, ?, ?)",
+            (str(key), json.dumps(value, default=str), now + self.ttl, now)
+        )
+        self._evict(conn, now)
+        conn.commit()
+
+    def _capacity(self, conn):
+        row = conn.execute("SELECT value FROM insight_cache_meta WHERE name = 'maxsize'").fetchone()
+        return max(self.maxsize, row[0] if row else 0)
+
+    def ensure_capacity(self, entries):
+        conn = self._connection()
+        capacity = self._capacity(conn)
+        if entries <= capacity:
+            self.maxsize = capacity
+            return False
+        conn.execute(
+            "INSERT OR REPLACE INTO insight_cache_meta (name, value) VALUES ('maxsize', ?)", (entries,)
+        )
+        conn.commit()
+        self.maxsize = entries
+        return True
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM insight_cache WHERE expires_at <= ?", (now,))
+        overflow = self.size(conn) - self._capacity(conn)
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM insight_cache WHERE key IN ("
+                " SELECT key FROM insight_cache ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            )
+
+    def delete(self, key):
+        conn = self._connection()
+        conn.execute("DELETE FROM insight_cache WHERE key = ?", (str(key),))
+        conn.commit()
+
+    def clear(self):
+        conn = self._connection()
+        conn.execute("DELETE FROM insight_cache")
+        conn.commit()
+
+    def size(self, conn=None):
+        conn = conn or self._connection()
+        return conn.execute("SELECT COUNT(*) FROM insight_cache").fetchone()[0]
+
+    def stats(self):
+        stats = super().stats()
+        stats["path"] = self.path
+        return stats
+
+
+def create_insight_cache():
+    """
+    Builds the insight cache from the environment:
+    INSIGHT_CACHE_BACKEND (sqlite | memory), INSIGHT_CACHE_PATH,
+    INSIGHT_CACHE_MAXSIZE and INSIGHT_CACHE_TTL (seconds).
+    """
+    backend = os.environ.get("INSIGHT_CACHE_BACKEND", "sqlite").lower()
+    # The floor; ai_service.reserve_insight_capacity() grows it to fit the
+    # population (one content entry plus one index per user)
+    maxsize = int(os.environ.get("INSIGHT_CACHE_MAXSIZE", "2000"))
+    ttl = int(os.environ.get("INSIGHT_CACHE_TTL", "900"))
+
+    if backend == "sqlite":
+        path = os.environ.get(
+            "INSIGHT_CACHE_PATH",
+            os.path.join(tempfile.gettempdir(), "onboardai_insight_cache.sqlite3")
+        )
+        try:
+            return SQLiteInsightCache(path, maxsize=maxsize, ttl=ttl)
+        except Exception as e:
+            print(f"[AI] SQLite insight cache unavailable ({e}), using in-memory cache")
+
+    return MemoryInsightCache(maxsize=maxsize, ttl=ttl)
@@ -0,0 +1,183 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+# How many queued users one worker pass hands to generate_employee_insights()
+INSIGHT_WORKER_BATCH_SIZE = int(os.environ.get("INSIGHT_WORKER_BATCH_SIZE", "8"))
+# Scheduled sweep that queues every employee whose insight is missing
+INSIGHT_SWEEP_INTERVAL_SECONDS = int(os.environ.get("INSIGHT_SWEEP_INTERVAL_SECONDS", "600"))
+# Throughput is reported over this trailing window
+THROUGHPUT_WINDOW_SECONDS = 300
+
+
+class InsightWorker:
+    """
+    Background worker that precomputes AI insights.
+    Jobs are "refresh insight for user X"; forced jobs drop the cached
+    insight first, unforced ones (the sweep, cache misses) only fill gaps.
+    The job thread starts on the first enqueue in a process; the periodic
+    sweep only runs where enable_sweep() was called (see
+    services/background_workers.py), so it runs once per deployment.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._pending = {}  # user_id -> force flag, for de-duplication
+        self._lock = threading.Lock()
+        self._thread = None
+        self._app = None
+        self._sweep_interval = INSIGHT_SWEEP_INTERVAL_SECONDS
+        self._sweeping = False
+        self._completed_at = deque()
+        self._stats = {
+            "processed": 0,
+            "failed": 0,
+            "last_job_at": None,
+            "last_sweep_at": None
+        }
+
+    def init_app(self, app):
+        self._app = app
+
+    def enable_sweep(self, sweep_interval=None):
+        """Sweeps every sweep_interval seconds (immediately on enabling) in this process."""
+        with self._lock:
+            if sweep_interval is not None:
+                self._sweep_interval = sweep_interval
+            self._sweeping = self._sweep_interval > 0
+        # Wakes the thread if it is waiting for a job with no timeout
+        self._queue.put(None)
+        self.start()
+
+    def start(self):
+        with self._lock:
+            if self._app is None or (self._thread and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(target=self._run, name="insight-worker", daemon=True)
+            self._thread.start()
+
+    def enqueue(self, user_ids, force=True):
+        for user_id in user_ids:
+            if not user_id:
+                continue
+            with self._lock:
+                if user_id in self._pending:
+                    self._pending[user_id] = self._pending[user_id] or force
+                    continue
+                self._pending[user_id] = force
+            self._queue.put(user_id)
+        self.start()
+
+    def sweep(self):
+        """Queues every employee/intern; the context builder skips completed ones."""
+        from models.user import User
+        from sqlalchemy import func
+
+        with self._app.app_context():
+            user_ids = [
+                uid for (uid,) in User.query.with_entities(User.id)
+                .filter(func.lower(User.role).in_(("employee", "intern"))).all()
+            ]
+        from services.ai_service import reserve_insight_capacity
+
+        reserve_insight_capacity(len(user_ids))
+        self.enqueue(user_ids, force=False)
+        with self._lock:
+            self._stats["last_sweep_at"] = datetime.now()
+        return len(user_ids)
+
+    def status(self):
+        with self._lock:
+            self._trim_window()
+            recent = len(self._completed_at)
+            queue_depth = len(self._pending)
+            stats = dict(self._stats)
+            sweeping = self._sweeping
+
+        last_job_at = stats["last_job_at"]
+        last_sweep_at = stats["last_sweep_at"]
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "sweeping": sweeping,
+            "queue_depth": queue_depth,
+            "processed": stats["processed"],
+            "failed": stats["failed"],
+            "jobs_per_minute": round(recent / (THROUGHPUT_WINDOW_SECONDS / 60), 2),
+            "last_job_at": last_job_at.strftime("%Y-%m-%d %H:%M:%S") if last_job_at else None,
+            "last_sweep_at": last_sweep_at.strftime("%Y-%m-%d %H:%M:%S") if last_sweep_at else None,
+            "sweep_interval_seconds": self._sweep_interval
+        }
+
+    def _trim_window(self):
+        now = time.monotonic()
+        while self._completed_at and now - self._completed_at[0] > THROUGHPUT_WINDOW_SECONDS:
+            self._completed_at.popleft()
+
+    def _run(self):
+        next_sweep = time.monotonic()
+        while True:
+            timeout = None
+            if self._sweeping:
+                timeout = max(0, next_sweep - time.monotonic())
+            try:
+                user_id = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                try:
+                    self.sweep()
+                except Exception as e:
+                    print(f"[InsightWorker] Sweep failed: {e}")
+                next_sweep = time.monotonic() + self._sweep_interval
+                continue
+            if user_id is None:
+                continue  # enable_sweep() wake-up
+
+            batch = [user_id]
+            while len(batch) < INSIGHT_WORKER_BATCH_SIZE:
+                try:
+                    queued = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if queued is not None:
+                    batch.append(queued)
+            self._process(batch)
+
+    def _process(self, user_ids):
+        from config.db import db
+        from models.user import User
+        from services.alert_service import AlertService
+        from services.risk_overview import build_employee_risk_rows
+        from services.ai_service import clear_insight_cache, generate_employee_insights
+
+        with self._lock:
+            forced = [uid for uid in user_ids if self._pending.pop(uid, False)]
+
+        with self._app.app_context():
+            try:
+                users = User.query.filter(User.id.in_(user_ids)).all()
+                # Only this batch's employees, not the whole population
+                _, contexts = build_employee_risk_rows(users, AlertService.get_user_risks_for(user_ids))
+                for user_id in forced:
+                    clear_insight_cache(user_id)
+                generate_employee_insights(contexts)
+                failed = False
+            except Exception as e:
+                print(f"[InsightWorker] Failed to refresh insights for {user_ids}: {e}")
+                db.session.rollback()
+                failed = True
+
+        with self._lock:
+            self._stats["failed" if failed else "processed"] += len(user_ids)
+            self._stats["last_job_at"] = datetime.now()
+            self._completed_at.extend([time.monotonic()] * len(user_ids))
+            self._trim_window()
+
+
+insight_worker = InsightWorker()
+
+
+def enqueue_insight_refresh(user_ids, force=True):
+    """Queues insight regeneration for the given users (no-op for empty ids)."""
+    insight_worker.enqueue(user_ids, force=force)
@@ -1,44 +1,161 @@
+"""
+Offline training pipeline for the risk model.
+
+Nothing runs on import. Retrain with either of:
+    flask --app app train-model [--n-jobs -1] [--chunksize 50000]
+    python -m services.ml_service [--n-jobs -1] [--chunksize 50000]
+"""
+import os
+import json
+import time
+import hashlib
+import tempfile
+from datetime import datetime
+
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score, classification_report
-import joblib
 
+from services.predictor import FEATURES, MODEL_PATH
 
-def train_model():
-    print("📊 Loading dataset...")
+LABEL = "label"
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "onboarding_real_data.csv")
 
-    df = pd.read_csv("services/onboarding_real_data.csv")
 
-    print("✅ Rows loaded:", len(df))
-    print("✅ Columns:", df.columns.tolist())
+def load_training_data(data_path=DATA_PATH, chunksize=50000):
+    """
+    Reads the feature and label columns of the CSV in chunks of chunksize
+    rows, so only the needed columns are ever held (features as float32).
+    Returns: (X DataFrame with FEATURES columns, y array of labels)
+    """
+    feature_chunks = []
+    label_chunks = []
+    for chunk in pd.read_csv(
+        data_path,
+        usecols=FEATURES + [LABEL],
+        dtype={f: np.float32 for f in FEATURES},
+        chunksize=chunksize
+    ):
+        chunk = chunk.dropna()
+        feature_chunks.append(chunk[FEATURES].to_numpy(dtype=np.float32))
+        label_chunks.append(chunk[LABEL].to_numpy())
 
-    # Inputs (features)
-    X = df[["completion", "delay_days", "tasks_completed", "time_spent"]]
+    if not feature_chunks:
+        raise ValueError(f"No training rows in {data_path}")
 
-    # Output (label)
-    y = df["label"]
+    X = pd.DataFrame(np.concatenate(feature_chunks), columns=FEATURES)
+    y = np.concatenate(label_chunks)
+    return X, y
 
-    print("🤖 Training ML model...")
+
+def train_model(data_path=DATA_PATH, n_estimators=200, n_jobs=-1, chunksize=50000, random_state=42):
+    """
+    Fits the RandomForest on data_path (trees are built on n_jobs cores).
+    Returns: (model, metrics dict)
+    """
+    from sklearn.model_selection import train_test_split
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import accuracy_score, classification_report
+
+    started = time.perf_counter()
+    print("📊 Loading dataset...")
+    X, y = load_training_data(data_path, chunksize=chunksize)
+    print("✅ Rows loaded:", len(X))
 
     X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.25, random_state=42
+        X, y, test_size=0.25, random_state=random_state
     )
 
-    model = RandomForestClassifier(n_estimators=200)
+    print(f"🤖 Training ML model ({n_estimators} trees, n_jobs={n_jobs})...")
+    model = RandomForestClassifier(
+        n_estimators=n_estimators,
+        n_jobs=n_jobs,
+        random_state=random_state
+    )
     model.fit(X_train, y_train)
 
     predictions = model.predict(X_test)
-
     accuracy = accuracy_score(y_test, predictions)
-
     print("\n✅ Model Accuracy:", accuracy)
     print("\n📈 Classification Report:\n")
-    print(classification_report(y_test, predictions))
+    print(classification_report(y_test, predictions, zero_division=0))
+
+    metrics = {
+        "accuracy": accuracy,
+        "report": classification_report(y_test, predictions, output_dict=True, zero_division=0),
+        "rows": len(X),
+        "train_rows": len(X_train),
+        "test_rows": len(X_test),
+        "n_estimators": n_estimators,
+        "random_state": random_state,
+        "data_path": os.path.abspath(data_path),
+        "training_seconds": round(time.perf_counter() - started, 3)
+    }
+    return model, metrics
+
+
+def _atomic_write(path, write):
+    """Writes through a temp file in the same directory, then renames over path."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        # mkstemp creates 0600 files; keep the usual permissions for readers
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
 
-    joblib.dump(model, "services/model.pkl")
-    print("\n💾 Model saved to services/model.pkl")
+
+def save_model(model, metrics, model_path=MODEL_PATH):
+    """
+    Atomically writes the model, then "<model_path>.metrics.json" and finally
+    the "<model_path>.version" marker that running workers watch
+    (see predictor.ModelHolder). Returns the version id.
+    """
+    import io
+    import joblib
+
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    payload = buffer.getvalue()
+    version = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{hashlib.sha256(payload).hexdigest()[:8]}"
+
+    metrics = dict(metrics, version=version, trained_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+    _atomic_write(model_path, lambda f: f.write(payload))
+    _atomic_write(
+        model_path + ".metrics.json",
+        lambda f: f.write(json.dumps(metrics, indent=2, default=str).encode())
+    )
+    _atomic_write(model_path + ".version", lambda f: f.write(version.encode()))
+
+    print(f"\n💾 Model {version} saved to {model_path}")
+    return version
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train the onboarding risk model.")
+    parser.add_argument("--data", default=DATA_PATH, help="training CSV")
+    parser.add_argument("--output", default=MODEL_PATH, help="model file to write")
+    parser.add_argument("--n-estimators", type=int, default=200)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="cores used for fitting (-1 = all)")
+    parser.add_argument("--chunksize", type=int, default=50000, help="CSV rows read per chunk")
+    parser.add_argument("--random-state", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    model, metrics = train_model(
+        data_path=args.data,
+        n_estimators=args.n_estimators,
+        n_jobs=args.n_jobs,
+        chunksize=args.chunksize,
+        random_state=args.random_state
+    )
+    return save_model(model, metrics, model_path=args.output)
 
 
-# FORCE run training
-train_model()
+if __name__ == "__main__":
+    main()
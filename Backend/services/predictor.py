@@ -1,105 +1,222 @@
-import joblib
+import os
+import threading
+import time
+import numpy as np
+from services.compiled_forest import CompiledForest
+from services.rule_engine import classify_columns
 
-model = joblib.load("services/model.pkl")
+# Column order the model was trained with
+FEATURES = ["completion", "delay_days", "tasks_completed", "time_spent"]
+FEATURE_SET = set(FEATURES)
 
-import pandas as pd
+MODEL_PATH = os.environ.get(
+    "MODEL_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "model.pkl")
+)
+# How often a prediction may stat the model file for a newer version
+MODEL_CHECK_INTERVAL_SECONDS = float(os.environ.get("MODEL_CHECK_INTERVAL_SECONDS", "5"))
+# Serve predictions from flat tree arrays instead of sklearn (see compiled_forest.py)
+MODEL_COMPILED = os.environ.get("MODEL_COMPILED", "1") == "1"
+
+
+class ModelHolder:
+    """
+    Loads the model on first use and hot-swaps it when the file changes.
+    A change is detected through the "<path>.version" marker when present,
+    else the file's mtime and size. The new model is loaded next to the old
+    one and swapped in with a single assignment, so in-flight predictions
+    finish on the model they started with. A failed reload keeps the old model.
+    With compiled=True only the CompiledForest export is kept in memory.
+    """
+
+    def __init__(self, path, check_interval=5, compiled=False):
+        self.path = path
+        self.check_interval = check_interval
+        self.compiled = compiled
+        self._lock = threading.Lock()
+        self._loaded = None  # (model, version, loaded_at)
+        self._next_check = 0
+        self._reloads = 0
+        self._failed_version = None
+
+    def get(self):
+        loaded = self._loaded
+        if loaded is None:
+            return self.load()[0]
+
+        if self.check_interval >= 0 and time.monotonic() >= self._next_check:
+            # Only one thread reloads; the others keep using the current model
+            if self._lock.acquire(blocking=False):
+                try:
+                    self._next_check = time.monotonic() + self.check_interval
+                    version = self._version()
+                    if version not in (self._loaded[1], self._failed_version):
+                        self._swap()
+                finally:
+                    self._lock.release()
+                loaded = self._loaded
+        return loaded[0]
+
+    def load(self):
+        """Loads the model unless another thread already did."""
+        with self._lock:
+            if self._loaded is None:
+                self._swap(initial=True)
+            return self._loaded
+
+    def preload(self):
+        """Loads the model now, e.g. in the gunicorn master before workers fork."""
+        self.load()
+        print(f"[Predictor] Model preloaded (version {self._loaded[1]})")
+
+    def _version(self):
+        try:
+            with open(self.path + ".version") as f:
+                return f.read().strip()
+        except OSError:
+            pass
+        try:
+            stat = os.stat(self.path)
+            return f"{stat.st_mtime_ns}-{stat.st_size}"
+        except OSError:
+            return None
+
+    def _swap(self, initial=False):
+        import joblib
+
+        version = self._version()
+        try:
+            model = joblib.load(self.path)
+        except Exception as e:
+            if initial:
+                raise
+            print(f"[Predictor] Reload of {self.path} failed, keeping current model: {e}")
+            # Not retried until the file changes again
+            self._failed_version = version
+            return
+
+        if self.compiled:
+            try:
+                model = CompiledForest.from_sklearn(model)
+            except ValueError as e:
+                print(f"[Predictor] {e}, serving it through sklearn")
+
+        self._loaded = (model, version, time.time())
+        self._next_check = time.monotonic() + self.check_interval
+        if not initial:
+            self._reloads += 1
+            print(f"[Predictor] Hot-swapped model to version {version}")
+
+    def status(self):
+        loaded = self._loaded
+        return {
+            "path": self.path,
+            "loaded": loaded is not None,
+            "version": loaded[1] if loaded else None,
+            "compiled": isinstance(loaded[0], CompiledForest) if loaded else None,
+            "loaded_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(loaded[2])) if loaded else None,
+            "reloads": self._reloads
+        }
+
+
+model_holder = ModelHolder(
+    MODEL_PATH,
+    check_interval=MODEL_CHECK_INTERVAL_SECONDS,
+    compiled=MODEL_COMPILED
+)
 
 def predict_risk(data):
-    features = pd.DataFrame([[
-        data["completion"],
-        data["delay_days"],
-        data["tasks_completed"],
-        data["time_spent"]
-    ]], columns=["completion", "delay_days", "tasks_completed", "time_spent"])
+    return predict_risk_batch([data])[0]
+
+def predict_risk_batch(batch):
+    """
+    Predicts risk labels for many employees with a single model.predict call.
+    batch: 2-D array with FEATURES as columns, or a list of dicts with those keys.
+    Returns: list of labels in input order
+    """
+    if len(batch) == 0:
+        return []
 
-    prediction = model.predict(features)[0]
-    return prediction
+    if not isinstance(batch, np.ndarray) and isinstance(batch[0], dict):
+        batch = [[row[f] for f in FEATURES] for row in batch]
+
+    X = np.asarray(batch, dtype=float).reshape(-1, len(FEATURES))
+    model = model_holder.get()
+    if isinstance(model, CompiledForest):
+        # CompiledForest takes the raw array, no DataFrame or validation pass
+        return model.predict(X).tolist()
+
+    import pandas as pd
+
+    return model.predict(pd.DataFrame(X, columns=FEATURES)).tolist()
 
 def analyze_employee_risk(data):
     """
     Analyzes employee data to determine risk level, message, and recommendations.
     Handles missing keys and ensures robustness.
     """
-    # Safe data extraction with defaults
-    try:
-        completion = float(data.get("completion") or 0)
-        delay_days = int(data.get("delay_days") or 0)
-        missed_deadlines = int(data.get("missed_deadlines") or 0)
-    except (ValueError, TypeError):
-        completion = 0.0
-        delay_days = 0
-        missed_deadlines = 0
-    
-    risk_level = "Low"
-    message = "Consistent progress"
-    risk_type = "Good" # For internal logic
-    recommendations = []
-
-    # Logic for Risk Level & Message
-    # New Strict Rules from User:
-    # 1. Missed critical deadline -> HIGH RISK (RED)
-    if missed_deadlines > 0:
-        risk_level = "High"
-        message = "Missed critical deadline — immediate action required."
-        risk_type = "Critical"
-        recommendations = [
-            "Schedule 1:1 meeting to discuss blockers",
-            "Assign a mentor or buddy",
-            "Reduce workload temporarily",
-            "Provide additional training resources"
-        ]
-    # 2. Just started (0-10%) -> NEUTRAL
-    elif completion <= 10:
-        risk_level = "Neutral"
-        message = "Just started — no risk assessment yet."
-        risk_type = "Neutral"
-        recommendations = [
-            "Ensure access to all tools",
-            "Schedule an introductory walkthrough",
-            "Verify account setup completion"
-        ]
-    # 3. Low completion rate (< 40%) but no missed deadline -> MEDIUM RISK
-    elif completion < 40:
-        risk_level = "Medium"
-        message = "Low completion rate — monitor performance."
-        risk_type = "Warning"
-        recommendations = [
-            "Check task difficulty level",
-            "Provide clearer requirements",
-            "Increase supervision frequency",
-            "Send a gentle reminder"
-        ]
-    # 4. Steady progress (>= 50%) AND no missed deadline -> ON TRACK
-    elif completion >= 50:
-        # Default/Good state
-        risk_level = "Low"
-        message = "Consistent progress — on track."
-        risk_type = "Good"
-        recommendations = [
-            "Acknowledge good progress",
-            "Assign next set of advanced tasks",
-            "Encourage peer networking"
-        ]
-    else:
-        # Fallback for 10-40% or 40-50% gaps if strictly following rules, 
-        # but let's assume "Consistent progress" for safe zone or "Monitor" for gap
-        risk_level = "Low"
-        message = "Consistent progress."
-        risk_type = "Good"
-        recommendations = []
-
-    # Use the ML model for a "prediction" insight
-    try:
-        # Ensure data passed to model has correct shape/types if needed
-        # For now, just passing the original data wrapper safe
-        ml_prediction = predict_risk(data)
-    except Exception as e:
-        # Log error in a real app
-        ml_prediction = "Prediction unavailable"
+    return analyze_employee_risk_batch([data])[0]
+
+def analyze_employee_risk_batch(data_list):
+    """
+    analyze_employee_risk for many employees; the ML predictions for all of
+    them come from one predict_risk_batch call.
+    Returns: list of analyses in input order
+    """
+    predictions = ["Prediction unavailable"] * len(data_list)
+    # Records without every model feature get no prediction
+    complete = [i for i, data in enumerate(data_list) if data.keys() >= FEATURE_SET]
+    if complete:
+        try:
+            for i, label in zip(complete, predict_risk_batch([data_list[i] for i in complete])):
+                predictions[i] = label
+        except Exception:
+            # One bad record must not cost the others their prediction
+            for i in complete:
+                try:
+                    predictions[i] = predict_risk(data_list[i])
+                except Exception:
+                    pass
+
+    classified = classify_columns(_rule_inputs(data_list))
+
+    return [
+        {
+            "risk_level": risk_type, # Critical, Warning, Neutral, Good
+            "message": message,
+            "prediction": f"AI Prediction: {ml_prediction}",
+            "recommended_actions": recommendations
+        }
+        for risk_type, message, recommendations, ml_prediction in zip(
+            classified["risk_level"].tolist(),
+            classified["message"].tolist(),
+            classified["recommended_actions"],
+            predictions
+        )
+    ]
+
+def _rule_inputs(data_list):
+    """
+    Columns for the "employee_risk" rule table in risk_rules.json.
+    Safe data extraction with defaults: a record with an unparsable value
+    is evaluated as all zeros.
+    """
+    completion, delay_days, missed_deadlines = [], [], []
+    for data in data_list:
+        try:
+            values = (
+                float(data.get("completion") or 0),
+                int(data.get("delay_days") or 0),
+                int(data.get("missed_deadlines") or 0)
+            )
+        except (ValueError, TypeError):
+            values = (0.0, 0, 0)
+        completion.append(values[0])
+        delay_days.append(values[1])
+        missed_deadlines.append(values[2])
 
     return {
-        "risk_level": risk_type, # Critical, Warning, Neutral, Good
-        "message": message,
-        "prediction": f"AI Prediction: {ml_prediction}",
-        "recommended_actions": recommendations
+        "completion": completion,
+        "delay_days": delay_days,
+        "missed_deadlines": missed_deadlines
     }
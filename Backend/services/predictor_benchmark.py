@@ -0,0 +1,56 @@
+"""
+Micro-benchmark: per-employee prediction cost of predict_risk in a loop
+versus one predict_risk_batch call.
+
+Run from the Backend directory:
+    python -m services.predictor_benchmark [N ...]
+"""
+import sys
+import time
+
+import numpy as np
+
+from services.predictor import predict_risk, predict_risk_batch
+
+DEFAULT_SIZES = [1, 100, 10000]
+# The loop is capped; its per-call cost does not depend on N
+MAX_LOOP_CALLS = 200
+
+
+def _sample(n, seed=42):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "completion": float(rng.uniform(0, 100)),
+            "delay_days": float(rng.integers(0, 15)),
+            "tasks_completed": float(rng.integers(0, 20)),
+            "time_spent": float(rng.uniform(0, 60))
+        }
+        for _ in range(n)
+    ]
+
+
+def _time(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(sizes):
+    print(f"{'N':>8} {'loop us/emp':>14} {'batch us/emp':>14} {'speedup':>9}")
+    for n in sizes:
+        rows = _sample(n)
+        loop_rows = rows[:MAX_LOOP_CALLS]
+
+        loop = _time(lambda: [predict_risk(r) for r in loop_rows], repeat=3) / len(loop_rows)
+        batch = _time(lambda: predict_risk_batch(rows), repeat=3) / n
+
+        print(f"{n:>8} {loop * 1e6:>14.1f} {batch * 1e6:>14.1f} {loop / batch:>8.1f}x")
+
+
+if __name__ == "__main__":
+    run([int(a) for a in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,161 @@
+import os
+import threading
+from cachetools import TTLCache
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from config.db import db
+from models.user import User
+
+# Columns kept per authenticated user; anything else is loaded on demand
+PRINCIPAL_FIELDS = ("id", "name", "email", "role", "department")
+
+# Bounds how long a change made by another worker process can go unseen
+PRINCIPAL_CACHE_SECONDS = int(os.environ.get("PRINCIPAL_CACHE_SECONDS", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.environ.get("PRINCIPAL_CACHE_SIZE", "10000"))
+
+_PENDING_KEY = "principal_cache_invalidations"
+
+
+class Principal:
+    """
+    The authenticated user as request.current_user. The cached identity
+    columns are answered directly; reading or writing any other attribute
+    loads the User row into the current session once and delegates to it,
+    so routes that update the user (e.g. complete_task) work unchanged.
+    """
+
+    __slots__ = ("_fields", "_user")
+
+    def __init__(self, fields):
+        object.__setattr__(self, "_fields", fields)
+        object.__setattr__(self, "_user", None)
+
+    def __getattr__(self, name):
+        fields = object.__getattribute__(self, "_fields")
+        if name in fields:
+            return fields[name]
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+        if name in self._fields:
+            self._fields[name] = value
+
+    def _load(self):
+        if self._user is None:
+            user = db.session.get(User, self._fields["id"])
+            if user is None:
+                raise AttributeError(f"User {self._fields['id']} no longer exists")
+            object.__setattr__(self, "_user", user)
+        return self._user
+
+    def __repr__(self):
+        return f"<Principal {self._fields['id']} {self._fields['role']}>"
+
+
+class PrincipalCache:
+    """
+    Process-local TTL cache of the identity columns of authenticated users,
+    keyed by (user id, token iat), so token_required and check_role do not
+    query the user table on every request. Entries are dropped when the
+    ORM updates one of those columns or deletes the user (see the mapper
+    events below); other processes see the change within the TTL.
+    """
+
+    def __init__(self, maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.RLock()
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, user_id, issued_at=None):
+        """Returns a Principal for user_id, or None if the user does not exist."""
+        key = (int(user_id), issued_at)
+        with self._lock:
+            fields = self._cache.get(key)
+            if fields is not None:
+                self._hits += 1
+                return Principal(dict(fields))
+            self._misses += 1
+            generation = self._generation
+
+        row = db.session.query(*(getattr(User, f) for f in PRINCIPAL_FIELDS))\
+            .filter(User.id == key[0]).first()
+        if row is None:
+            return None
+        fields = dict(zip(PRINCIPAL_FIELDS, row))
+
+        with self._lock:
+            # An invalidation while we were reading may mean the row is stale
+            if generation == self._generation:
+                self._cache[key] = fields
+        return Principal(dict(fields))
+
+    def from_token(self, data):
+        """Principal for a decoded JWT payload."""
+        return self.get(data["sub"], data.get("iat"))
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._generation += 1
+            for key in [k for k in self._cache.keys() if k[0] == user_id]:
+                self._cache.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._cache.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._cache),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0
+            }
+
+
+principal_cache = PrincipalCache()
+
+
+def _principal_changed(target):
+    state = inspect(target)
+    return any(state.attrs[f].history.has_changes() for f in PRINCIPAL_FIELDS)
+
+
+def _invalidate(session, user_id):
+    # Once now, and again after commit in case a concurrent request cached
+    # the old row between this flush and the commit
+    principal_cache.invalidate(user_id)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(user_id)
+
+
+@event.listens_for(User, "after_update")
+def _user_updated(mapper, connection, target):
+    if _principal_changed(target):
+        _invalidate(inspect(target).session, target.id)
+
+
+@event.listens_for(User, "after_delete")
+def _user_deleted(mapper, connection, target):
+    _invalidate(inspect(target).session, target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _session_committed(session):
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        principal_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _session_rolled_back(session):
+    session.info.pop(_PENDING_KEY, None)
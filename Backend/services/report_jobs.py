@@ -0,0 +1,286 @@
+import os
+import re
+import json
+import queue
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows development: a single process anyway
+    fcntl = None
+
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+REPORT_FORMATS = {
+    "pdf": {"extension": "pdf", "mimetype": "application/pdf"},
+    "csv": {"extension": "csv", "mimetype": "text/csv"},
+    "xlsx": {"extension": "xlsx", "mimetype": XLSX_MIMETYPE}
+}
+
+# Rendered artifacts and their JSON sidecars; share it between workers
+REPORT_JOB_DIR = os.environ.get(
+    "REPORT_JOB_DIR",
+    os.path.join(tempfile.gettempdir(), "onboardai-reports")
+)
+# A finished report this recent is handed out again instead of re-rendered
+REPORT_CACHE_SECONDS = int(os.environ.get("REPORT_CACHE_SECONDS", "300"))
+# Running jobs not updated for this long are treated as abandoned (worker died)
+REPORT_JOB_TIMEOUT_SECONDS = int(os.environ.get("REPORT_JOB_TIMEOUT_SECONDS", "900"))
+# Queued jobs nobody picked up within this are replaced by a new request
+REPORT_QUEUED_TIMEOUT_SECONDS = int(os.environ.get("REPORT_QUEUED_TIMEOUT_SECONDS", "60"))
+# How often a job thread looks for jobs queued by other workers
+REPORT_POLL_SECONDS = float(os.environ.get("REPORT_POLL_SECONDS", "5"))
+# Artifacts and sidecars older than this are deleted
+REPORT_RETENTION_SECONDS = int(os.environ.get("REPORT_RETENTION_SECONDS", "86400"))
+
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class ReportJobManager:
+    """
+    Renders reports in a background thread. Each job is a JSON sidecar in
+    REPORT_JOB_DIR ("<id>.json") next to its artifact ("<id>.<ext>"), and
+    "latest-<format>.json" points at the newest job per format, so any
+    worker sharing the directory can answer status requests and reuse a
+    fresh artifact. Each worker's thread also runs queued jobs other
+    workers left behind; "latest-<format>.lock" serializes submitting and
+    claiming jobs across processes.
+    """
+
+    def __init__(self, job_dir=REPORT_JOB_DIR):
+        self._job_dir = job_dir
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        # Stands in for the file lock where fcntl is unavailable
+        self._format_thread_lock = threading.Lock()
+        self._thread = None
+        self._app = None
+
+    def init_app(self, app):
+        self._app = app
+        os.makedirs(self._job_dir, exist_ok=True)
+
+    def start(self):
+        with self._lock:
+            if self._app is None or (self._thread and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(target=self._run, name="report-jobs", daemon=True)
+            self._thread.start()
+
+    def submit(self, report_format, requested_by=None):
+        """
+        Returns (job, reused): the newest job for report_format if it is
+        still rendering or finished within REPORT_CACHE_SECONDS, otherwise
+        a newly queued one.
+        """
+        if report_format not in REPORT_FORMATS:
+            raise ValueError(f"Unknown report format: {report_format}")
+
+        with self._format_lock(report_format):
+            latest = self._read_json(self._latest_path(report_format))
+            job = self.get(latest.get("job_id")) if latest else None
+            if job and self._reusable(job):
+                return job, True
+
+            now = time.time()
+            job = {
+                "id": uuid.uuid4().hex,
+                "format": report_format,
+                "status": "queued",
+                "error": None,
+                "requested_by": requested_by,
+                "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "finished_at": None,
+                "created_ts": now,
+                "updated_ts": now,
+                "finished_ts": None
+            }
+            self._save(job)
+            self._write_json(self._latest_path(report_format), {"job_id": job["id"]})
+
+        self._queue.put(job["id"])
+        self.start()
+        return job, False
+
+    def get(self, job_id):
+        if not job_id or not JOB_ID_PATTERN.match(job_id):
+            return None
+        job = self._read_json(os.path.join(self._job_dir, f"{job_id}.json"))
+        if job and job["status"] == "queued":
+            # Its worker may be gone; make sure this one picks it up
+            self.start()
+        return job
+
+    def artifact_path(self, job):
+        return os.path.join(self._job_dir, f"{job['id']}.{REPORT_FORMATS[job['format']]['extension']}")
+
+    def _reusable(self, job):
+        now = time.time()
+        if job["status"] == "queued":
+            return now - (job.get("updated_ts") or 0) < REPORT_QUEUED_TIMEOUT_SECONDS
+        if job["status"] == "running":
+            return now - (job.get("updated_ts") or 0) < REPORT_JOB_TIMEOUT_SECONDS
+        if job["status"] == "done":
+            return (
+                now - (job.get("finished_ts") or 0) < REPORT_CACHE_SECONDS
+                and os.path.exists(self.artifact_path(job))
+            )
+        return False
+
+    def _latest_path(self, report_format):
+        return os.path.join(self._job_dir, f"latest-{report_format}.json")
+
+    @contextmanager
+    def _format_lock(self, report_format):
+        """
+        Exclusive lock shared by every process using the job directory. A
+        separate file, since latest-<format>.json is replaced on each write.
+        """
+        os.makedirs(self._job_dir, exist_ok=True)
+        with open(os.path.join(self._job_dir, f"latest-{report_format}.lock"), "a") as f:
+            if fcntl is None:
+                with self._format_thread_lock:
+                    yield
+                return
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _save(self, job):
+        job["updated_ts"] = time.time()
+        self._write_json(os.path.join(self._job_dir, f"{job['id']}.json"), job)
+
+    def _write_json(self, path, data):
+        """Atomic write so readers in other workers never see a partial file."""
+        os.makedirs(self._job_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self._job_dir, prefix=".tmp-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    @staticmethod
+    def _read_json(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _run(self):
+        while True:
+            # Woken by this worker's submits; polls for other workers' jobs
+            try:
+                self._queue.get(timeout=REPORT_POLL_SECONDS)
+            except queue.Empty:
+                pass
+            try:
+                for job_id in self._queued_job_ids():
+                    job = self._claim(job_id)
+                    if job:
+                        self._process(job)
+            except Exception as e:
+                print(f"[ReportJobs] Job scan failed: {e}")
+            try:
+                self._purge()
+            except Exception as e:
+                print(f"[ReportJobs] Purge failed: {e}")
+
+    def _queued_job_ids(self):
+        """Ids of every queued job in the directory, oldest first."""
+        jobs = []
+        for name in os.listdir(self._job_dir):
+            job_id, ext = os.path.splitext(name)
+            if ext != ".json" or not JOB_ID_PATTERN.match(job_id):
+                continue
+            job = self._read_json(os.path.join(self._job_dir, name))
+            if job and job["status"] == "queued":
+                jobs.append((job.get("created_ts") or 0, job_id))
+        return [job_id for _, job_id in sorted(jobs)]
+
+    def _claim(self, job_id):
+        """
+        Marks a queued job running under the format lock, so exactly one
+        worker renders it. Returns the job, or None if it was taken or a
+        newer job for the format replaced it.
+        """
+        job = self._read_json(os.path.join(self._job_dir, f"{job_id}.json"))
+        if not job or job["status"] != "queued":
+            return None
+        with self._format_lock(job["format"]):
+            job = self._read_json(os.path.join(self._job_dir, f"{job_id}.json"))
+            if not job or job["status"] != "queued":
+                return None
+            latest = self._read_json(self._latest_path(job["format"])) or {}
+            if latest.get("job_id") != job_id:
+                job["status"] = "failed"
+                job["error"] = "Superseded by a newer job"
+                job["finished_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                job["finished_ts"] = time.time()
+                self._save(job)
+                return None
+            job["status"] = "running"
+            self._save(job)
+            return job
+
+    def _process(self, job):
+        from config.db import db
+
+        path = self.artifact_path(job)
+        tmp_path = path + ".part"
+        with self._app.app_context():
+            try:
+                self._render(job["format"], tmp_path)
+                os.replace(tmp_path, path)
+                job["status"] = "done"
+            except Exception as e:
+                print(f"[ReportJobs] {job['format']} report {job['id']} failed: {e}")
+                db.session.rollback()
+                job["status"] = "failed"
+                job["error"] = str(e)
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+        job["finished_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        job["finished_ts"] = time.time()
+        self._save(job)
+
+    @staticmethod
+    def _render(report_format, path):
+        from services import report_renderer
+
+        if report_format == "pdf":
+            with open(path, "wb") as f:
+                report_renderer.render_pdf(f)
+        elif report_format == "csv":
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                for block in report_renderer.iter_csv():
+                    f.write(block)
+        else:
+            report_renderer.write_excel(path)
+
+    def _purge(self):
+        """Deletes artifacts and sidecars older than REPORT_RETENTION_SECONDS."""
+        cutoff = time.time() - REPORT_RETENTION_SECONDS
+        for name in os.listdir(self._job_dir):
+            if name.startswith("latest-"):
+                continue
+            path = os.path.join(self._job_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+report_jobs = ReportJobManager()
@@ -0,0 +1,280 @@
+"""
+Renders the downloadable risk reports. Used directly by the download
+routes and by the background report jobs (services/report_jobs.py).
+"""
+import io
+import os
+import csv
+from datetime import datetime
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib import colors
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.lib.styles import getSampleStyleSheet
+
+import xlsxwriter
+
+from services.alert_service import AlertService
+
+# Employees evaluated per page of a CSV/Excel export
+CHUNK_SIZE = int(os.getenv("REPORT_CSV_CHUNK_SIZE", "500"))
+
+CSV_HEADERS = [
+    "employee_id",
+    "name",
+    "email",
+    "department",
+    "role",
+    "risk_status",
+    "risk_reasons"
+]
+
+
+def render_pdf(stream):
+    """Writes the PDF risk report to a binary stream."""
+    doc = SimpleDocTemplate(stream, pagesize=letter, rightMargin=40, leftMargin=40, topMargin=40, bottomMargin=40)
+
+    elements = []
+    styles = getSampleStyleSheet()
+
+    title_style = styles["Heading1"]
+    title_style.alignment = 1 # Center
+    subtitle_style = styles["Heading2"]
+    subtitle_style.textColor = colors.HexColor("#2C3E50")
+    subtitle_style.spaceAfter = 10
+    normal_style = styles["Normal"]
+
+    title = Paragraph("Onboarding Risk Analysis Report", title_style)
+    elements.append(title)
+    elements.append(Spacer(1, 12))
+
+    elements.append(
+        Paragraph(
+            f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            styles["Normal"]
+        )
+    )
+
+    elements.append(Spacer(1, 20))
+
+    # Both sections come from one risk snapshot
+    snapshot = AlertService.get_snapshot()
+    stats = snapshot.dashboard_stats
+    user_risks = snapshot.user_risks or {}
+
+    # 1. Summary Metrics
+    elements.append(Paragraph("1. Summary Metrics", subtitle_style))
+    overview_data = [
+        ["Metric", "Value"],
+        ["Total Employees", str(stats.get("total_employees", 0))],
+        ["Avg Completion %", f"{stats.get('avg_completion',0)}%"],
+        ["Time to Onboard Target", "14 Days"]
+    ]
+
+    summary_table = Table(overview_data, colWidths=[200, 100])
+    summary_table.setStyle(TableStyle([
+        ("BACKGROUND", (0,0), (-1,0), colors.HexColor("#34495E")),
+        ("TEXTCOLOR", (0,0), (-1,0), colors.whitesmoke),
+        ("ALIGN", (0,0), (-1,-1), "LEFT"),
+        ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
+        ("BOTTOMPADDING", (0,0), (-1,0), 8),
+        ("BACKGROUND", (0,1), (-1,-1), colors.HexColor("#ECF0F1")),
+        ("GRID", (0,0), (-1,-1), 1, colors.white)
+    ]))
+    elements.append(summary_table)
+    elements.append(Spacer(1, 20))
+
+    # 2. Employee Status Breakdown
+    elements.append(Paragraph("2. Employee Status Breakdown", subtitle_style))
+    status_data = [
+        ["Status", "Count"],
+        ["On Track", str(stats.get("on_track", 0))],
+        ["At Risk", str(stats.get("at_risk", 0))],
+        ["Delayed", str(stats.get("delayed", 0))]
+    ]
+
+    status_table = Table(status_data, colWidths=[200, 100])
+    status_table.setStyle(TableStyle([
+        ("BACKGROUND", (0,0), (-1,0), colors.HexColor("#34495E")),
+        ("TEXTCOLOR", (0,0), (-1,0), colors.whitesmoke),
+        ("ALIGN", (0,0), (-1,-1), "LEFT"),
+        ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
+        ("BOTTOMPADDING", (0,0), (-1,0), 8),
+        ("BACKGROUND", (0,1), (-1,-1), colors.HexColor("#ECF0F1")),
+        ("GRID", (0,0), (-1,-1), 1, colors.white)
+    ]))
+    elements.append(status_table)
+    elements.append(Spacer(1, 25))
+
+    # Group users by status
+    delayed_users = []
+    at_risk_users = []
+    on_track_users = []
+
+    for data in user_risks.values():
+        status = data.get("status")
+        user = data.get("user")
+        reasons_text = "; ".join(data.get("reasons", []))
+        reasons_para = Paragraph(reasons_text, normal_style) if reasons_text else "N/A"
+        row = [getattr(user, "name", ""), getattr(user, "department", "N/A"), reasons_para]
+
+        if status == "Delayed":
+            delayed_users.append(row)
+        elif status == "At Risk":
+            at_risk_users.append(row)
+        else:
+            on_track_users.append([getattr(user, "name", ""), getattr(user, "department", "N/A"), "N/A"])
+
+    # 3. High Risk Employees (Delayed)
+    elements.append(Paragraph("3. High Risk Employees (Delayed)", subtitle_style))
+    if delayed_users:
+        delayed_data = [["Employee Name", "Department", "Risk Reasons"]] + delayed_users
+        delayed_table = Table(delayed_data, colWidths=[150, 120, 250])
+        delayed_table.setStyle(TableStyle([
+            ("BACKGROUND", (0,0), (-1,0), colors.HexColor("#E74C3C")),
+            ("TEXTCOLOR", (0,0), (-1,0), colors.whitesmoke),
+            ("ALIGN", (0,0), (-1,-1), "LEFT"),
+            ("VALIGN", (0,0), (-1,-1), "TOP"),
+            ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
+            ("BOTTOMPADDING", (0,0), (-1,0), 8),
+            ("GRID", (0,0), (-1,-1), 1, colors.HexColor("#BDC3C7"))
+        ]))
+        elements.append(delayed_table)
+    else:
+        elements.append(Paragraph("No employees in 'Delayed' status.", normal_style))
+    elements.append(Spacer(1, 25))
+
+    # 4. At Risk Employees
+    elements.append(Paragraph("4. At Risk Employees", subtitle_style))
+    if at_risk_users:
+        at_risk_data = [["Employee Name", "Department", "Risk Reasons"]] + at_risk_users
+        at_risk_table = Table(at_risk_data, colWidths=[150, 120, 250])
+        at_risk_table.setStyle(TableStyle([
+            ("BACKGROUND", (0,0), (-1,0), colors.HexColor("#F39C12")),
+            ("TEXTCOLOR", (0,0), (-1,0), colors.whitesmoke),
+            ("ALIGN", (0,0), (-1,-1), "LEFT"),
+            ("VALIGN", (0,0), (-1,-1), "TOP"),
+            ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
+            ("BOTTOMPADDING", (0,0), (-1,0), 8),
+            ("GRID", (0,0), (-1,-1), 1, colors.HexColor("#BDC3C7"))
+        ]))
+        elements.append(at_risk_table)
+    else:
+        elements.append(Paragraph("No employees in 'At Risk' status.", normal_style))
+    elements.append(Spacer(1, 25))
+
+    # 5. On Track Employees
+    elements.append(Paragraph("5. On Track Employees", subtitle_style))
+    if on_track_users:
+        on_track_data = [["Employee Name", "Department", "Status"]] + on_track_users
+        on_track_table = Table(on_track_data, colWidths=[150, 120, 250])
+        on_track_table.setStyle(TableStyle([
+            ("BACKGROUND", (0,0), (-1,0), colors.HexColor("#27AE60")),
+            ("TEXTCOLOR", (0,0), (-1,0), colors.whitesmoke),
+            ("ALIGN", (0,0), (-1,-1), "LEFT"),
+            ("VALIGN", (0,0), (-1,-1), "TOP"),
+            ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
+            ("BOTTOMPADDING", (0,0), (-1,0), 8),
+            ("GRID", (0,0), (-1,-1), 1, colors.HexColor("#BDC3C7"))
+        ]))
+        elements.append(on_track_table)
+    else:
+        elements.append(Paragraph("No employees in 'On Track' status.", normal_style))
+
+    doc.build(elements)
+
+
+def iter_csv(chunk_size=CHUNK_SIZE):
+    """
+    Yields the CSV risk report as text blocks: the header first, then one
+    block per id-ordered page of evaluated employees.
+    """
+    output = io.StringIO()
+    writer = csv.writer(output)
+
+    def flush():
+        data = output.getvalue()
+        output.seek(0)
+        output.truncate(0)
+        return data
+
+    writer.writerow(CSV_HEADERS)
+    yield flush()
+
+    for chunk in AlertService.iter_user_risks(chunk_size):
+        for data in chunk.values():
+            user = data.get("user")
+
+            writer.writerow([
+                getattr(user, "id", ""),
+                getattr(user, "name", ""),
+                getattr(user, "email", ""),
+                getattr(user, "department", ""),
+                getattr(user, "role", ""),
+                data.get("status"),
+                "; ".join(data.get("reasons", []))
+            ])
+        yield flush()
+
+
+def write_excel(path, chunk_size=CHUNK_SIZE):
+    """
+    Writes the Excel report to path with xlsxwriter in constant_memory mode:
+    rows are flushed to disk as they are written, so memory stays flat with
+    headcount. Employees are read page by page (AlertService.iter_user_risks)
+    and the Summary sheet is totalled from the same pass.
+    """
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+    try:
+        header_format = workbook.add_format({"bold": True, "bg_color": "#CCCCCC"})
+        summary_ws = workbook.add_worksheet("Summary")
+        ws = workbook.add_worksheet("Employees")
+
+        ws.write_row(0, 0, CSV_HEADERS, header_format)
+
+        totals = {"On Track": 0, "At Risk": 0, "Delayed": 0}
+        dept_counts = {}
+        completion_sum = 0
+        row_index = 1
+
+        for chunk in AlertService.iter_user_risks(chunk_size):
+            for data in chunk.values():
+                user = data.get("user")
+                status = data.get("status")
+
+                ws.write_row(row_index, 0, [
+                    getattr(user, "id", ""),
+                    getattr(user, "name", ""),
+                    getattr(user, "email", ""),
+                    getattr(user, "department", ""),
+                    getattr(user, "role", ""),
+                    status,
+                    "; ".join(data.get("reasons", []))
+                ])
+                row_index += 1
+
+                totals[status if status in totals else "On Track"] += 1
+                dept = getattr(user, "department", None) or "Unassigned"
+                dept_counts[dept] = dept_counts.get(dept, 0) + 1
+                # Employees without progress rows count as 0, as on the dashboard
+                completion_sum += data.get("avg_completion") or 0
+
+        total_employees = row_index - 1
+        summary_ws.write_row(0, 0, ["Metric", "Value"], header_format)
+        summary_rows = [
+            ["Generated", datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
+            ["Total Employees", total_employees],
+            ["On Track", totals["On Track"]],
+            ["At Risk", totals["At Risk"]],
+            ["Delayed", totals["Delayed"]],
+            ["Avg Completion %", round(completion_sum / total_employees, 1) if total_employees else 0]
+        ]
+        for i, row in enumerate(summary_rows, start=1):
+            summary_ws.write_row(i, 0, row)
+
+        dept_row = len(summary_rows) + 2
+        summary_ws.write_row(dept_row, 0, ["Department", "Employees"], header_format)
+        for i, (dept, count) in enumerate(sorted(dept_counts.items()), start=dept_row + 1):
+            summary_ws.write_row(i, 0, [dept, count])
+    finally:
+        workbook.close()
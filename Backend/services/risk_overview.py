@@ -0,0 +1,131 @@
+from services.feature_store import FeatureStore
+
+
+def build_employee_risk_rows(users, user_risks_map):
+    """
+    Builds the /api/risks rows for the given users, plus the AI context for
+    every employee still below 100% completion.
+    Shared by the route and the background insight worker so both produce
+    identical contexts.
+    Returns: (results, ai_contexts)
+    """
+    from services.predictor import analyze_employee_risk_batch
+
+    from datetime import datetime
+    from sqlalchemy import func
+    from config.db import db
+    from models.task import Task
+
+    # First pass gathers predictor inputs so the model runs once for everyone
+    user_ids = [user.id for user in users]
+    features_by_user = FeatureStore.get_features(user_ids)
+    # Pending tasks already past their due date, counted in one grouped query
+    overdue_by_user = dict(
+        db.session.query(Task.assigned_to, func.count(Task.id))
+        .filter(
+            Task.assigned_to.in_(user_ids),
+            Task.status != 'Completed',
+            Task.due_date < datetime.now()
+        )
+        .group_by(Task.assigned_to).all()
+    ) if user_ids else {}
+    collected = []
+    for user in users:
+        try:
+            features = features_by_user.get(user.id) or FeatureStore.empty_features(user.id)
+            missed_deadlines = 0
+
+            if features["progress_count"]:
+                # Calculate missed deadlines (both confirmed delays AND currently overdue pending tasks)
+                # 1. Count already completed but delayed tasks
+                missed_deadlines += features["missed_deadlines"]
+                
+                # 2. Count pending tasks that are overdue
+                missed_deadlines += overdue_by_user.get(user.id, 0)
+
+            # Prepare data for predictor
+            employee_data = dict(FeatureStore.model_input(features), missed_deadlines=missed_deadlines)
+            collected.append((user, features, employee_data))
+        except Exception as e:
+            print(f"Error processing user {user.id}: {e}")
+            collected.append((user, None, None))
+
+    analyses = iter(analyze_employee_risk_batch(
+        [employee_data for _, _, employee_data in collected if employee_data is not None]
+    ))
+
+    results = []
+    ai_contexts = []
+
+    for user, features, employee_data in collected:
+        if employee_data is None:
+            results.append(_unavailable_row(user))
+            continue
+
+        try:
+            # Get AI analysis
+            analysis = next(analyses)
+            total_completion = employee_data["completion"]
+            
+            # OVERRIDE with AlertService logic
+            alert_data = user_risks_map.get(user.id)
+            final_risk_level = analysis["risk_level"]
+            final_risk_message = analysis["message"]
+
+            if alert_data:
+                alert_status = alert_data['status']
+                if alert_status == 'Delayed':
+                    final_risk_level = 'Critical'
+                    final_risk_message = alert_data['reasons'][0] if alert_data['reasons'] else "Critical Alerts Detected"
+                elif alert_status == 'At Risk':
+                    final_risk_level = 'Warning'
+                    final_risk_message = alert_data['reasons'][0] if alert_data['reasons'] else "Warning Alerts Detected"
+
+            result_item = {
+                "user_id": user.id,
+                "name": user.name,
+                "role": user.role,
+                "department": user.department,
+                "risk": final_risk_level, 
+                "risk_message": final_risk_message,
+                "reasons": alert_data.get('reasons', []) if alert_data else [],
+                "score": round(total_completion, 1),
+                "prediction": analysis["prediction"],
+                "recommended_actions": analysis["recommended_actions"]
+            }
+            
+            # We need ai_insight for insights tab. 
+            # RULE: AI Insights should be generated ONLY for employees whose progress is less than 100%.
+            if total_completion < 100:
+                ai_contexts.append({
+                    "user_id": user.id,
+                    "name": user.name,
+                    "department": user.department,
+                    "completion_percentage": round(total_completion, 1),
+                    "tasks_assigned": features["progress_count"],
+                    "alert_status": alert_data.get('status', 'Healthy') if alert_data else 'Healthy',
+                    "missed_deadlines": "Yes" if final_risk_level == 'Critical' else "No",
+                    "risk_reasons": alert_data.get('reasons', []) if alert_data else []
+                })
+            
+            results.append(result_item)
+        except Exception as e:
+            print(f"Error processing user {user.id}: {e}")
+            # Add a fallback/error entry so the loop continues
+            results.append(_unavailable_row(user))
+
+    return results, ai_contexts
+
+
+def _unavailable_row(user):
+    return {
+        "user_id": user.id,
+        "name": user.name,
+        "role": user.role,
+        "department": user.department,
+        "risk": "Neutral",
+        "risk_message": "Data unavailable",
+        "score": 0,
+        "prediction": "Unavailable",
+        "recommended_actions": []
+    }
@@ -0,0 +1,279 @@
+from models.user import User
+from models.employee_risk_state import EmployeeRiskState
+from config.db import db
+from services.feature_store import FeatureStore
+from sqlalchemy import func
+from datetime import datetime, timedelta
+import json
+import threading
+import time
+
+# Matches the Rule 2 inactivity window in AlertService._evaluate_alerts
+INACTIVITY_WINDOW = timedelta(hours=24)
+
+
+class RiskStateService:
+    """
+    Maintains the materialized employee_risk_state table.
+    Writes that change risk inputs call refresh(); time-based transitions
+    (a deadline passing, 24h of inactivity) are picked up by sweep().
+    """
+
+    @staticmethod
+    def refresh(user_ids):
+        """
+        Recomputes the state rows for the given users (employees only).
+        Adds them to the session; the caller commits. Every write that
+        changes risk inputs calls this, so it also drops the request's
+        risk snapshot: later reads in the same request see the change.
+        Returns: dict { user_id: EmployeeRiskState }
+        """
+        from services.alert_service import AlertService
+
+        user_ids = [uid for uid in set(user_ids) if uid]
+        if not user_ids:
+            return {}
+        AlertService.invalidate_snapshot()
+
+        # Savepoint so a failed refresh never aborts the caller's write
+        try:
+            with db.session.begin_nested():
+                users = User.query.filter(
+                    User.id.in_(user_ids),
+                    func.lower(User.role) == "employee"
+                ).all()
+                states, _ = RiskStateService._refresh_users(users)
+                return states
+        except Exception as e:
+            print(f"[RiskState] Refresh failed for users {user_ids}: {e}")
+            return {}
+
+    @staticmethod
+    def _refresh_users(users):
+        """Returns (states by user_id, ids of users whose status changed)."""
+        if not users:
+            return {}, []
+
+        evaluated = RiskStateService._evaluate_users(users)
+        existing = {
+            s.user_id: s
+            for s in EmployeeRiskState.query.filter(EmployeeRiskState.user_id.in_(list(evaluated))).all()
+        }
+
+        states = {}
+        changed = []
+        for user_id, values in evaluated.items():
+            state = existing.get(user_id)
+            if not state:
+                state = EmployeeRiskState(user_id=user_id)
+                db.session.add(state)
+            elif state.status != values["status"]:
+                changed.append(user_id)
+
+            for column, value in values.items():
+                setattr(state, column, json.dumps(value) if column == "reasons" else value)
+            state.updated_at = datetime.utcnow()
+            states[user_id] = state
+
+        return states, changed
+
+    @staticmethod
+    def _evaluate_users(users):
+        """
+        Evaluates the state columns live, without writing anything.
+        Returns: dict { user_id: { column: value } } with reasons as a list
+        """
+        from services.alert_service import AlertService
+
+        if not users:
+            return {}
+
+        tasks_by_user, progress_by_user, last_logins = AlertService._load_alert_inputs([u.id for u in users])
+
+        now = datetime.now()
+        evaluated = {}
+        for user in users:
+            tasks = tasks_by_user[user.id]
+            progress = progress_by_user[user.id]
+            last_login = last_logins.get(user.id)
+            alerts = AlertService._evaluate_alerts(user, tasks, progress, last_login, now)
+            overdue_count, next_transition_at = RiskStateService._time_signals(
+                user, tasks, progress, last_login, now
+            )
+            evaluated[user.id] = {
+                "status": alerts["status"],
+                "reasons": alerts["reasons"],
+                "low_engagement": alerts["lowEngagement"],
+                "missed_deadline": alerts["missedDeadline"],
+                "avg_completion": (
+                    sum(p.completion or 0 for p in progress) / len(progress) if progress else None
+                ),
+                "last_login_at": last_login,
+                "overdue_count": overdue_count,
+                "next_transition_at": next_transition_at
+            }
+        return evaluated
+
+    @staticmethod
+    def _time_signals(user, tasks, progress, last_login, now):
+        """
+        Returns (overdue_count, next_transition_at): how many incomplete tasks
+        are past due, and the earliest future moment the status may change
+        on its own.
+        """
+        progress_by_task = {}
+        for p in progress:
+            progress_by_task.setdefault(p.task_id, p)
+
+        overdue_count = 0
+        candidates = []
+        for t in tasks:
+            task_prog = progress_by_task.get(t.id)
+            prog_val = task_prog.completion if task_prog else 0
+            if not t.due_date or (t.status or "").lower() == 'completed' or (prog_val or 0) >= 100:
+                continue
+            if t.due_date < now:
+                overdue_count += 1
+            else:
+                candidates.append(t.due_date)
+
+        reference_time = last_login or user.joined_date or now
+        if reference_time + INACTIVITY_WINDOW > now:
+            candidates.append(reference_time + INACTIVITY_WINDOW)
+
+        return overdue_count, (min(candidates) if candidates else None)
+
+    @staticmethod
+    def load_user_risks(user_ids=None):
+        """
+        Reads the employee risk map from employee_risk_state, for every
+        employee or only those in user_ids; rows that are missing or past
+        their next_transition_at are evaluated live.
+        Returns the same shape as AlertService.get_user_risks(), or None if
+        the table is unavailable.
+        """
+        try:
+            query = db.session.query(User, EmployeeRiskState)\
+                .outerjoin(EmployeeRiskState, EmployeeRiskState.user_id == User.id)\
+                .filter(func.lower(User.role) == "employee")
+            if user_ids is not None:
+                query = query.filter(User.id.in_(user_ids))
+            rows = query.all()
+            return RiskStateService._risks_from_rows(rows)
+        except Exception as e:
+            print(f"[RiskState] Falling back to live risk evaluation: {e}")
+            db.session.rollback()
+            return None
+
+    @staticmethod
+    def load_user_risks_page(after_id=0, limit=500):
+        """
+        Keyset-paginated load_user_risks(): the first `limit` employees with
+        an id greater than after_id, in id order. Raises if the table is
+        unavailable.
+        Returns: dict { user_id: risk data } (insertion ordered by id)
+        """
+        rows = db.session.query(User, EmployeeRiskState)\
+            .outerjoin(EmployeeRiskState, EmployeeRiskState.user_id == User.id)\
+            .filter(func.lower(User.role) == "employee", User.id > after_id)\
+            .order_by(User.id).limit(limit).all()
+        return RiskStateService._risks_from_rows(rows)
+
+    @staticmethod
+    def _risks_from_rows(rows):
+        """
+        Builds the risk map from (user, state) rows. Users whose row is
+        missing or past its next_transition_at are evaluated live for this
+        response only; persisting them is left to sweep() and the write
+        hooks, so a read never writes or commits.
+        """
+        now = datetime.now()
+        stale_users = [
+            user for user, state in rows
+            if state is None or (state.next_transition_at and state.next_transition_at <= now)
+        ]
+        live = RiskStateService._evaluate_users(stale_users)
+
+        user_risks = {}
+        for user, state in rows:
+            values = live.get(user.id)
+            if values is None:
+                values = {
+                    "status": state.status,
+                    "reasons": state.get_reasons(),
+                    "low_engagement": state.low_engagement,
+                    "missed_deadline": state.missed_deadline,
+                    "avg_completion": state.avg_completion,
+                    "overdue_count": state.overdue_count,
+                    "last_login_at": state.last_login_at
+                }
+            user_risks[user.id] = {
+                "user": user,
+                "status": values["status"],
+                "reasons": values["reasons"],
+                "alert_count": len(values["reasons"]),
+                "lowEngagement": bool(values["low_engagement"]),
+                "missedDeadline": bool(values["missed_deadline"]),
+                "avg_completion": values["avg_completion"],
+                "overdue_count": values["overdue_count"] or 0,
+                "last_login_at": values["last_login_at"]
+            }
+        return user_risks
+
+    @staticmethod
+    def sweep():
+        """
+        Recomputes every employee whose state is missing or whose
+        next_transition_at has passed. Returns the number of rows refreshed.
+        """
+        now = datetime.now()
+        users = User.query\
+            .outerjoin(EmployeeRiskState, EmployeeRiskState.user_id == User.id)\
+            .filter(
+                func.lower(User.role) == "employee",
+                (EmployeeRiskState.user_id.is_(None)) | (EmployeeRiskState.next_transition_at <= now)
+            ).all()
+
+        _, changed = RiskStateService._refresh_users(users)
+        db.session.commit()
+        RiskStateService._on_status_change(changed)
+        return len(users)
+
+    @staticmethod
+    def _on_status_change(user_ids):
+        """Time-based status transitions invalidate the employee's AI insight."""
+        if user_ids:
+            from services.insight_worker import enqueue_insight_refresh
+            enqueue_insight_refresh(user_ids)
+
+
+def start_risk_state_sweeper(app, interval_seconds):
+    """
+    Runs RiskStateService.sweep() every interval_seconds in a daemon thread,
+    and creates the employee_features rows that read paths only aggregate.
+    """
+    if interval_seconds <= 0:
+        return None
+
+    def run():
+        while True:
+            time.sleep(interval_seconds)
+            with app.app_context():
+                try:
+                    count = RiskStateService.sweep()
+                    if count:
+                        print(f"[RiskState] Sweeper refreshed {count} employee(s)")
+                except Exception as e:
+                    print(f"[RiskState] Sweep failed: {e}")
+                    db.session.rollback()
+                try:
+                    count = FeatureStore.backfill(missing_only=True)
+                    if count:
+                        print(f"[RiskState] Sweeper created features for {count} employee(s)")
+                except Exception as e:
+                    print(f"[RiskState] Feature backfill failed: {e}")
+                    db.session.rollback()
+
+    thread = threading.Thread(target=run, name="risk-state-sweeper", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,149 @@
+from models.risk_trend_point import RiskTrendPoint
+from config.db import db
+from datetime import datetime, timedelta
+import threading
+import time
+
+GRANULARITIES = {
+    "daily": timedelta(days=1),
+    "hourly": timedelta(hours=1)
+}
+
+
+class RiskTrendService:
+    """
+    Maintains the risk_trend_point time series. snapshot() records the
+    current status counts per department and for all employees; the trend
+    endpoints read the last N points with one range query instead of
+    re-evaluating every employee.
+    """
+
+    # Standardized score per status, averaged into risk_score
+    STATUS_SCORES = {"On Track": 10, "At Risk": 50, "Delayed": 90}
+
+    @staticmethod
+    def bucket_start(moment, granularity="daily"):
+        if granularity == "hourly":
+            return moment.replace(minute=0, second=0, microsecond=0)
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    @staticmethod
+    def snapshot(granularity="daily", now=None):
+        """
+        Writes the points for the bucket containing now, replacing any
+        earlier snapshot of the same bucket. Commits.
+        Returns: the global RiskTrendPoint
+        """
+        from services.alert_service import AlertService
+
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+
+        bucket_at = RiskTrendService.bucket_start(now or datetime.now(), granularity)
+        user_risks = AlertService.get_user_risks() or {}
+
+        counts = {None: RiskTrendService._empty_counts()}
+        for data in user_risks.values():
+            dept = getattr(data.get("user"), "department", None) or "Unassigned"
+            for key in (None, dept):
+                bucket = counts.setdefault(key, RiskTrendService._empty_counts())
+                bucket["total"] += 1
+                bucket["score_sum"] += RiskTrendService.STATUS_SCORES.get(data.get("status"), 10)
+                if data.get("status") == "At Risk":
+                    bucket["at_risk"] += 1
+                elif data.get("status") == "Delayed":
+                    bucket["delayed"] += 1
+                else:
+                    bucket["on_track"] += 1
+
+        RiskTrendPoint.query.filter_by(granularity=granularity, bucket_at=bucket_at)\
+            .delete(synchronize_session=False)
+
+        points = {}
+        for dept, c in counts.items():
+            points[dept] = RiskTrendPoint(
+                granularity=granularity,
+                bucket_at=bucket_at,
+                department=dept,
+                total=c["total"],
+                on_track=c["on_track"],
+                at_risk=c["at_risk"],
+                delayed=c["delayed"],
+                risk_score=int(c["score_sum"] / c["total"]) if c["total"] else 0
+            )
+            db.session.add(points[dept])
+        db.session.commit()
+        return points[None]
+
+    @staticmethod
+    def _empty_counts():
+        return {"total": 0, "on_track": 0, "at_risk": 0, "delayed": 0, "score_sum": 0}
+
+    @staticmethod
+    def get_trend(points=7, granularity="daily", department=None):
+        """
+        Reads the last `points` buckets of a series (all employees when
+        department is None) with a single range query, oldest first.
+        Buckets without a snapshot are skipped rather than invented; only
+        the snapshotter and the snapshot-risk-trend command write points.
+        Returns: list of RiskTrendPoint
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+
+        now = datetime.now()
+        current = RiskTrendService.bucket_start(now, granularity)
+        since = current - GRANULARITIES[granularity] * (points - 1)
+
+        rows = RiskTrendService._range(granularity, department, since)
+
+        # Concurrent snapshots of one bucket may both land; keep the latest
+        by_bucket = {}
+        for row in rows:
+            by_bucket[row.bucket_at] = row
+        return [by_bucket[bucket] for bucket in sorted(by_bucket)]
+
+    @staticmethod
+    def _range(granularity, department, since):
+        department_filter = RiskTrendPoint.department.is_(None) if department is None \
+            else RiskTrendPoint.department == department
+        return RiskTrendPoint.query.filter(
+            RiskTrendPoint.granularity == granularity,
+            department_filter,
+            RiskTrendPoint.bucket_at >= since
+        ).order_by(RiskTrendPoint.bucket_at, RiskTrendPoint.id).all()
+
+    @staticmethod
+    def label(point):
+        """Chart label: weekday for daily points, hour for hourly ones."""
+        if point.granularity == "hourly":
+            return point.bucket_at.strftime("%H:00")
+        return point.bucket_at.strftime("%a")
+
+
+def start_risk_trend_snapshotter(app, interval_seconds, hourly=False):
+    """
+    Runs RiskTrendService.snapshot() on start, so a fresh install shows
+    the current bucket, and then every interval_seconds in a daemon
+    thread. Re-running within a bucket overwrites it, so the latest
+    snapshot of each day (and hour, if enabled) is what is kept.
+    """
+    if interval_seconds <= 0:
+        return None
+
+    granularities = ["daily", "hourly"] if hourly else ["daily"]
+
+    def run():
+        while True:
+            with app.app_context():
+                for granularity in granularities:
+                    try:
+                        RiskTrendService.snapshot(granularity)
+                    except Exception as e:
+                        print(f"[RiskTrend] {granularity} snapshot failed: {e}")
+                        db.session.rollback()
+            time.sleep(interval_seconds)
+
+    thread = threading.Thread(target=run, name="risk-trend-snapshotter", daemon=True)
+    thread.start()
+    return thread
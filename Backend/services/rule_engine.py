@@ -0,0 +1,136 @@
+import os
+import json
+import threading
+import numpy as np
+
+# Declarative thresholds for explain_risk and analyze_employee_risk;
+# edits are picked up on the next evaluation without a restart
+RULES_PATH = os.environ.get(
+    "RISK_RULES_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "risk_rules.json")
+)
+
+OPERATORS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal
+}
+
+_rules_lock = threading.Lock()
+_loaded_rules = {"version": None, "tables": None}
+
+
+def get_rules(path=None):
+    """
+    Returns the rule tables, re-reading the file when its mtime changes.
+    An unreadable edit keeps the previously loaded tables.
+    """
+    path = path or RULES_PATH
+    try:
+        stat = os.stat(path)
+        version = (path, stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        version = None
+
+    with _rules_lock:
+        if version != _loaded_rules["version"] or _loaded_rules["tables"] is None:
+            try:
+                with open(path) as f:
+                    tables = json.load(f)
+                _loaded_rules["tables"] = tables
+                _loaded_rules["version"] = version
+            except (OSError, ValueError) as e:
+                if _loaded_rules["tables"] is None:
+                    raise
+                print(f"[RuleEngine] Could not reload {path}, keeping current rules: {e}")
+        return _loaded_rules["tables"]
+
+
+def _as_arrays(columns):
+    """Converts every column to a float array once; returns (arrays, length)."""
+    arrays = {feature: np.asarray(col, dtype=float) for feature, col in columns.items()}
+    lengths = {len(col) for col in arrays.values()}
+    if len(lengths) > 1:
+        raise ValueError("All feature columns must have the same length")
+    return arrays, (lengths.pop() if lengths else 0)
+
+
+def _matches(columns, condition):
+    return OPERATORS[condition["op"]](columns[condition["feature"]], condition["value"])
+
+
+def explain_columns(columns, rules=None):
+    """
+    Scores every employee against the "explain_risk" table in one pass.
+    Within a group the first matching rule wins and adds its score and reason.
+    columns: dict { feature: 1-D array }, one entry per employee
+    Returns: dict with arrays "risk_score" and "risk_level" and a list "reasons"
+    """
+    table = (rules or get_rules())["explain_risk"]
+    columns, n = _as_arrays(columns)
+
+    risk_score = np.zeros(n, dtype=int)
+    chosen = []
+    for group in table["groups"]:
+        rule_index = np.full(n, -1)
+        for k, rule in enumerate(group["rules"]):
+            hit = (rule_index == -1) & _matches(columns, dict(rule, feature=group["feature"]))
+            rule_index[hit] = k
+            risk_score[hit] += rule["score"]
+        chosen.append(rule_index)
+
+    # Levels are ordered; the one without min_score is the default
+    thresholds = [level for level in table["levels"] if level["min_score"] is not None]
+    default = next(
+        (level["level"] for level in table["levels"] if level["min_score"] is None),
+        thresholds[-1]["level"] if thresholds else None
+    )
+    risk_level = np.select(
+        [risk_score >= level["min_score"] for level in thresholds],
+        [level["level"] for level in thresholds],
+        default=default
+    ) if n else np.array([], dtype=object)
+
+    # One reason column per group (None where nothing matched), then per row
+    reason_columns = [
+        np.array([rule["reason"] for rule in group["rules"]] + [None], dtype=object)[rule_index].tolist()
+        for group, rule_index in zip(table["groups"], chosen)
+    ]
+    healthy = table["healthy_reason"]
+    reasons = [
+        [reason for reason in row if reason is not None] or [healthy]
+        for row in zip(*reason_columns)
+    ] if reason_columns else [[healthy] for _ in range(n)]
+
+    return {"risk_score": risk_score, "risk_level": risk_level, "reasons": reasons}
+
+
+def classify_columns(columns, rules=None):
+    """
+    Assigns every employee the first matching rule of the "employee_risk"
+    table (all conditions of a rule must hold). Employees matching nothing
+    get the last rule, which should be an unconditional default.
+    columns: dict { feature: 1-D array }, one entry per employee
+    Returns: dict with arrays "risk_level" and "message" and a list "recommended_actions"
+    """
+    table = (rules or get_rules())["employee_risk"]["rules"]
+    columns, n = _as_arrays(columns)
+
+    rule_index = np.full(n, -1)
+    for k, rule in enumerate(table):
+        hit = rule_index == -1
+        for condition in rule["when"]:
+            hit &= _matches(columns, condition)
+        rule_index[hit] = k
+    rule_index[rule_index == -1] = len(table) - 1
+
+    levels = np.array([rule["risk_level"] for rule in table], dtype=object)
+    messages = np.array([rule["message"] for rule in table], dtype=object)
+    return {
+        "risk_level": levels[rule_index],
+        "message": messages[rule_index],
+        # Fresh lists so callers can't mutate the rule table
+        "recommended_actions": [list(table[i]["recommended_actions"]) for i in rule_index.tolist()]
+    }
@@ -0,0 +1,101 @@
+from models.user import User
+from models.activity_log import ActivityLog
+from config.db import db
+from sqlalchemy import func, or_, update, bindparam
+from services.activity_log_writer import activity_log_writer
+from datetime import datetime
+
+LOGIN_ACTION = "logged in"
+COMPLETION_ACTION_PREFIX = "completed task:"
+
+
+class UserActivityService:
+    """
+    Maintains User.last_login_at and User.last_activity_at next to the
+    ActivityLog rows they summarize, so risk evaluation reads one column
+    instead of searching the log.
+    """
+
+    @staticmethod
+    def record_login(user, at=None):
+        """
+        Queues the "Logged in" entry on the activity log writer, which
+        stamps last_login_at / last_activity_at and refreshes the user's
+        risk state in the same batched transaction. Nothing is written on
+        the caller's session.
+        """
+        at = at or datetime.utcnow()
+        activity_log_writer.log(user.id, "Logged in", timestamp=at, login=True)
+        return at
+
+    @staticmethod
+    def record_activity(user_id, at=None):
+        """Stamps last_activity_at (e.g. on task completion); the caller commits."""
+        user = db.session.get(User, user_id)
+        if user:
+            UserActivityService._touch(user, at or datetime.utcnow())
+
+    @staticmethod
+    def _touch(user, at):
+        if not user.last_activity_at or user.last_activity_at < at:
+            user.last_activity_at = at
+
+    @staticmethod
+    def stamp(last_logins, last_activity):
+        """
+        Moves last_login_at / last_activity_at forward to the given
+        {user_id: datetime} values, never backwards, with one executemany
+        UPDATE per column. The caller commits.
+        """
+        table = User.__table__
+        for column, stamps in (("last_login_at", last_logins), ("last_activity_at", last_activity)):
+            if not stamps:
+                continue
+            current = table.c[column]
+            db.session.execute(
+                update(table)
+                .where(table.c.id == bindparam("stamp_user_id"))
+                .where(or_(current.is_(None), current < bindparam("stamp_at")))
+                .values({column: bindparam("stamp_at")}),
+                [{"stamp_user_id": user_id, "stamp_at": at} for user_id, at in stamps.items()]
+            )
+
+    @staticmethod
+    def backfill(overwrite=False, chunk_size=1000):
+        """
+        Derives both columns from activity_log history with two grouped
+        queries. Existing values are kept when newer, unless overwrite.
+        Returns the number of users updated.
+        """
+        action = func.lower(ActivityLog.action)
+        last_logins = dict(
+            db.session.query(ActivityLog.user_id, func.max(ActivityLog.timestamp))
+            .filter(action == LOGIN_ACTION)
+            .group_by(ActivityLog.user_id)
+            .all()
+        )
+        last_activity = dict(
+            db.session.query(ActivityLog.user_id, func.max(ActivityLog.timestamp))
+            .filter(or_(action == LOGIN_ACTION, action.like(COMPLETION_ACTION_PREFIX + "%")))
+            .group_by(ActivityLog.user_id)
+            .all()
+        )
+
+        def newest(current, derived):
+            if overwrite or current is None:
+                return derived
+            return max(current, derived) if derived else current
+
+        changes = []
+        for user_id, login_at, activity_at in db.session.query(
+            User.id, User.last_login_at, User.last_activity_at
+        ).all():
+            new_login = newest(login_at, last_logins.get(user_id))
+            new_activity = newest(activity_at, last_activity.get(user_id))
+            if (new_login, new_activity) != (login_at, activity_at):
+                changes.append({"id": user_id, "last_login_at": new_login, "last_activity_at": new_activity})
+
+        for start in range(0, len(changes), chunk_size):
+            db.session.execute(update(User), changes[start:start + chunk_size])
+        db.session.commit()
+        return len(changes)
@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from sqlalchemy import event
+
+from config.db import db
+from config.init_db import init_database
+
+
+@pytest.fixture
+def sqlite_app(tmp_path):
+    """
+    A bare Flask app (no blueprints, no background threads) on a throwaway
+    SQLite database with every model's table, inside an app context.
+    """
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + str(tmp_path / "app.db")
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SECRET_KEY"] = "test-secret-key-test-secret-key!"
+    app.config["TESTING"] = True
+    init_database(app)
+
+    schema_path = str(tmp_path / "schema.db")
+    with app.app_context():
+        # The models live in the "public" schema; SQLite needs it attached
+        @event.listens_for(db.engine, "connect")
+        def attach_schema(dbapi_conn, _):
+            dbapi_conn.execute(f"ATTACH DATABASE '{schema_path}' AS {db.metadata.schema}")
+
+        db.create_all()
+        yield app
+        db.session.remove()
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from config.db import db
+from models.user import User
+from models.activity_log import ActivityLog
+from services.activity_log_service import ActivityLogService
+
+T0 = datetime(2030, 1, 1, 9, 0)
+
+
+def _seed():
+    """
+    Six dated entries (two pairs sharing a timestamp, so the id breaks the
+    tie) and three undated legacy ones. Returns the ids newest first.
+    """
+    user = User(name="Ada", email="ada@example.com", role="employee")
+    db.session.add(user)
+    db.session.flush()
+
+    offsets = [0, 1, 1, 2, 3, 3]
+    dated = [ActivityLog(user_id=user.id, action="Logged in", timestamp=T0 + timedelta(hours=h)) for h in offsets]
+    undated = [ActivityLog(user_id=user.id, action="Legacy") for _ in range(3)]
+    db.session.add_all(dated + undated)
+    db.session.flush()
+    ActivityLog.query.filter(ActivityLog.id.in_([log.id for log in undated]))\
+        .update({ActivityLog.timestamp: None}, synchronize_session=False)
+    db.session.commit()
+
+    newest_first = sorted(dated, key=lambda log: (log.timestamp, log.id), reverse=True)
+    return [log.id for log in newest_first] + sorted((log.id for log in undated), reverse=True)
+
+
+def _all_pages(limit, **filters):
+    pages, cursor = [], None
+    while True:
+        rows, cursor = ActivityLogService.page(cursor=cursor, limit=limit, **filters)
+        pages.append([row.id for row in rows])
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 4, 6, 9, 50])
+def test_pages_cover_every_entry_once_in_order(sqlite_app, limit):
+    expected = _seed()
+
+    pages = _all_pages(limit)
+
+    assert [log_id for page in pages for log_id in page] == expected
+    assert all(len(page) == limit for page in pages[:-1])
+    assert 0 < len(pages[-1]) <= limit
+
+
+def test_cursor_round_trip(sqlite_app):
+    assert ActivityLogService.decode_cursor(ActivityLogService.encode_cursor(T0, 42)) == (T0, 42)
+    assert ActivityLogService.decode_cursor(ActivityLogService.encode_cursor(None, 7)) == (None, 7)
+
+    with pytest.raises(ValueError):
+        ActivityLogService.decode_cursor("not-a-cursor")
+
+
+def test_page_ending_on_last_dated_entry_continues_with_undated(sqlite_app):
+    expected = _seed()
+
+    rows, cursor = ActivityLogService.page(limit=6)
+    assert [row.id for row in rows] == expected[:6]
+    assert ActivityLogService.decode_cursor(cursor)[0] is not None
+
+    rows, cursor = ActivityLogService.page(cursor=cursor, limit=6)
+    assert [row.id for row in rows] == expected[6:]
+    assert all(row.timestamp is None for row in rows)
+    assert cursor is None
+
+
+def test_date_range_skips_undated_entries(sqlite_app):
+    expected = _seed()
+
+    pages = _all_pages(2, since=T0 + timedelta(hours=1), until=T0 + timedelta(hours=3))
+
+    assert [log_id for page in pages for log_id in page] == expected[2:5]
+    assert ActivityLogService.count(since=T0 + timedelta(hours=1), until=T0 + timedelta(hours=3)) == 3
+
+
+def test_count_ignores_pagination(sqlite_app):
+    _seed()
+
+    assert ActivityLogService.count() == 9
+    assert ActivityLogService.count(action="legacy") == 3
+
+
+def test_total_only_on_first_page_unless_requested(sqlite_app):
+    _seed()
+
+    rows, cursor, total = ActivityLogService.page_from_args(MultiDict({"limit": "4"}))
+    assert (len(rows), total) == (4, 9)
+
+    rows, _, total = ActivityLogService.page_from_args(MultiDict({"limit": "4", "cursor": cursor}))
+    assert (len(rows), total) == (4, None)
+
+    _, _, total = ActivityLogService.page_from_args(MultiDict({"limit": "4", "cursor": cursor, "with_total": "1"}))
+    assert total == 9
@@ -0,0 +1,95 @@
+import logging
+from datetime import datetime, timedelta
+
+from config.db import db
+from models.user import User
+from models.activity_log import ActivityLog
+from models.employee_risk_state import EmployeeRiskState
+from services.activity_log_writer import ActivityLogWriter
+from services.user_activity_service import UserActivityService
+
+
+def _user(name="Ada"):
+    user = User(name=name, email=f"{name}@example.com", role="employee")
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def test_flush_writes_queued_entries_in_batches(sqlite_app):
+    user_id = _user().id
+    # Long interval: nothing is written until flush()
+    writer = ActivityLogWriter(flush_ms=60000, batch_size=3)
+    writer.init_app(sqlite_app)
+
+    for i in range(7):
+        writer.log(user_id, f"Action {i}")
+    assert writer.status()["unwritten"] == 7
+
+    assert writer.flush()
+    status = writer.status()
+    assert (status["written"], status["unwritten"], status["dropped"]) == (7, 0, 0)
+    assert sorted(action for (action,) in db.session.query(ActivityLog.action)) == [f"Action {i}" for i in range(7)]
+
+
+def test_background_thread_writes_after_interval(sqlite_app):
+    user_id = _user().id
+    writer = ActivityLogWriter(flush_ms=10, batch_size=100)
+    writer.init_app(sqlite_app)
+
+    writer.log(user_id, "Logged in")
+    assert writer.flush(timeout=5)
+    assert writer.status()["batches"] == 1
+    assert ActivityLog.query.filter_by(user_id=user_id).count() == 1
+
+
+def test_login_is_stamped_with_its_batch(sqlite_app):
+    user = _user()
+    writer = ActivityLogWriter(flush_ms=60000)
+    writer.init_app(sqlite_app)
+    at = datetime(2030, 1, 1, 9, 0)
+
+    writer.log(user.id, "Logged in", timestamp=at - timedelta(hours=1), login=True)
+    writer.log(user.id, "Logged in", timestamp=at, login=True)
+
+    # Nothing is written until the batch is
+    db.session.expire_all()
+    stored = db.session.get(User, user.id)
+    assert (stored.last_login_at, stored.last_activity_at) == (None, None)
+    assert ActivityLog.query.count() == 0
+
+    assert writer.flush()
+    db.session.expire_all()
+    stored = db.session.get(User, user.id)
+    assert (stored.last_login_at, stored.last_activity_at) == (at, at)
+    assert ActivityLog.query.filter_by(user_id=user.id, action="Logged in").count() == 2
+    assert db.session.get(EmployeeRiskState, user.id) is not None
+
+
+def test_stamps_never_move_backwards(sqlite_app):
+    user = _user()
+    at = datetime(2030, 1, 1, 9, 0)
+    UserActivityService.stamp({user.id: at}, {user.id: at})
+    db.session.expire_all()
+    UserActivityService.record_activity(user.id, at - timedelta(hours=1))
+    UserActivityService.stamp({user.id: at - timedelta(hours=2)}, {user.id: at - timedelta(hours=2)})
+    db.session.commit()
+
+    db.session.expire_all()
+    stored = db.session.get(User, user.id)
+    assert (stored.last_login_at, stored.last_activity_at) == (at, at)
+
+
+def test_failed_batch_is_dropped_and_logged(sqlite_app, caplog):
+    writer = ActivityLogWriter(buffered=False)
+    writer.init_app(sqlite_app)
+
+    # activity_log.user_id is NOT NULL, so the insert fails
+    with caplog.at_level(logging.ERROR):
+        writer.log(None, "Orphan entry")
+
+    assert writer.status()["dropped"] == 1
+    assert writer.flush()
+    assert "Dropped 1 activity log entries" in caplog.text
+    assert "'Orphan entry'" in caplog.text
+    assert ActivityLog.query.count() == 0
@@ -0,0 +1,136 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from services import ai_rate_limiter
+from services.ai_rate_limiter import (
+    AIRateLimiter, CircuitBreaker, MemoryTokenBucket, SQLiteTokenBucket
+)
+
+
+class _Clock:
+    """Stands in for the time module: both clocks advance together."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(ai_rate_limiter, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_bucket(request, tmp_path, clock):
+    def make(name, capacity, period):
+        if request.param == "memory":
+            return MemoryTokenBucket(name, capacity, period)
+        return SQLiteTokenBucket(name, capacity, period, str(tmp_path / "limits.sqlite3"))
+    return make
+
+
+def test_bucket_drains_and_refills(make_bucket, clock):
+    bucket = make_bucket("per_minute", 3, 60)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    assert bucket.available() == 0
+
+    # One token per 20 seconds
+    clock.now += 19
+    assert not bucket.try_acquire()
+    clock.now += 1
+    assert bucket.try_acquire()
+
+    # Never refills past capacity
+    clock.now += 3600
+    assert bucket.available() == 3
+
+
+def test_refund_returns_a_token(make_bucket):
+    bucket = make_bucket("daily", 1, 86400)
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    bucket.refund()
+    assert bucket.try_acquire()
+
+
+def test_sqlite_buckets_share_one_budget(tmp_path, clock):
+    path = str(tmp_path / "shared.sqlite3")
+    worker_a = SQLiteTokenBucket("per_minute", 2, 60, path)
+    worker_b = SQLiteTokenBucket("per_minute", 2, 60, path)
+
+    assert worker_a.try_acquire()
+    assert worker_b.try_acquire()
+    assert not worker_a.try_acquire()
+
+
+def test_breaker_opens_then_half_opens_after_cooldown(clock):
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=60)
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.stats()["state"] == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.stats()["state"] == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+    # After the cooldown exactly one trial call gets through
+    clock.now += 60
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    # A failed trial opens it again for a full cooldown
+    breaker.record_failure()
+    assert breaker.stats()["state"] == CircuitBreaker.OPEN
+    clock.now += 30
+    assert not breaker.allow_request()
+
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.record_success()
+    stats = breaker.stats()
+    assert (stats["state"], stats["consecutive_failures"]) == (CircuitBreaker.CLOSED, 0)
+    assert breaker.allow_request()
+
+
+def test_limiter_rejects_in_order_and_refunds(clock):
+    limiter = AIRateLimiter(
+        MemoryTokenBucket("per_minute", 2, 60),
+        MemoryTokenBucket("daily", 1, 86400),
+        CircuitBreaker(failure_threshold=1, cooldown=60)
+    )
+
+    assert limiter.acquire() == (True, None)
+    # The daily bucket rejects and the per-minute token is given back
+    assert limiter.acquire() == (False, "daily_quota")
+    assert limiter.per_minute.available() == 1
+
+    limiter.record_failure()
+    assert limiter.acquire() == (False, "circuit_open")
+    assert limiter.status()["rejected"] == {"circuit_open": 1, "rate_limited": 0, "daily_quota": 1}
+
+
+def test_limiter_failure_releases_trial_slot(clock):
+    class BrokenBucket(MemoryTokenBucket):
+        def try_acquire(self):
+            raise OSError("disk I/O error")
+
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=60)
+    limiter = AIRateLimiter(BrokenBucket("per_minute", 1, 60), MemoryTokenBucket("daily", 1, 86400), breaker)
+    breaker.record_failure()
+    clock.now += 60
+
+    with pytest.raises(OSError):
+        limiter.acquire()
+    # The half-open slot is free for the next caller
+    assert breaker.allow_request()
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+from config.db import db
+from models.user import User
+from models.task import Task
+from models.progress import Progress
+from services.alert_service import AlertService
+
+
+def _seed():
+    """Employees covering every branch of the alert rules."""
+    now = datetime.now()
+    users = []
+
+    def employee(name, joined_days_ago, last_login_hours_ago=None):
+        user = User(
+            name=name,
+            email=f"{name}@example.com",
+            role="employee",
+            joined_date=now - timedelta(days=joined_days_ago),
+            last_login_at=now - timedelta(hours=last_login_hours_ago) if last_login_hours_ago is not None else None
+        )
+        db.session.add(user)
+        db.session.flush()
+        users.append(user)
+        return user
+
+    def task(user, title, due_in_days, status="Pending", completion=None):
+        t = Task(title=title, status=status, assigned_to=user.id,
+                 due_date=now + timedelta(days=due_in_days) if due_in_days is not None else None)
+        db.session.add(t)
+        db.session.flush()
+        if completion is not None:
+            db.session.add(Progress(user_id=user.id, task_id=t.id, completion=completion, delay_days=0, time_spent=0))
+
+    employee("no_tasks", 10)
+
+    done = employee("all_done", 10)
+    task(done, "A", -3, "Completed", 100)
+    task(done, "B", 2, "Completed", 100)
+
+    overdue = employee("overdue", 1, last_login_hours_ago=2)
+    task(overdue, "Late report", -2, completion=40)
+    task(overdue, "Later", 5)
+
+    idle = employee("idle", 10, last_login_hours_ago=72)
+    task(idle, "Reading", 5, completion=20)
+
+    never_logged_in = employee("never_logged_in", 5)
+    task(never_logged_in, "Setup", 3)
+
+    active = employee("active", 10, last_login_hours_ago=1)
+    task(active, "Course", 4, completion=50)
+
+    both = employee("both", 20, last_login_hours_ago=100)
+    task(both, "Missed", -1, completion=10)
+
+    db.session.commit()
+    return users
+
+
+def test_bulk_alerts_match_scalar_evaluation(sqlite_app):
+    users = _seed()
+
+    bulk = AlertService.calculate_bulk_employee_alerts(users)
+
+    assert set(bulk) == {u.id for u in users}
+    for user in users:
+        assert bulk[user.id] == AlertService.calculate_employee_alerts(user), user.name
+
+    statuses = {u.name: bulk[u.id]["status"] for u in users}
+    assert statuses == {
+        "no_tasks": "On Track",
+        "all_done": "On Track",
+        "overdue": "Delayed",
+        "idle": "At Risk",
+        "never_logged_in": "At Risk",
+        "active": "On Track",
+        "both": "Delayed"
+    }
+
+
+def test_bulk_alerts_empty():
+    assert AlertService.calculate_bulk_employee_alerts([]) == {}
@@ -0,0 +1,46 @@
+import os
+import sys
+
+import joblib
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from services.compiled_forest import CompiledForest
+
+SERVICES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "services")
+FEATURES = ["completion", "delay_days", "tasks_completed", "time_spent"]
+
+
+def test_compiled_forest_matches_sklearn_on_training_data():
+    model = joblib.load(os.path.join(SERVICES_DIR, "model.pkl"))
+    df = pd.read_csv(os.path.join(SERVICES_DIR, "onboarding_real_data.csv"))
+    X = df[FEATURES]
+
+    compiled = CompiledForest.from_sklearn(model)
+
+    assert compiled.predict(X.to_numpy()).tolist() == model.predict(X).tolist()
+    assert abs(compiled.predict_proba(X.to_numpy()) - model.predict_proba(X)).max() < 1e-12
+
+
+def test_compiled_forest_matches_sklearn_off_grid():
+    model = joblib.load(os.path.join(SERVICES_DIR, "model.pkl"))
+    compiled = CompiledForest.from_sklearn(model)
+
+    # Values between and beyond the training points, incl. exact thresholds
+    rows = [
+        [c, d, t, s]
+        for c in (0, 9.5, 40, 50.5, 100)
+        for d in (0, 1.5, 7)
+        for t in (0, 4, 12)
+        for s in (0, 17.25, 60)
+    ]
+    split_nodes = compiled.left != compiled.right
+    rows += [
+        [value if j == i else 10 for j in range(4)]
+        for i in range(4)
+        for value in compiled.threshold[split_nodes & (compiled.feature == i)]
+    ]
+    X = pd.DataFrame(rows, columns=FEATURES)
+
+    assert compiled.predict(X.to_numpy()).tolist() == model.predict(X).tolist()
@@ -0,0 +1,97 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from sqlalchemy import event
+
+from config.db import db
+from config.migrations import apply_migrations, explain_hot_queries, hot_queries
+
+
+def _make_app(database_url):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_url
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    with app.app_context():
+        import models.user, models.task, models.progress, models.activity_log  # noqa: F401
+        import models.employee_notification, models.task_message  # noqa: F401
+    return app
+
+
+def _assert_indexed(app):
+    with app.app_context():
+        db.create_all()
+        apply_migrations(db.engine)
+        # Re-running is a no-op
+        assert apply_migrations(db.engine) == []
+
+        results = explain_hot_queries(db.engine)
+        assert len(results) == len(hot_queries())
+        unindexed = [(name, plan) for name, index, plan in results if index is None]
+        assert not unindexed, unindexed
+
+
+def test_hot_queries_use_indexes_sqlite():
+    with tempfile.TemporaryDirectory() as tmp:
+        app = _make_app("sqlite:///" + os.path.join(tmp, "indexes.db"))
+        schema_path = os.path.join(tmp, "schema.db")
+
+        # The models live in the "public" schema; SQLite needs it attached
+        with app.app_context():
+            @event.listens_for(db.engine, "connect")
+            def attach_schema(dbapi_conn, _):
+                dbapi_conn.execute(f"ATTACH DATABASE '{schema_path}' AS {db.metadata.schema}")
+
+        _assert_indexed(app)
+
+
+@pytest.mark.skipif(
+    not os.environ.get("TEST_DATABASE_URL", "").startswith("postgres"),
+    reason="set TEST_DATABASE_URL to a disposable PostgreSQL database"
+)
+def test_hot_queries_use_indexes_postgres():
+    _assert_indexed(_make_app(os.environ["TEST_DATABASE_URL"]))
+
+
+@pytest.mark.skipif(
+    not os.environ.get("TEST_DATABASE_URL", "").startswith("postgres"),
+    reason="set TEST_DATABASE_URL to a disposable PostgreSQL database"
+)
+def test_invalid_concurrent_index_is_rebuilt_postgres(tmp_path):
+    from sqlalchemy import text
+    from config.migrations import _postgres_index_valid
+
+    # A unique index built over duplicates fails and is left INVALID
+    (tmp_path / "900_probe.sql").write_text(
+        "CREATE TABLE IF NOT EXISTS migration_probe (v INTEGER);\n"
+        "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_migration_probe_v ON migration_probe (v);\n"
+    )
+    app = _make_app(os.environ["TEST_DATABASE_URL"])
+    with app.app_context():
+        engine = db.engine
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS migration_probe"))
+            conn.execute(text("CREATE TABLE migration_probe (v INTEGER)"))
+            conn.execute(text("INSERT INTO migration_probe VALUES (1), (1)"))
+        try:
+            with pytest.raises(Exception):
+                apply_migrations(engine, str(tmp_path))
+            with engine.connect() as conn:
+                assert _postgres_index_valid(conn, "ix_migration_probe_v") is False
+
+            # Not recorded, so the next run drops the leftover and rebuilds it
+            with engine.begin() as conn:
+                conn.execute(text("DELETE FROM migration_probe"))
+            assert apply_migrations(engine, str(tmp_path)) == ["900_probe.sql"]
+            with engine.connect() as conn:
+                assert _postgres_index_valid(conn, "ix_migration_probe_v") is True
+        finally:
+            with engine.begin() as conn:
+                conn.execute(text("DROP TABLE IF EXISTS migration_probe"))
+                conn.execute(text("DELETE FROM schema_migrations WHERE name = '900_probe.sql'"))
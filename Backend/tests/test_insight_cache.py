@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from services.insight_cache import MemoryInsightCache, SQLiteInsightCache
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    def make(maxsize=10, ttl=60):
+        if request.param == "memory":
+            return MemoryInsightCache(maxsize=maxsize, ttl=ttl)
+        return SQLiteInsightCache(str(tmp_path / "insights.sqlite3"), maxsize=maxsize, ttl=ttl)
+    return make
+
+
+def test_hit_and_miss(make_cache):
+    cache = make_cache()
+    assert cache.get("a") is None
+
+    cache.set("a", {"summary": "ok", "actions": ["x"]})
+    assert cache.get("a") == {"summary": "ok", "actions": ["x"]}
+    assert cache.get(42) is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+    assert stats["hit_rate"] == round(1 / 3, 3)
+
+    cache.delete("a")
+    assert cache.get("a") is None
+    assert cache.size() == 0
+
+
+def test_entries_expire_after_ttl(make_cache):
+    cache = make_cache(ttl=1)
+    cache.set("a", {"summary": "old"})
+    assert cache.get("a") == {"summary": "old"}
+
+    time.sleep(1.1)
+    assert cache.get("a") is None
+
+    cache.set("a", {"summary": "new"})
+    assert cache.get("a") == {"summary": "new"}
+
+
+def test_least_recently_read_entry_is_evicted(make_cache):
+    cache = make_cache(maxsize=2)
+    cache.set("a", {"n": 1})
+    time.sleep(0.01)
+    cache.set("b", {"n": 2})
+    time.sleep(0.01)
+    cache.get("a")
+    time.sleep(0.01)
+    cache.set("c", {"n": 3})
+
+    assert cache.size() == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == {"n": 1}
+    assert cache.get("c") == {"n": 3}
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    worker_a = SQLiteInsightCache(path)
+    worker_b = SQLiteInsightCache(path)
+
+    worker_a.set("ctx", {"summary": "from a"})
+    assert worker_b.get("ctx") == {"summary": "from a"}
+    worker_b.delete("ctx")
+    assert worker_a.get("ctx") is None
+
+
+def test_capacity_grows_to_fit_the_population(make_cache):
+    cache = make_cache(maxsize=2)
+    assert cache.ensure_capacity(4)
+    assert not cache.ensure_capacity(3)
+
+    for key in "abcd":
+        cache.set(key, {"k": key})
+    assert cache.size() == 4
+    assert cache.get("a") == {"k": "a"}
+    assert cache.stats()["maxsize"] == 4
+
+
+def test_sqlite_capacity_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    worker_a = SQLiteInsightCache(path, maxsize=2)
+    worker_b = SQLiteInsightCache(path, maxsize=2)
+
+    worker_a.ensure_capacity(3)
+    for key in "abc":
+        worker_b.set(key, {"k": key})
+    assert worker_b.size() == 3
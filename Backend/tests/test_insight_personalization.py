@@ -0,0 +1,32 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from services.ai_service import NAME_PLACEHOLDER, _depersonalize, _personalize, _share
+
+
+def test_short_first_name_only_replaced_as_a_whole_word():
+    insight = {
+        "summary": "Al is behind on All tasks. Also, Al Smith missed Albert's review.",
+        "actions": ["Pair Al with a mentor"],
+        "score": 40
+    }
+
+    templated = _depersonalize(insight, "Al Smith")
+
+    assert templated["summary"] == (
+        f"{NAME_PLACEHOLDER} is behind on All tasks. Also, {NAME_PLACEHOLDER} missed Albert's review."
+    )
+    assert templated["actions"] == [f"Pair {NAME_PLACEHOLDER} with a mentor"]
+    assert templated["score"] == 40
+
+
+def test_name_with_punctuation_and_round_trip():
+    insight = {"summary": "Ann Lee's annual review: Ann should plan. Annika agrees."}
+
+    shared = _share(insight, {"name": "Ann Lee"}, {"name": "O'Neil"})
+
+    assert shared["summary"] == "O'Neil's annual review: O'Neil should plan. Annika agrees."
+    assert _depersonalize(shared, "O'Neil") == _depersonalize(insight, "Ann Lee")
+    assert _personalize({"summary": NAME_PLACEHOLDER}, None) == {"summary": "The employee"}
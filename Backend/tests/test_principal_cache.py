@@ -0,0 +1,113 @@
+import datetime
+
+import jwt
+import pytest
+from flask import jsonify, request
+from sqlalchemy import event
+
+from config.db import db
+from models.user import User
+from services.principal_cache import principal_cache
+from utils.auth_guard import check_role
+
+
+@pytest.fixture
+def client(sqlite_app):
+    principal_cache.clear()
+
+    @sqlite_app.route("/hr-only")
+    @check_role(["hr"])
+    def hr_only():
+        return jsonify({"role": request.current_user.role})
+
+    yield sqlite_app.test_client()
+    principal_cache.clear()
+
+
+@pytest.fixture
+def user_queries(sqlite_app):
+    """Counts SELECTs against the user table."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and ".user" in statement:
+            statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(db.engine, "before_cursor_execute", record)
+
+
+def _user(role):
+    user = User(name="Sam", email="sam@example.com", role=role)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def _headers(sqlite_app, user, role):
+    token = jwt.encode({
+        "sub": str(user.id),
+        "role": role,
+        "iat": datetime.datetime.utcnow(),
+        "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+    }, sqlite_app.config["SECRET_KEY"], algorithm="HS256")
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_repeat_requests_hit_the_cache(sqlite_app, client, user_queries):
+    headers = _headers(sqlite_app, _user("hr"), "hr")
+    user_queries.clear()
+
+    assert client.get("/hr-only", headers=headers).status_code == 200
+    assert len(user_queries) == 1
+    assert client.get("/hr-only", headers=headers).status_code == 200
+    assert len(user_queries) == 1
+    assert principal_cache.stats()["hits"] == 1
+
+
+def test_role_change_invalidates_at_once(sqlite_app, client):
+    user = _user("hr")
+    headers = _headers(sqlite_app, user, "hr")
+    assert client.get("/hr-only", headers=headers).status_code == 200
+
+    # Demoted while the token is still valid
+    user.role = "employee"
+    db.session.commit()
+
+    assert principal_cache.stats()["size"] == 0
+    assert client.get("/hr-only", headers=headers).status_code == 403
+
+
+def test_unrelated_update_keeps_the_entry(sqlite_app, client):
+    user = _user("hr")
+    headers = _headers(sqlite_app, user, "hr")
+    client.get("/hr-only", headers=headers)
+
+    user.last_login_at = datetime.datetime.utcnow()
+    db.session.commit()
+
+    assert principal_cache.stats()["size"] == 1
+
+
+def test_rolled_back_change_is_not_cached(sqlite_app, client):
+    user = _user("hr")
+    headers = _headers(sqlite_app, user, "hr")
+    client.get("/hr-only", headers=headers)
+
+    user.role = "employee"
+    db.session.flush()
+    db.session.rollback()
+
+    assert client.get("/hr-only", headers=headers).get_json() == {"role": "hr"}
+
+
+def test_deleted_user_is_rejected(sqlite_app, client):
+    user = _user("hr")
+    headers = _headers(sqlite_app, user, "hr")
+    client.get("/hr-only", headers=headers)
+
+    db.session.delete(user)
+    db.session.commit()
+
+    assert client.get("/hr-only", headers=headers).status_code == 401
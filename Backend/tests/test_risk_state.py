@@ -0,0 +1,141 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from config.db import db
+from models.user import User
+from models.task import Task
+from models.progress import Progress
+from models.employee_risk_state import EmployeeRiskState
+from services import alert_service, risk_state_service
+from services.risk_state_service import RiskStateService
+
+T0 = datetime(2030, 1, 1, 9, 0)
+
+
+class _Clock:
+    current = T0
+
+
+class _FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return _Clock.current
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    monkeypatch.setattr(risk_state_service, "datetime", _FrozenDatetime)
+    monkeypatch.setattr(alert_service, "datetime", _FrozenDatetime)
+    _Clock.current = T0
+    return _Clock
+
+
+def _employee(name, task_due, last_login):
+    user = User(name=name, email=f"{name}@example.com", role="employee",
+                joined_date=T0 - timedelta(days=10), last_login_at=last_login)
+    db.session.add(user)
+    db.session.flush()
+    task = Task(title=f"{name} task", status="Pending", due_date=task_due, assigned_to=user.id)
+    db.session.add(task)
+    db.session.flush()
+    db.session.add(Progress(user_id=user.id, task_id=task.id, completion=20, delay_days=0, time_spent=0))
+    return user.id
+
+
+def _stored(user_id):
+    db.session.expire_all()
+    return db.session.get(EmployeeRiskState, user_id)
+
+
+def test_state_transitions_at_next_transition_at(sqlite_app, clock):
+    deadline_id = _employee("deadline", T0 + timedelta(hours=2), T0 - timedelta(hours=1))
+    idle_id = _employee("idle", T0 + timedelta(days=10), T0 - timedelta(hours=1))
+    db.session.commit()
+
+    RiskStateService.refresh([deadline_id, idle_id])
+    db.session.commit()
+
+    deadline_state = _stored(deadline_id)
+    assert deadline_state.status == "On Track"
+    assert deadline_state.next_transition_at == T0 + timedelta(hours=2)
+    idle_state = _stored(idle_id)
+    assert idle_state.status == "On Track"
+    assert idle_state.next_transition_at == T0 + timedelta(hours=23)
+
+    # Before any transition nothing is due
+    clock.current = T0 + timedelta(hours=1)
+    assert RiskStateService.sweep() == 0
+    assert RiskStateService.load_user_risks()[deadline_id]["status"] == "On Track"
+
+    # The deadline passes: reads see it live, without writing the row
+    clock.current = T0 + timedelta(hours=3)
+    risks = RiskStateService.load_user_risks()
+    assert risks[deadline_id]["status"] == "Delayed"
+    assert risks[deadline_id]["overdue_count"] == 1
+    assert risks[idle_id]["status"] == "On Track"
+    assert _stored(deadline_id).status == "On Track"
+
+    # The sweep persists it and schedules the next (inactivity) transition
+    assert RiskStateService.sweep() == 1
+    deadline_state = _stored(deadline_id)
+    assert deadline_state.status == "Delayed"
+    assert deadline_state.missed_deadline
+    assert deadline_state.next_transition_at == T0 + timedelta(hours=23)
+
+    # 24h without a login
+    clock.current = T0 + timedelta(hours=24)
+    assert RiskStateService.load_user_risks()[idle_id]["status"] == "At Risk"
+    assert RiskStateService.sweep() == 2
+    idle_state = _stored(idle_id)
+    assert idle_state.status == "At Risk"
+    assert idle_state.low_engagement
+    assert idle_state.next_transition_at == T0 + timedelta(days=10)
+
+
+def test_read_path_never_commits(sqlite_app, clock):
+    user_id = _employee("fresh", T0 + timedelta(days=1), T0)
+    db.session.commit()
+
+    # No state row yet and a pending change in the caller's session
+    db.session.add(User(name="pending", email="pending@example.com", role="hr"))
+    risks = RiskStateService.load_user_risks()
+    assert risks[user_id]["status"] == "On Track"
+    db.session.rollback()
+
+    assert User.query.filter_by(email="pending@example.com").first() is None
+    assert db.session.get(EmployeeRiskState, user_id) is None
+
+
+def test_refresh_drops_the_request_snapshot(sqlite_app, clock):
+    from flask import g
+    from services.alert_service import AlertService
+
+    user_id = _employee("snap", T0 + timedelta(days=1), T0)
+    db.session.commit()
+
+    with sqlite_app.test_request_context():
+        snapshot = AlertService.get_snapshot()
+        assert AlertService.get_snapshot() is snapshot
+
+        RiskStateService.refresh([user_id])
+        assert "risk_snapshot" not in g
+        assert AlertService.get_snapshot() is not snapshot
+
+
+def test_user_risks_for_a_batch_match_the_full_map(sqlite_app, clock):
+    from services.alert_service import AlertService
+
+    ids = [_employee(f"batch{i}", T0 + timedelta(hours=i - 2), T0 - timedelta(hours=30 * (i % 2)))
+           for i in range(4)]
+    db.session.commit()
+    RiskStateService.refresh(ids[:2])
+    db.session.commit()
+
+    full = RiskStateService.load_user_risks()
+    subset = AlertService.get_user_risks_for(ids[1:3])
+
+    assert set(subset) == set(ids[1:3])
+    for user_id in subset:
+        assert subset[user_id]["status"] == full[user_id]["status"]
+        assert subset[user_id]["reasons"] == full[user_id]["reasons"]
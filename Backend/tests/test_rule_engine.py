@@ -0,0 +1,202 @@
+import math
+import os
+import random
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from services.ai_explainer import explain_risk, explain_risk_batch
+from services.predictor import analyze_employee_risk, analyze_employee_risk_batch
+
+
+# Reference copies of the scalar implementations the rule tables replaced
+
+def scalar_explain_risk(data):
+    reasons = []
+    risk_score = 0  # Higher = worse risk
+
+    # Safe reads with defaults
+    completion = data.get("completion", 100)
+    delay_days = data.get("delay_days", 0)
+    tasks_completed = data.get("tasks_completed", 0)
+    time_spent = data.get("time_spent", 0)
+
+    # Rule 1 — Task completion
+    if completion < 40:
+        reasons.append("Very low task completion")
+        risk_score += 3
+    elif completion < 60:
+        reasons.append("Low task completion")
+        risk_score += 2
+    elif completion < 80:
+        reasons.append("Moderate task completion")
+        risk_score += 1
+
+    # Rule 2 — Delay history
+    if delay_days > 10:
+        reasons.append("Severe task delays")
+        risk_score += 3
+    elif delay_days > 5:
+        reasons.append("High delay history")
+        risk_score += 2
+    elif delay_days > 2:
+        reasons.append("Minor delays")
+        risk_score += 1
+
+    # Rule 3 — Tasks completed
+    if tasks_completed < 2:
+        reasons.append("Very few tasks completed")
+        risk_score += 3
+    elif tasks_completed < 4:
+        reasons.append("Few tasks completed")
+        risk_score += 2
+
+    # Rule 4 — Time spent (optional signal)
+    if time_spent < 2:
+        reasons.append("Low engagement time")
+        risk_score += 1
+
+    # Risk Level Classification
+    if risk_score >= 6:
+        risk_level = "High Risk"
+    elif risk_score >= 3:
+        risk_level = "Medium Risk"
+    else:
+        risk_level = "Low Risk"
+
+    # Healthy case
+    if not reasons:
+        reasons.append("Performance is healthy")
+
+    return {
+        "risk_level": risk_level,
+        "risk_score": risk_score,
+        "reasons": reasons
+    }
+
+
+def scalar_analyze_employee_risk(data):
+    """
+    Analyzes employee data to determine risk level, message, and recommendations.
+    Handles missing keys and ensures robustness.
+    """
+    # Safe data extraction with defaults
+    try:
+        completion = float(data.get("completion") or 0)
+        delay_days = int(data.get("delay_days") or 0)
+        missed_deadlines = int(data.get("missed_deadlines") or 0)
+    except (ValueError, TypeError):
+        completion = 0.0
+        delay_days = 0
+        missed_deadlines = 0
+    
+    risk_level = "Low"
+    message = "Consistent progress"
+    risk_type = "Good" # For internal logic
+    recommendations = []
+
+    # Logic for Risk Level & Message
+    # New Strict Rules from User:
+    # 1. Missed critical deadline -> HIGH RISK (RED)
+    if missed_deadlines > 0:
+        risk_level = "High"
+        message = "Missed critical deadline — immediate action required."
+        risk_type = "Critical"
+        recommendations = [
+            "Schedule 1:1 meeting to discuss blockers",
+            "Assign a mentor or buddy",
+            "Reduce workload temporarily",
+            "Provide additional training resources"
+        ]
+    # 2. Just started (0-10%) -> NEUTRAL
+    elif completion <= 10:
+        risk_level = "Neutral"
+        message = "Just started — no risk assessment yet."
+        risk_type = "Neutral"
+        recommendations = [
+            "Ensure access to all tools",
+            "Schedule an introductory walkthrough",
+            "Verify account setup completion"
+        ]
+    # 3. Low completion rate (< 40%) but no missed deadline -> MEDIUM RISK
+    elif completion < 40:
+        risk_level = "Medium"
+        message = "Low completion rate — monitor performance."
+        risk_type = "Warning"
+        recommendations = [
+            "Check task difficulty level",
+            "Provide clearer requirements",
+            "Increase supervision frequency",
+            "Send a gentle reminder"
+        ]
+    # 4. Steady progress (>= 50%) AND no missed deadline -> ON TRACK
+    elif completion >= 50:
+        # Default/Good state
+        risk_level = "Low"
+        message = "Consistent progress — on track."
+        risk_type = "Good"
+        recommendations = [
+            "Acknowledge good progress",
+            "Assign next set of advanced tasks",
+            "Encourage peer networking"
+        ]
+    else:
+        # Fallback for 10-40% or 40-50% gaps if strictly following rules, 
+        # but let's assume "Consistent progress" for safe zone or "Monitor" for gap
+        risk_level = "Low"
+        message = "Consistent progress."
+        risk_type = "Good"
+        recommendations = []
+
+    return {
+        "risk_level": risk_type, # Critical, Warning, Neutral, Good
+        "message": message,
+        "recommended_actions": recommendations
+    }
+
+
+# Every threshold, the values right around it, and some awkward inputs
+EDGE_VALUES = [0, 1, 1.5, 2, 2.5, 3, 4, 5, 5.5, 6, 9.99, 10, 10.01, 11, 39.9, 40, 45, 49.9, 50, 59, 60, 79, 80, 100, -3]
+
+
+def _records(count=2000, seed=7):
+    rng = random.Random(seed)
+    keys = ["completion", "delay_days", "tasks_completed", "time_spent", "missed_deadlines"]
+    records = []
+    for _ in range(count):
+        record = {}
+        for key in keys:
+            roll = rng.random()
+            if roll < 0.1:
+                continue  # missing key
+            elif roll < 0.6:
+                record[key] = rng.choice(EDGE_VALUES)
+            else:
+                record[key] = rng.uniform(-5, 120)
+        records.append(record)
+    return records
+
+
+def test_explain_risk_matches_scalar_rules():
+    records = _records()
+    assert explain_risk_batch(records) == [scalar_explain_risk(r) for r in records]
+    assert explain_risk(records[0]) == scalar_explain_risk(records[0])
+
+
+def test_analyze_employee_risk_matches_scalar_rules():
+    # No full feature set, so no model prediction is involved
+    records = [{k: v for k, v in r.items() if k != "tasks_completed"} for r in _records()]
+    records += [
+        {"completion": None, "missed_deadlines": "2"},
+        {"completion": "abc", "missed_deadlines": 1},
+        {"completion": 75, "delay_days": "1.5"},
+        {"completion": math.nan},
+        {}
+    ]
+
+    for record, analysis in zip(records, analyze_employee_risk_batch(records)):
+        expected = scalar_analyze_employee_risk(record)
+        assert analysis["risk_level"] == expected["risk_level"]
+        assert analysis["message"] == expected["message"]
+        assert analysis["recommended_actions"] == expected["recommended_actions"]
+        assert analysis == analyze_employee_risk(record)
@@ -19,7 +19,10 @@ def check_role(allowed_roles):
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
+            from services.principal_cache import principal_cache
+
             user = None
+            allowed_roles_lower = [r.lower() for r in allowed_roles]
             
             # Try JWT first
             auth_header = request.headers.get("Authorization")
@@ -27,28 +30,39 @@ def check_role(allowed_roles):
                 token = auth_header.split(" ")[1]
                 try:
                     data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
-                    from models.user import User
-                    user = User.query.get(int(data['sub']))
                 except jwt.ExpiredSignatureError:
                     return jsonify({"message": "Token has expired"}), 401
                 except jwt.InvalidTokenError:
                     return jsonify({"message": "Invalid token"}), 401
                 except Exception as e:
                     return jsonify({"message": f"Token error: {str(e)}"}), 401
+
+                # The role claim is signed, so a token that was never allowed
+                # is rejected without touching the database
+                claimed_role = (data.get("role") or "").lower()
+                if claimed_role and claimed_role not in allowed_roles_lower:
+                    return jsonify({
+                        "message": f"Access denied. Required roles: {', '.join(allowed_roles)}"
+                    }), 403
+
+                try:
+                    # Cached per (user, token iat); no user query on a cache hit
+                    user = principal_cache.from_token(data)
+                except Exception as e:
+                    return jsonify({"message": f"Token error: {str(e)}"}), 401
             
             # Fallback to X-User-Id header for backward compatibility
             if not user:
                 user_id = request.headers.get("X-User-Id")
-                if user_id:
-                    from models.user import User
-                    user = User.query.get(user_id)
+                if user_id and user_id.isdigit():
+                    user = principal_cache.get(user_id)
             
             if not user:
                 return jsonify({"message": "Authentication required"}), 401
             
-            # Case-insensitive role check
+            # Case-insensitive role check against the current role, so a
+            # demotion applies before the token expires
             user_role = user.role.lower() if user.role else ""
-            allowed_roles_lower = [r.lower() for r in allowed_roles]
             
             if user_role not in allowed_roles_lower:
                 return jsonify({